@@ -0,0 +1,188 @@
+import datetime as dt
+import heapq
+import random
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+# =========================
+# Conflictos de horario: árbol de intervalos + barrido ordenado
+# =========================
+SIN_RESPONSABLE = {"", "—"}
+
+
+@dataclass
+class Conflicto:
+    a: Hashable          # _id del bloque que empieza antes
+    b: Hashable
+    tipo: str            # "responsable" (misma persona dos veces) o "solape"
+    minutos: float       # minutos superpuestos
+
+
+class _Nodo:
+    __slots__ = ("ini", "fin", "id", "prio", "max_fin", "izq", "der")
+
+    def __init__(self, ini, fin, item_id, prio):
+        self.ini, self.fin, self.id, self.prio = ini, fin, item_id, prio
+        self.max_fin = fin
+        self.izq = self.der = None
+
+
+def _actualizar(n: _Nodo) -> _Nodo:
+    m = n.fin
+    if n.izq is not None and n.izq.max_fin > m:
+        m = n.izq.max_fin
+    if n.der is not None and n.der.max_fin > m:
+        m = n.der.max_fin
+    n.max_fin = m
+    return n
+
+
+def _split(n: _Nodo | None, key: tuple) -> Tuple[_Nodo | None, _Nodo | None]:
+    """Parte el treap en (< key, >= key) según (inicio, id)."""
+    if n is None:
+        return None, None
+    if (n.ini, n.id) < key:
+        n.der, der = _split(n.der, key)
+        return _actualizar(n), der
+    izq, n.izq = _split(n.izq, key)
+    return izq, _actualizar(n)
+
+
+def _merge(a: _Nodo | None, b: _Nodo | None) -> _Nodo | None:
+    if a is None or b is None:
+        return a or b
+    if a.prio > b.prio:
+        a.der = _merge(a.der, b)
+        return _actualizar(a)
+    b.izq = _merge(a, b.izq)
+    return _actualizar(b)
+
+
+class IntervalTree:
+    """Treap ordenado por inicio y aumentado con el fin máximo de cada subárbol.
+    Alta/baja en O(log n); ¿choca [ini, fin)? en O(log n); listar choques en O(log n + k)."""
+
+    def __init__(self, intervalos: Iterable[Tuple[Hashable, dt.datetime, dt.datetime]] = (), seed: int = 0):
+        self.raiz: _Nodo | None = None
+        self.por_id: Dict[Hashable, Tuple[dt.datetime, dt.datetime]] = {}
+        self._rng = random.Random(seed)
+        for item_id, ini, fin in intervalos:
+            self.add(item_id, ini, fin)
+
+    def __len__(self) -> int:
+        return len(self.por_id)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.por_id
+
+    def add(self, item_id: Hashable, ini: dt.datetime, fin: dt.datetime) -> None:
+        if item_id in self.por_id:
+            self.remove(item_id)
+        izq, der = _split(self.raiz, (ini, item_id))
+        self.raiz = _merge(_merge(izq, _Nodo(ini, fin, item_id, self._rng.random())), der)
+        self.por_id[item_id] = (ini, fin)
+
+    def remove(self, item_id: Hashable) -> None:
+        prev = self.por_id.pop(item_id, None)
+        if prev is None:
+            return
+        izq, resto = _split(self.raiz, (prev[0], item_id))
+        _, der = _split(resto, (prev[0], item_id, 1))   # el nodo exacto queda en medio
+        self.raiz = _merge(izq, der)
+
+    def hay_solape(self, ini: dt.datetime, fin: dt.datetime) -> bool:
+        """Búsqueda clásica de árbol de intervalos: baja por un solo camino."""
+        n = self.raiz
+        while n is not None:
+            if n.ini < fin and n.fin > ini:
+                return True
+            n = n.izq if n.izq is not None and n.izq.max_fin > ini else n.der
+        return False
+
+    def solapados(self, ini: dt.datetime, fin: dt.datetime) -> List[Hashable]:
+        """Ids cuyos intervalos se cruzan con [ini, fin), en orden de inicio."""
+        out: List[Hashable] = []
+        # recorrido en orden, podando subárboles que terminan antes de `ini`
+        visit: List[_Nodo] = []
+        n = self.raiz
+        while visit or n is not None:
+            if n is not None and n.max_fin > ini:
+                visit.append(n)
+                n = n.izq
+                continue
+            if not visit:
+                break
+            n = visit.pop()
+            if n.ini >= fin:
+                break   # todo lo que sigue empieza después
+            if n.fin > ini:
+                out.append(n.id)
+            n = n.der
+        return out
+
+
+def _persona(item: Dict) -> str:
+    return str(item.get("Responsable", "")).strip()
+
+
+def tipo_conflicto(a: Dict, b: Dict) -> str:
+    pa = _persona(a)
+    return "responsable" if pa not in SIN_RESPONSABLE and pa == _persona(b) else "solape"
+
+
+def detectar(bloques: Sequence[Dict]) -> List[Conflicto]:
+    """Todos los pares que se cruzan, con un barrido por inicio: O(n log n + k)."""
+    orden = sorted(range(len(bloques)), key=lambda i: (bloques[i]["_start_dt"], bloques[i]["_end_dt"]))
+    activos: List[Tuple[dt.datetime, int]] = []   # heap por fin
+    out: List[Conflicto] = []
+    for i in orden:
+        b = bloques[i]
+        while activos and activos[0][0] <= b["_start_dt"]:
+            heapq.heappop(activos)
+        for fin, j in activos:
+            a = bloques[j]
+            minutos = (min(fin, b["_end_dt"]) - b["_start_dt"]).total_seconds() / 60
+            out.append(Conflicto(a["_id"], b["_id"], tipo_conflicto(a, b), minutos))
+        heapq.heappush(activos, (b["_end_dt"], i))
+    return out
+
+
+def con_conflicto(conflictos: Iterable[Conflicto]) -> Dict[Hashable, str]:
+    """_id -> peor tipo de conflicto en que participa (para marcar el timeline)."""
+    out: Dict[Hashable, str] = {}
+    for c in conflictos:
+        for i in (c.a, c.b):
+            if out.get(i) != "responsable":
+                out[i] = c.tipo
+    return out
+
+
+def fijar_inicio(item: Dict, inicio: dt.datetime) -> None:
+    """Mueve un bloque conservando su duración y actualiza las columnas visibles."""
+    fin = inicio + dt.timedelta(minutes=int(item["Min"]))
+    item["_start_dt"], item["_end_dt"] = inicio, fin
+    item["Inicio"], item["Fin"] = inicio.strftime("%H:%M"), fin.strftime("%H:%M")
+
+
+def resolver(bloques: Sequence[Dict], solo_responsable: bool = False) -> Dict[Hashable, dt.datetime]:
+    """Nuevos inicios que eliminan los choques con el mínimo retraso total.
+    Conserva el orden por hora y solo atrasa: cada bloque empieza en
+    max(su inicio, fin del anterior de su cadena), que es el mínimo posible para
+    cada uno a la vez. Con `solo_responsable` cada persona es una cadena aparte
+    (los bloques sin responsable no se mueven). Devuelve solo los que cambian."""
+    cadenas: Dict[str, List[Dict]] = {}
+    for b in bloques:
+        clave = _persona(b) if solo_responsable else ""
+        if solo_responsable and clave in SIN_RESPONSABLE:
+            continue
+        cadenas.setdefault(clave, []).append(b)
+    nuevos: Dict[Hashable, dt.datetime] = {}
+    for cadena in cadenas.values():
+        cadena.sort(key=lambda b: (b["_start_dt"], b["_end_dt"]))
+        fin_prev = None
+        for b in cadena:
+            ini = b["_start_dt"] if fin_prev is None else max(b["_start_dt"], fin_prev)
+            if ini != b["_start_dt"]:
+                nuevos[b["_id"]] = ini
+            fin_prev = ini + (b["_end_dt"] - b["_start_dt"])
+    return nuevos
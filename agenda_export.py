@@ -0,0 +1,231 @@
+import csv
+import datetime as dt
+import hashlib
+import io
+import tempfile
+import threading
+import zipfile
+from dataclasses import dataclass
+from string import Template
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from agenda_zonas import convertir, valida
+from catalogo_store import Memo
+
+# =========================
+# Exportación bajo demanda: CSV, Markdown (plantillas), ICS y zip de varias reuniones
+# =========================
+# Cada formato es un generador de trozos de texto: se puede escribir directo a un
+# archivo o a una entrada de zip sin armar el documento entero en memoria.
+COLUMNAS_CSV = ["Tema", "Responsable", "Inicio", "Fin", "Min", "Tipo", "Objetivo"]
+PRODID = "-//agenda-simple//ES"
+SPOOL_BYTES = 32 * 1024 * 1024   # zips más grandes pasan a disco
+
+
+@dataclass(frozen=True)
+class Plantilla:
+    """Plantilla Markdown con string.Template ($campo). Reunión: $titulo $fecha $lugar
+    $zona $anfitrion $link; bloque: $inicio $fin $tema $responsable $min $tipo
+    $objetivo $pos. Los campos *_linea ya traen el salto y quedan vacíos si no aplican."""
+    encabezado: str
+    item: str
+    vacio: str = "- *(Sin puntos cargados)*\n"
+    pie: str = ""
+
+
+PLANTILLAS: Dict[str, Plantilla] = {
+    "Acta": Plantilla(
+        encabezado=("# $titulo\n- **Fecha:** $fecha\n- **Lugar:** $lugar\n- **Zona horaria:** $zona"
+                    "$anfitrion_linea$link_linea$zonas_linea\n\n## Agenda\n"),
+        item=("- **$inicio–$fin** · **$tema** (Responsable: $responsable; $min min; $tipo)"
+              "$otras_linea$objetivo_linea\n"),
+        pie="\n## Acuerdos y pendientes\n- ",
+    ),
+    "Orden del día": Plantilla(
+        encabezado="## $titulo — $fecha ($zona)\n\n",
+        item="$pos. $inicio $tema — $responsable\n",
+        vacio="*(Sin puntos)*\n",
+    ),
+    "Tabla": Plantilla(
+        encabezado="### $titulo · $fecha\n\n| Inicio | Fin | Tema | Responsable | Tipo |\n|---|---|---|---|---|\n",
+        item="| $inicio | $fin | $tema | $responsable | $tipo |\n",
+        vacio="",
+    ),
+}
+
+
+def firma(meta: Dict, agenda: Sequence[Dict], *extra) -> str:
+    """Hash del contenido exportable: misma agenda -> misma firma (clave de caché)."""
+    h = hashlib.sha1()
+    h.update(repr(([meta.get(c) for c in ("titulo", "fecha", "zona", "lugar", "anfitrion", "link")],
+                   extra)).encode("utf-8"))
+    for it in agenda:
+        h.update(repr((it["_id"], it["_start_dt"], it["Min"], it["Tema"], it["Responsable"],
+                       it["Tipo"], it["Objetivo"])).encode("utf-8"))
+    return h.hexdigest()
+
+
+class Exportador:
+    """Caché (LRU) de documentos ya generados por (firma, formato); segura entre hilos
+    porque los download_button diferidos generan fuera del rerun. El lock solo cubre
+    la caché: claves distintas se generan en paralelo y quien pide una clave que otro
+    hilo ya está generando espera ese resultado en vez de repetirlo."""
+
+    def __init__(self, maxsize: int = 64):
+        self._memo = Memo(maxsize)
+        self._lock = threading.Lock()
+        self._en_curso: Dict[Tuple, threading.Event] = {}
+
+    def get(self, clave: Tuple, build: Callable[[], object]):
+        with self._lock:
+            if clave in self._memo:
+                return self._memo.get(clave, build)
+            evento = self._en_curso.get(clave)
+            propio = evento is None
+            if propio:
+                evento = self._en_curso[clave] = threading.Event()
+        if not propio:
+            evento.wait()
+            with self._lock:
+                if clave in self._memo:
+                    return self._memo.get(clave, build)
+            return build()   # falló en el otro hilo
+        try:
+            valor = build()
+            with self._lock:
+                self._memo.get(clave, lambda: valor)
+            return valor
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+
+# ---------- CSV ----------
+def iter_csv(agenda: Sequence[Dict]) -> Iterator[str]:
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(COLUMNAS_CSV)
+    for it in agenda:
+        w.writerow([it[c] for c in COLUMNAS_CSV])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+# ---------- Markdown ----------
+def _linea(etiqueta: str, valor: str, sangria: str = "") -> str:
+    return f"\n{sangria}- {etiqueta}{valor}" if valor else ""
+
+
+def iter_markdown(meta: Dict, agenda: Sequence[Dict], plantilla: Plantilla = PLANTILLAS["Acta"],
+                  otras: Dict[int, List[str]] | None = None, zonas: Sequence[str] = ()) -> Iterator[str]:
+    """Documento por trozos (encabezado, un trozo por bloque, pie)."""
+    otras = otras or {}
+    campos = {
+        "titulo": meta["titulo"], "fecha": meta["fecha"].strftime("%Y-%m-%d"), "lugar": meta["lugar"],
+        "zona": meta["zona"], "anfitrion": meta["anfitrion"], "link": meta["link"],
+        "anfitrion_linea": _linea("**Anfitrión:** ", meta["anfitrion"]),
+        "link_linea": _linea("**Link:** ", meta["link"]),
+        "zonas_linea": _linea("**Otras zonas:** ", ", ".join(zonas)),
+    }
+    yield Template(plantilla.encabezado).safe_substitute(campos)
+    if not agenda:
+        yield plantilla.vacio
+    item = Template(plantilla.item)
+    for pos, it in enumerate(agenda):
+        yield item.safe_substitute(
+            campos, pos=pos + 1, inicio=it["Inicio"], fin=it["Fin"], tema=it["Tema"],
+            responsable=it["Responsable"], min=it["Min"], tipo=it["Tipo"], objetivo=it["Objetivo"],
+            objetivo_linea=_linea("Objetivo: ", it["Objetivo"], "  "),
+            otras_linea=_linea("Otras zonas: ", " · ".join(otras.get(pos, [])), "  "),
+        )
+    yield Template(plantilla.pie).safe_substitute(campos)
+
+
+# ---------- ICS (RFC 5545) ----------
+def _texto_ics(s: str) -> str:
+    return (str(s).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _plegar(linea: str) -> str:
+    """Líneas de hasta 75 octetos; las siguientes empiezan con un espacio."""
+    datos = linea.encode("utf-8")
+    if len(datos) <= 75:
+        return linea + "\r\n"
+    partes, actual, limite = [], b"", 75
+    for ch in linea:
+        b = ch.encode("utf-8")
+        if len(actual) + len(b) > limite:
+            partes.append(actual.decode("utf-8"))
+            actual, limite = b"", 74
+        actual += b
+    partes.append(actual.decode("utf-8"))
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def iter_ics(meta: Dict, agenda: Sequence[Dict], uid_base: str = "local") -> Iterator[str]:
+    """Un VEVENT por bloque, con horas en UTC (convertidas en bloque desde la zona de la reunión)."""
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:" + PRODID + "\r\nCALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n"
+    if not agenda:
+        yield "END:VCALENDAR\r\n"
+        return
+    zona = meta["zona"] if valida(meta["zona"]) else "UTC"
+    utc = convertir([it["_start_dt"] for it in agenda], [it["Min"] for it in agenda], zona, ["UTC"])
+    utc = utc[utc["Zona"] == "UTC"]
+    inicios = utc["Inicio"].dt.strftime("%Y%m%dT%H%M%SZ").tolist()
+    fines = utc["Fin"].dt.strftime("%Y%m%dT%H%M%SZ").tolist()
+    sello = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    for it, ini, fin in zip(agenda, inicios, fines):
+        descripcion = f"Responsable: {it['Responsable']}\nTipo: {it['Tipo']}"
+        if it["Objetivo"]:
+            descripcion += f"\nObjetivo: {it['Objetivo']}"
+        lineas = [
+            "BEGIN:VEVENT",
+            f"UID:{uid_base}-{it['_id']}@agenda-simple",
+            f"DTSTAMP:{sello}",
+            f"DTSTART:{ini}",
+            f"DTEND:{fin}",
+            f"SUMMARY:{_texto_ics(it['Tema'])}",
+            f"DESCRIPTION:{_texto_ics(descripcion)}",
+            f"CATEGORIES:{_texto_ics(it['Tipo'])}",
+        ]
+        if meta["lugar"]:
+            lineas.append(f"LOCATION:{_texto_ics(meta['lugar'])}")
+        if meta["link"]:
+            lineas.append(f"URL:{meta['link']}")
+        lineas.append("END:VEVENT")
+        yield "".join(_plegar(l) for l in lineas)
+    yield "END:VCALENDAR\r\n"
+
+
+def unir(trozos: Iterable[str]) -> bytes:
+    return "".join(trozos).encode("utf-8")
+
+
+# ---------- Varias reuniones ----------
+FORMATOS = {"csv": "CSV", "md": "Markdown", "ics": "Calendario (ICS)"}
+
+
+def zip_reuniones(reuniones: Iterable[Tuple[str, Dict, List[Dict]]], formatos: Sequence[str],
+                  plantilla: Plantilla = PLANTILLAS["Acta"]) -> BinaryIO:
+    """Zip con un archivo por reunión y formato. `reuniones` puede ser un generador:
+    se carga y escribe una reunión por vez, en streaming a cada entrada del zip, y el
+    zip va a un archivo temporal (en memoria solo hasta SPOOL_BYTES), ya rebobinado."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for nombre, meta, agenda in reuniones:
+            for fmt in formatos:
+                if fmt == "csv":
+                    trozos = iter_csv(agenda)
+                elif fmt == "md":
+                    trozos = iter_markdown(meta, agenda, plantilla)
+                else:
+                    trozos = iter_ics(meta, agenda, uid_base=nombre)
+                with zf.open(f"{nombre}.{fmt}", "w") as entrada:
+                    for trozo in trozos:
+                        entrada.write(trozo.encode("utf-8"))
+    out.seek(0)
+    return out
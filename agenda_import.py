@@ -0,0 +1,292 @@
+import csv
+import datetime as dt
+import io
+import re
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterator, List, Set, Tuple
+
+import pandas as pd
+
+from agenda_conflictos import SIN_RESPONSABLE, IntervalTree, detectar
+from agenda_lote import TIPOS
+from agenda_tiempos import retemporizar
+from agenda_zonas import valida, zona
+from flujos import tamano
+
+# =========================
+# Importación en streaming (CSV exportado o ICS) con deduplicación por lotes
+# =========================
+# El archivo se lee fila a fila / evento a evento; cada LOTE_FILAS registros se
+# convierten juntos (pandas), se descartan los repetidos contra un set de claves
+# (tema, inicio, responsable) y recién ahí se re-calculan horarios y se buscan
+# choques: una vez por lote, no una vez por fila.
+LOTE_FILAS = 2000
+MIN_MINUTOS, MAX_MINUTOS = 5, 240
+
+Progreso = Callable[[int, int, int], None]  # (filas, bytes leídos, bytes totales)
+Clave = Tuple[str, dt.datetime, str]
+
+
+@dataclass
+class ResultadoImport:
+    agregados: int = 0
+    duplicados: int = 0
+    conflictos: int = 0          # choques nuevos (con lo ya cargado o dentro del archivo)
+    lotes: int = 0
+    filas: int = 0
+    errores: List[Tuple[int, str]] = field(default_factory=list)  # (fila, motivo)
+
+
+def clave(tema: str, inicio: dt.datetime, responsable: str) -> Clave:
+    """Clave estable de un bloque: sin espacios extra ni mayúsculas, y '—' = sin responsable."""
+    persona = str(responsable).strip()
+    return (str(tema).strip().casefold(), inicio, "" if persona in SIN_RESPONSABLE else persona.casefold())
+
+
+# ---------- CSV ----------
+def leer_csv(texto, fecha: dt.date) -> Iterator[Tuple[int, Dict | None, str | None]]:
+    """Filas del CSV exportado (Tema, Responsable, Inicio, Fin, Min, Tipo, Objetivo).
+    Inicio/Fin pueden ser solo hora (se usa `fecha` o la columna opcional Fecha)."""
+    lector = csv.DictReader(texto)
+    campos = {c.strip().casefold(): c for c in lector.fieldnames or []}
+    if "tema" not in campos or "inicio" not in campos:
+        yield 1, None, "el CSV debe tener al menos las columnas Tema e Inicio"
+        return
+    col = lambda fila, nombre: (fila.get(campos[nombre]) or "").strip() if nombre in campos else ""
+    defecto = fecha.isoformat()
+    for n, fila in enumerate(lector, start=2):   # la fila 1 es el encabezado
+        dia = col(fila, "fecha") or defecto
+        ini, fin = col(fila, "inicio"), col(fila, "fin")
+        yield n, {
+            "Tema": col(fila, "tema"), "Responsable": col(fila, "responsable"),
+            "Tipo": col(fila, "tipo"), "Objetivo": col(fila, "objetivo"),
+            "inicio": f"{dia} {ini}" if ini and len(ini) <= 8 else ini,
+            "fin": f"{dia} {fin}" if fin and len(fin) <= 8 else fin,
+            "min": col(fila, "min"), "tz": "",
+        }, None
+
+
+# ---------- ICS ----------
+_ESCAPE_ICS = re.compile(r"\\(.)")
+_DURACION = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+def _desplegar(texto) -> Iterator[Tuple[int, str]]:
+    """Líneas lógicas (RFC 5545 §3.1): las que empiezan con espacio/tab continúan la anterior."""
+    actual, n = None, 0
+    for n, linea in enumerate(texto, start=1):
+        linea = linea.rstrip("\r\n")
+        if linea[:1] in (" ", "\t") and actual is not None:
+            actual += linea[1:]
+            continue
+        if actual is not None:
+            yield n - 1, actual
+        actual = linea
+    if actual:
+        yield n, actual
+
+
+def _propiedad(linea: str) -> Tuple[str, Dict[str, str], str]:
+    """'DTSTART;TZID=Europe/Madrid:20260105T090000' -> ('DTSTART', {'TZID': ...}, '2026...')."""
+    comillas = False
+    for i, ch in enumerate(linea):
+        if ch == '"':
+            comillas = not comillas
+        elif ch == ":" and not comillas:
+            cabeza, valor = linea[:i], linea[i + 1:]
+            break
+    else:
+        return linea.upper(), {}, ""
+    nombre, *params = cabeza.split(";")
+    return nombre.upper(), {k.upper(): v.strip('"') for k, _, v in (p.partition("=") for p in params)}, valor
+
+
+def _texto(valor: str) -> str:
+    return _ESCAPE_ICS.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), valor)
+
+
+def _fecha_ics(valor: str) -> str:
+    """'20260105T090000Z' -> '2026-01-05T09:00:00' (ISO para convertir el lote de una vez)."""
+    v = valor.rstrip("Z")
+    return f"{v[:4]}-{v[4:6]}-{v[6:8]}T{v[9:11]}:{v[11:13]}:{v[13:15] or '00'}"
+
+
+def _minutos_duracion(valor: str) -> str:
+    m = _DURACION.match(valor.strip())
+    if m is None or m.group(1) == "-":
+        return ""
+    semanas, dias, horas, minutos, segundos = (int(g or 0) for g in m.groups()[1:])
+    return str(((semanas * 7 + dias) * 24 + horas) * 60 + minutos + segundos / 60)
+
+
+def leer_ics(texto) -> Iterator[Tuple[int, Dict | None, str | None]]:
+    """Un registro por VEVENT. Lee lo que escribe agenda_export.iter_ics (Responsable,
+    Tipo y Objetivo en DESCRIPTION) y, de otros calendarios, ORGANIZER y CATEGORIES."""
+    evento: Dict | None = None
+    for n, linea in _desplegar(texto):
+        nombre, params, valor = _propiedad(linea)
+        if nombre == "BEGIN" and valor.upper() == "VEVENT":
+            evento = {"fila": n, "Tema": "", "Responsable": "", "Tipo": "", "Objetivo": "",
+                      "inicio": "", "fin": "", "min": "", "tz": "", "error": None}
+        elif evento is None:
+            continue
+        elif nombre == "END" and valor.upper() == "VEVENT":
+            fila, error = evento.pop("fila"), evento.pop("error")
+            yield (fila, None, error) if error else (fila, evento, None)
+            evento = None
+        elif nombre == "SUMMARY":
+            evento["Tema"] = _texto(valor)
+        elif nombre in ("DTSTART", "DTEND"):
+            if params.get("VALUE", "").upper() == "DATE" or "T" not in valor:
+                evento["error"] = "evento de día completo (sin hora)"
+                continue
+            evento["inicio" if nombre == "DTSTART" else "fin"] = _fecha_ics(valor)
+            if nombre == "DTSTART":
+                evento["tz"] = "UTC" if valor.endswith("Z") else params.get("TZID", "")
+        elif nombre == "DURATION":
+            evento["min"] = _minutos_duracion(valor)
+        elif nombre == "DESCRIPTION":
+            libre, objetivo = [], None
+            for parte in _texto(valor).split("\n"):
+                etiqueta, sep, resto = parte.partition(":")
+                if objetivo is not None:
+                    objetivo.append(parte)          # el objetivo va último y puede tener saltos
+                elif sep and etiqueta.strip() in ("Responsable", "Tipo"):
+                    evento[etiqueta.strip()] = resto.strip()
+                elif sep and etiqueta.strip() == "Objetivo":
+                    objetivo = [resto.strip()]
+                elif parte.strip():
+                    libre.append(parte.strip())
+            if objetivo is not None:
+                evento["Objetivo"] = "\n".join(objetivo)
+            if libre and not evento["Objetivo"]:
+                evento["Objetivo"] = " ".join(libre)
+        elif nombre == "ORGANIZER" and not evento["Responsable"]:
+            evento["Responsable"] = params.get("CN", "")
+        elif nombre == "CATEGORIES" and not evento["Tipo"]:
+            evento["Tipo"] = _texto(valor).split(",")[0].strip()
+
+
+# ---------- Conversión por lotes ----------
+def convertir_lote(registros: List[Tuple[int, Dict]], zona_destino: str) -> Tuple[List[Dict], List[Tuple[int, str]]]:
+    """Fechas, zonas y duraciones de todo el lote de una vez (pandas). Devuelve los
+    bloques ya armados (sin _id) y los errores por fila."""
+    filas = [f for f, _ in registros]
+    df = pd.DataFrame.from_records([r for _, r in registros], index=filas)
+    errores: List[Tuple[int, str]] = []
+    malas = pd.Series(False, index=df.index)
+
+    ini = pd.to_datetime(df["inicio"], format="ISO8601", errors="coerce")
+    fin = pd.to_datetime(df["fin"], format="ISO8601", errors="coerce")
+    # Horas con zona (UTC o TZID) -> hora de pared de la reunión; sin zona = ya es local
+    for tz, grupo in df.groupby("tz").groups.items():
+        if not tz or tz == zona_destino:
+            continue
+        if not valida(tz):
+            for f in grupo:
+                errores.append((int(f), f"zona horaria desconocida: {tz}"))
+            malas[grupo] = True
+            continue
+        for serie in (ini, fin):
+            serie[grupo] = (pd.DatetimeIndex(serie[grupo]).tz_localize(zona(tz), ambiguous="NaT",
+                                                                       nonexistent="shift_forward")
+                            .tz_convert(zona(zona_destino)).tz_localize(None))
+    malo = ini.isna() & ~malas
+    for f in df.index[malo]:
+        errores.append((int(f), f"inicio inválido: {df.at[f, 'inicio']!r}"))
+    malas |= malo
+
+    minutos = pd.to_numeric(df["min"], errors="coerce")
+    # Sin Min se usa Fin; un Fin "antes" del inicio (solo hora) cruza la medianoche
+    fin = fin.where(fin.isna() | (fin > ini) | (df["tz"] != ""), fin + pd.Timedelta(days=1))
+    minutos = minutos.fillna((fin - ini).dt.total_seconds() / 60).round()
+    malo = minutos.isna() & ~malas
+    for f in df.index[malo]:
+        errores.append((int(f), "sin fin ni duración"))
+    malas |= malo
+    malo = ((minutos < MIN_MINUTOS) | (minutos > MAX_MINUTOS)) & ~malas
+    for f in df.index[malo]:
+        errores.append((int(f), f"duración fuera de rango ({MIN_MINUTOS}–{MAX_MINUTOS} min): {minutos[f]:.0f}"))
+    malas |= malo
+
+    tema = df["Tema"].fillna("").astype(str).str.strip()
+    malo = (tema == "") & ~malas
+    for f in df.index[malo]:
+        errores.append((int(f), "el tema es obligatorio"))
+    malas |= malo
+
+    ok = df.index[~malas]
+    responsable = df["Responsable"].fillna("").astype(str).str.strip()
+    tipo = df["Tipo"].where(df["Tipo"].isin(TIPOS), TIPOS[0])
+    objetivo = df["Objetivo"].fillna("").astype(str).str.strip()
+    bloques = [{
+        "Tema": tema[f], "Responsable": responsable[f] or "—", "Inicio": "", "Fin": "",
+        "Min": int(minutos[f]), "Tipo": tipo[f], "Objetivo": objetivo[f],
+        "_start_dt": ini[f].to_pydatetime(), "_end_dt": None, "_auto": False,
+    } for f in ok]
+    return bloques, errores
+
+
+# ---------- Importación ----------
+def importar(stream: BinaryIO, nombre: str, agenda: List[Dict], arbol: IntervalTree, next_id: int,
+             fecha: dt.date, zona_destino: str, progreso: Progreso | None = None,
+             lote: int = LOTE_FILAS) -> Tuple[ResultadoImport, int]:
+    """Agrega al final de `agenda` (y al árbol) los bloques nuevos del archivo.
+    Devuelve el resultado y el próximo _id libre."""
+    res = ResultadoImport()
+    stream.seek(0)
+    total = tamano(stream)
+    vistos: Set[Clave] = {clave(it["Tema"], it["_start_dt"], it["Responsable"]) for it in agenda}
+    por_id = {it["_id"]: it for it in agenda}
+    pendientes: List[Tuple[int, Dict]] = []
+
+    def volcar():
+        nonlocal next_id
+        bloques, errs = convertir_lote(pendientes, zona_destino)
+        res.errores.extend(errs)
+        pendientes.clear()
+        nuevos = []
+        for b in bloques:
+            k = clave(b["Tema"], b["_start_dt"], b["Responsable"])
+            if k in vistos:
+                res.duplicados += 1
+                continue
+            vistos.add(k)
+            b["_id"] = next_id
+            next_id += 1
+            nuevos.append(b)
+        res.lotes += 1
+        if nuevos:
+            nuevos.sort(key=lambda b: b["_start_dt"])
+            desde = len(agenda)
+            agenda.extend(nuevos)
+            retemporizar(agenda, desde, len(agenda) - 1)   # un solo re-cálculo por lote
+            # Choques del lote: una consulta al árbol por su rango + un barrido
+            ids = {b["_id"] for b in nuevos}
+            cercanos = [por_id[i] for i in arbol.solapados(nuevos[0]["_start_dt"],
+                                                           max(b["_end_dt"] for b in nuevos))]
+            res.conflictos += sum(c.a in ids or c.b in ids for c in detectar(cercanos + nuevos))
+            for b in nuevos:
+                arbol.add(b["_id"], b["_start_dt"], b["_end_dt"])
+                por_id[b["_id"]] = b
+            res.agregados += len(nuevos)
+        if progreso is not None:
+            progreso(res.filas, stream.tell(), total)
+
+    texto = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        filas = leer_ics(texto) if nombre.lower().endswith((".ics", ".ical", ".ifb")) else leer_csv(texto, fecha)
+        for fila, reg, err in filas:
+            res.filas += 1
+            if err is not None:
+                res.errores.append((fila, err))
+                continue
+            pendientes.append((fila, reg))
+            if len(pendientes) >= lote:
+                volcar()
+        if pendientes:
+            volcar()
+    finally:
+        texto.detach()  # no cerrar el archivo subido al terminar
+    res.errores.sort()
+    return res, next_id
@@ -0,0 +1,129 @@
+import datetime as dt
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from agenda_tiempos import retemporizar
+
+# =========================
+# Edición por lotes: tabla editable -> diff -> una transacción + un re-cálculo
+# =========================
+TIPOS = ["Discusión", "Decisión", "Información"]
+COLUMNAS_EDITOR = ["ID", "Orden", "Tema", "Responsable", "Inicio", "Fin", "Min", "Tipo", "Objetivo", "Auto"]
+EDITABLES = ("Tema", "Responsable", "Min", "Tipo", "Objetivo")
+
+
+@dataclass
+class Cambios:
+    borrados: List[int] = field(default_factory=list)
+    editados: Dict[int, Dict] = field(default_factory=dict)    # _id -> {campo: valor}
+    nuevos: List[Dict] = field(default_factory=list)
+    orden: List[int | None] = field(default_factory=list)       # ids en el nuevo orden (None = nuevo)
+
+    def vacio(self, orden_actual: List[int]) -> bool:
+        return not (self.borrados or self.editados or self.nuevos) and self.orden == orden_actual
+
+
+def a_tabla(agenda: List[Dict]) -> pd.DataFrame:
+    """Vista editable de la agenda (Orden empieza en 1, Inicio como hora)."""
+    return pd.DataFrame({
+        "ID": [it["_id"] for it in agenda],
+        "Orden": list(range(1, len(agenda) + 1)),
+        "Tema": [it["Tema"] for it in agenda],
+        "Responsable": [it["Responsable"] for it in agenda],
+        "Inicio": [it["_start_dt"].time() for it in agenda],
+        "Fin": [it["Fin"] for it in agenda],
+        "Min": [int(it["Min"]) for it in agenda],
+        "Tipo": [it["Tipo"] for it in agenda],
+        "Objetivo": [it["Objetivo"] for it in agenda],
+        "Auto": [bool(it.get("_auto")) for it in agenda],
+    }, columns=COLUMNAS_EDITOR)
+
+
+def _vacio(v) -> bool:
+    return v is None or (isinstance(v, float) and pd.isna(v)) or v is pd.NaT
+
+
+def diff(agenda: List[Dict], editado: pd.DataFrame) -> Tuple[Cambios, List[str]]:
+    """Compara la tabla editada con la agenda: bajas, ediciones, altas y nuevo orden.
+    Devuelve también los errores de validación (si hay alguno no se aplica nada)."""
+    cambios, errores = Cambios(), []
+    por_id = {it["_id"]: it for it in agenda}
+    vistos = set()
+    filas = []
+    for pos, fila in enumerate(editado.to_dict("records")):
+        item_id = None if _vacio(fila.get("ID")) else int(fila["ID"])
+        tema = "" if _vacio(fila.get("Tema")) else str(fila["Tema"]).strip()
+        if not tema:
+            errores.append(f"Fila {pos + 1}: el tema es obligatorio.")
+        minutos = fila.get("Min")
+        if _vacio(minutos) or not 5 <= int(minutos) <= 240:
+            errores.append(f"Fila {pos + 1}: los minutos deben estar entre 5 y 240.")
+        orden = fila.get("Orden")
+        filas.append((pos + 1 if _vacio(orden) else float(orden), pos, item_id, fila))
+        if item_id is None:
+            cambios.nuevos.append(fila)
+            continue
+        vistos.add(item_id)
+        it = por_id.get(item_id)
+        if it is None:
+            continue
+        campos = {c: fila[c] for c in EDITABLES if not _vacio(fila.get(c)) and fila[c] != it[c]}
+        if bool(fila.get("Auto")) != bool(it.get("_auto")):
+            campos["_auto"] = bool(fila.get("Auto"))
+        inicio = fila.get("Inicio")
+        if not _vacio(inicio) and not fila.get("Auto") and inicio != it["_start_dt"].time():
+            campos["Inicio"] = inicio   # solo las anclas aceptan hora manual
+        if campos:
+            cambios.editados[item_id] = campos
+    cambios.borrados = [i for i in por_id if i not in vistos]
+    # orden estable: por la columna Orden y, a igualdad, por la posición en la tabla
+    cambios.orden = [item_id for _, _, item_id, _ in sorted(filas, key=lambda f: (f[0], f[1]))]
+    return cambios, errores
+
+
+def aplicar(agenda: List[Dict], cambios: Cambios, fecha: dt.date, next_id: int) -> Tuple[List[Dict], int]:
+    """Arma la nueva agenda en una sola pasada (sin tocar la original) y re-calcula
+    los horarios una vez, desde la primera posición afectada hasta la última."""
+    borrados = set(cambios.borrados)
+    por_id = {it["_id"]: dict(it) for it in agenda if it["_id"] not in borrados}
+    for item_id, campos in cambios.editados.items():
+        it = por_id[item_id]
+        for c, v in campos.items():
+            if c == "Inicio":
+                it["_start_dt"] = dt.datetime.combine(it["_start_dt"].date(), v)
+            elif c == "Min":
+                it["Min"] = int(v)
+            elif c in ("Tema", "Responsable", "Objetivo"):
+                it[c] = str(v).strip()
+            else:
+                it[c] = v
+        if "Inicio" in campos or "Min" in campos:
+            # Sin fin, el re-cálculo no puede darlo por bueno y refresca Inicio/Fin (texto)
+            it["_end_dt"] = None
+    nuevos = iter(cambios.nuevos)
+    nueva: List[Dict] = []
+    for item_id in cambios.orden:
+        if item_id is not None:
+            nueva.append(por_id[item_id])
+            continue
+        fila = next(nuevos)
+        inicio = dt.datetime.combine(fecha, fila["Inicio"] if not _vacio(fila.get("Inicio")) else dt.time(9, 0))
+        nueva.append({
+            "Tema": str(fila["Tema"]).strip(),
+            "Responsable": "—" if _vacio(fila.get("Responsable")) else str(fila["Responsable"]).strip() or "—",
+            "Inicio": "", "Fin": "", "Min": int(fila["Min"]),
+            "Tipo": fila.get("Tipo") if fila.get("Tipo") in TIPOS else TIPOS[0],
+            "Objetivo": "" if _vacio(fila.get("Objetivo")) else str(fila["Objetivo"]).strip(),
+            "_start_dt": inicio, "_end_dt": None, "_id": next_id,
+            "_auto": bool(fila.get("Auto")),
+        })
+        next_id += 1
+    # Un solo re-cálculo: entre la primera y la última posición que cambió
+    antes = [it["_id"] for it in agenda]
+    tocados = [k for k, it in enumerate(nueva)
+               if k >= len(antes) or antes[k] != it["_id"] or it["_id"] in cambios.editados or it["_end_dt"] is None]
+    if tocados:
+        retemporizar(nueva, tocados[0], tocados[-1])
+    return nueva, next_id
@@ -0,0 +1,243 @@
+import bisect
+import datetime as dt
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+from agenda_conflictos import fijar_inicio
+
+# =========================
+# Optimizador de agenda: greedy + búsqueda local con presupuesto de tiempo
+# =========================
+# Un plan es un orden de los bloques flexibles. Se decodifica en horarios poniendo
+# cada bloque en el primer hueco posible desde el cursor: salta los bloques fijos,
+# busca una ventana de disponibilidad de su responsable e inserta pausas cuando se
+# acumula demasiado trabajo seguido. El costo es el tiempo ocioso más las
+# violaciones (en minutos) multiplicadas por PESO_VIOLACION.
+PESO_VIOLACION = 100.0
+
+
+@dataclass
+class Restricciones:
+    inicio: dt.datetime                                    # arranque de la reunión
+    duracion_max: int | None = None                        # minutos; None = sin límite
+    disponibilidad: Dict[str, List[Tuple[dt.datetime, dt.datetime]]] = field(default_factory=dict)
+    fijos: Dict[Hashable, dt.datetime] = field(default_factory=dict)   # _id -> hora fija
+    decision_margen: int = 0          # las "Decisión" terminan al menos N min antes del cierre
+    pausa_cada: int | None = None     # minutos de trabajo seguido antes de una pausa
+    pausa_min: int = 10
+
+
+@dataclass
+class Plan:
+    inicios: Dict[Hashable, dt.datetime]
+    orden: List[Hashable]             # _ids en orden de inicio (fijos incluidos)
+    costo: float
+    ocio: float                       # minutos sin actividad (sin contar pausas)
+    violaciones: List[str]
+    pausas: List[Tuple[dt.datetime, dt.datetime]]
+    iteraciones: int
+    segundos: float
+
+
+class _Modelo:
+    """Todo en minutos desde el inicio (floats): decodificar un orden es O(n) con bisect."""
+
+    def __init__(self, bloques: Sequence[Dict], r: Restricciones):
+        self.r = r
+        self.bloques = list(bloques)
+        a_min = self.a_min
+        fijos = sorted((a_min(r.fijos[b["_id"]]), a_min(r.fijos[b["_id"]]) + int(b["Min"]))
+                       for b in self.bloques if b["_id"] in r.fijos)
+        # Intervalos ocupados por fijos, fusionados (disjuntos y ordenados) + suma acumulada
+        self.ocupado: List[List[float]] = []
+        for ini, fin in fijos:
+            if self.ocupado and ini <= self.ocupado[-1][1]:
+                self.ocupado[-1][1] = max(self.ocupado[-1][1], fin)
+            else:
+                self.ocupado.append([ini, fin])
+        self.ocu_ini = [o[0] for o in self.ocupado]
+        self.ocu_fin = [o[1] for o in self.ocupado]
+        self.ocu_acum = [0.0]
+        for ini, fin in self.ocupado:
+            self.ocu_acum.append(self.ocu_acum[-1] + fin - ini)
+        self.ventanas = {
+            persona: ([a_min(i) for i, _ in sorted(vs)], [a_min(f) for _, f in sorted(vs)])
+            for persona, vs in r.disponibilidad.items() if vs
+        }
+        self.limite = None if r.duracion_max is None else float(r.duracion_max)
+        self.flexibles = [k for k, b in enumerate(self.bloques) if b["_id"] not in r.fijos]
+        self.dur = [int(b["Min"]) for b in self.bloques]
+        self.persona = [str(b.get("Responsable", "")).strip() for b in self.bloques]
+        self.decision = [b.get("Tipo") == "Decisión" for b in self.bloques]
+
+    def a_min(self, x: dt.datetime) -> float:
+        return (x - self.r.inicio).total_seconds() / 60
+
+    def a_dt(self, m: float) -> dt.datetime:
+        return self.r.inicio + dt.timedelta(minutes=m)
+
+    def _ocupado_hasta(self, x: float) -> float:
+        """Minutos ocupados por fijos en [0, x)."""
+        k = bisect.bisect_right(self.ocu_ini, x)
+        if k == 0:
+            return 0.0
+        return self.ocu_acum[k - 1] + min(x, self.ocu_fin[k - 1]) - self.ocu_ini[k - 1]
+
+    def _libre(self, s: float, d: float) -> float:
+        """Primer inicio >= s en que [s, s + d) no pisa un bloque fijo."""
+        k = bisect.bisect_right(self.ocu_fin, s)
+        while k < len(self.ocupado) and self.ocu_ini[k] < s + d:
+            s = self.ocu_fin[k]
+            k += 1
+        return s
+
+    def ubicar(self, t: float, k: int) -> Tuple[float, bool]:
+        """(inicio, respeta_disponibilidad) del bloque k desde el cursor t."""
+        d = self.dur[k]
+        ventanas = self.ventanas.get(self.persona[k])
+        if ventanas is None:
+            return self._libre(t, d), True
+        inis, fins = ventanas
+        s = t
+        w = bisect.bisect_right(fins, s)
+        while w < len(inis):
+            s = self._libre(max(s, inis[w]), d)
+            if s + d <= fins[w]:
+                return s, True
+            if s >= fins[w]:
+                w = bisect.bisect_right(fins, s, lo=w)
+            else:
+                w += 1
+        return self._libre(t, d), False
+
+    def decodificar(self, orden: List[int], desde: int = 0, estados: List[Tuple] | None = None,
+                    registro: List[Tuple[float, float]] | None = None):
+        """Ubica orden[desde:] partiendo del estado guardado antes de `desde`.
+        Estado = (cursor, fin_previo, trabajo_seguido, pausas, violación).
+        Devuelve (inicios de orden[desde:], estados[desde:], estado final);
+        si se pasa `registro`, anota ahí las pausas insertadas."""
+        r = self.r
+        t, fin_prev, seguido, pausas, viol = estados[desde] if estados else (0.0, 0.0, 0.0, 0.0, 0.0)
+        inicios, nuevos = [], []
+        limite = self.limite
+        for k in orden[desde:]:
+            nuevos.append((t, fin_prev, seguido, pausas, viol))
+            d = self.dur[k]
+            if r.pausa_cada and seguido > 0 and seguido + d > r.pausa_cada:
+                if t < fin_prev + r.pausa_min:
+                    pausas += fin_prev + r.pausa_min - t
+                    t = fin_prev + r.pausa_min
+                if registro is not None:
+                    registro.append((fin_prev, fin_prev + r.pausa_min))
+                seguido = 0.0
+            s, ok = self.ubicar(t, k)
+            if not ok:
+                viol += d
+            if r.pausa_cada and s - fin_prev >= r.pausa_min:
+                seguido = 0.0   # ya hubo un descanso natural
+            fin = s + d
+            if limite is not None:
+                if fin > limite:
+                    viol += fin - max(s, limite)
+                if self.decision[k] and fin > limite - r.decision_margen:
+                    viol += fin - (limite - r.decision_margen)
+            inicios.append(s)
+            seguido += d
+            fin_prev = t = fin
+        return inicios, nuevos, (t, fin_prev, seguido, pausas, viol)
+
+    def costo(self, final: Tuple) -> Tuple[float, float]:
+        t, _, _, pausas, viol = final
+        flex = sum(self.dur[k] for k in self.flexibles)
+        ocio = max(t - flex - self._ocupado_hasta(t) - pausas, 0.0)
+        return ocio + PESO_VIOLACION * viol, ocio
+
+    def greedy(self) -> List[int]:
+        """Orden inicial: primero quien tiene la ventana más temprana; a igualdad,
+        las Decisión antes y luego el orden original."""
+        def clave(k):
+            v = self.ventanas.get(self.persona[k])
+            return (v[0][0] if v else 0.0, not self.decision[k], k)
+        return sorted(self.flexibles, key=clave)
+
+
+def optimizar(bloques: Sequence[Dict], r: Restricciones, presupuesto: float = 0.5, seed: int = 0) -> Plan:
+    """Greedy + búsqueda local (intercambios e inserciones) hasta agotar `presupuesto` segundos.
+    Cada movimiento re-decodifica solo desde la primera posición tocada; la mitad
+    de los movimientos parte de un bloque con violaciones."""
+    t0 = time.perf_counter()
+    m = _Modelo(bloques, r)
+    orden = m.greedy()
+    inicios, estados, final = m.decodificar(orden)
+    mejor, _ = m.costo(final)
+    rng = random.Random(seed)
+    n = len(orden)
+    iteraciones = 0
+    limite = t0 + presupuesto
+    while n > 1 and mejor > 0 and time.perf_counter() < limite:
+        iteraciones += 1
+        i, j = rng.randrange(n), rng.randrange(n)
+        if final[4] > 0 and rng.random() < 0.5:
+            # la mitad de las veces se mueve un bloque que hoy viola alguna restricción
+            viol = [e[4] for e in estados] + [final[4]]
+            malos = [p for p in range(n) if viol[p + 1] > viol[p]]
+            i = rng.choice(malos)
+        if i == j:
+            continue
+        cand = orden[:]
+        if rng.random() < 0.5:
+            cand[i], cand[j] = cand[j], cand[i]
+        else:
+            cand.insert(j, cand.pop(i))
+        desde = min(i, j)
+        ini_c, est_c, fin_c = m.decodificar(cand, desde, estados)
+        c, _ = m.costo(fin_c)
+        if c <= mejor:   # se aceptan empates para moverse por mesetas
+            orden, mejor, final = cand, c, fin_c
+            inicios[desde:], estados[desde:] = ini_c, est_c
+    return _plan(m, orden, iteraciones, time.perf_counter() - t0)
+
+
+def _plan(m: _Modelo, orden: List[int], iteraciones: int, segundos: float) -> Plan:
+    r = m.r
+    registro: List[Tuple[float, float]] = []
+    inicios, _, final = m.decodificar(orden, registro=registro)
+    costo, ocio = m.costo(final)
+    en_min = dict(zip(orden, inicios))
+    en_min.update({k: m.a_min(r.fijos[b["_id"]]) for k, b in enumerate(m.bloques) if b["_id"] in r.fijos})
+    violaciones = []
+    for k, s in en_min.items():
+        b, fin = m.bloques[k], s + m.dur[k]
+        ventanas = m.ventanas.get(m.persona[k])
+        if ventanas is not None and b["_id"] not in r.fijos:
+            w = bisect.bisect_right(ventanas[0], s) - 1
+            if w < 0 or fin > ventanas[1][w]:
+                violaciones.append(f"{b['Tema']}: fuera de la disponibilidad de {m.persona[k]}")
+        if m.limite is not None:
+            if fin > m.limite:
+                violaciones.append(f"{b['Tema']}: termina después del máximo de la reunión")
+            elif m.decision[k] and fin > m.limite - r.decision_margen:
+                violaciones.append(f"{b['Tema']}: la decisión queda muy cerca del cierre")
+    por_inicio = sorted(en_min, key=lambda k: (en_min[k], k))
+    return Plan(
+        inicios={m.bloques[k]["_id"]: m.a_dt(en_min[k]) for k in en_min},
+        orden=[m.bloques[k]["_id"] for k in por_inicio],
+        costo=costo, ocio=ocio, violaciones=violaciones,
+        pausas=[(m.a_dt(a), m.a_dt(b)) for a, b in registro],
+        iteraciones=iteraciones, segundos=segundos,
+    )
+
+
+def aplicar_plan(agenda: List[Dict], plan: Plan) -> List[Dict]:
+    """Nueva agenda en el orden del plan. Un bloque queda encadenado (_auto) si
+    empieza justo cuando termina el anterior; si no, queda como ancla con su hora."""
+    por_id = {it["_id"]: dict(it) for it in agenda}
+    nueva = []
+    for item_id in plan.orden:
+        it = por_id[item_id]
+        fijar_inicio(it, plan.inicios[item_id])
+        it["_auto"] = bool(nueva) and nueva[-1]["_end_dt"] == it["_start_dt"]
+        nueva.append(it)
+    return nueva
@@ -0,0 +1,173 @@
+import datetime as dt
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from sqlite_pool import Pool
+
+# =========================
+# Reuniones persistentes (SQLite): muchas reuniones con sus bloques
+# =========================
+AGENDA_DB = os.environ.get("AGENDA_DB", ".agenda_cache/agenda.db")
+CAMPOS_META = ("titulo", "fecha", "zona", "lugar", "anfitrion", "link")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS reuniones (
+    id INTEGER PRIMARY KEY,
+    titulo TEXT, fecha TEXT, zona TEXT, lugar TEXT, anfitrion TEXT, link TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_reuniones_fecha ON reuniones(fecha);
+CREATE TABLE IF NOT EXISTS bloques (
+    id INTEGER PRIMARY KEY,
+    reunion INTEGER NOT NULL REFERENCES reuniones(id),
+    pos INTEGER, tema TEXT, responsable TEXT, tipo TEXT, objetivo TEXT,
+    minutos INTEGER, inicio TEXT, fin TEXT, auto INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_bloques_inicio ON bloques(inicio);
+CREATE INDEX IF NOT EXISTS ix_bloques_responsable ON bloques(responsable, inicio);
+CREATE INDEX IF NOT EXISTS ix_bloques_tipo ON bloques(tipo, inicio);
+CREATE INDEX IF NOT EXISTS ix_bloques_reunion ON bloques(reunion, pos);
+"""
+
+
+def rango(fecha: dt.date, vista: str) -> Tuple[dt.date, dt.date]:
+    """[desde, hasta) de la semana (lunes a domingo) o del mes que contiene `fecha`."""
+    if vista == "Semana":
+        desde = fecha - dt.timedelta(days=fecha.weekday())
+        return desde, desde + dt.timedelta(days=7)
+    desde = fecha.replace(day=1)
+    siguiente = (desde + dt.timedelta(days=32)).replace(day=1)
+    return desde, siguiente
+
+
+class AgendaStore:
+    """Reuniones y sus bloques en SQLite (WAL, conexiones compartidas).
+    Índices por fecha, responsable y tipo: el calendario pide solo el rango visible."""
+
+    def __init__(self, ruta: str = AGENDA_DB, conexiones: int = 4):
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.pool = Pool(ruta, conexiones)
+        with self.pool.conexion() as con:
+            con.executescript(ESQUEMA)
+
+    # ---------- escritura ----------
+    def guardar(self, meta: Dict, agenda: List[Dict], reunion_id: int | None = None) -> int:
+        """Alta o reemplazo de una reunión con todos sus bloques, en una transacción."""
+        valores = [meta.get(c, "") for c in CAMPOS_META]
+        valores[1] = meta["fecha"].isoformat()
+        with self.pool.transaccion() as con:
+            if reunion_id is None:
+                reunion_id = con.execute(
+                    "INSERT INTO reuniones (titulo, fecha, zona, lugar, anfitrion, link) VALUES (?, ?, ?, ?, ?, ?)",
+                    valores).lastrowid
+            else:
+                con.execute("UPDATE reuniones SET titulo=?, fecha=?, zona=?, lugar=?, anfitrion=?, link=? WHERE id=?",
+                            [*valores, reunion_id])
+                con.execute("DELETE FROM bloques WHERE reunion = ?", (reunion_id,))
+            con.executemany(
+                "INSERT INTO bloques (reunion, pos, tema, responsable, tipo, objetivo, minutos, inicio, fin, auto) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(reunion_id, pos, it["Tema"], it["Responsable"], it["Tipo"], it["Objetivo"], int(it["Min"]),
+                  it["_start_dt"].isoformat(), it["_end_dt"].isoformat(), int(bool(it.get("_auto"))))
+                 for pos, it in enumerate(agenda)])
+        return reunion_id
+
+    def eliminar(self, reunion_id: int) -> None:
+        with self.pool.transaccion() as con:
+            con.execute("DELETE FROM bloques WHERE reunion = ?", (reunion_id,))
+            con.execute("DELETE FROM reuniones WHERE id = ?", (reunion_id,))
+
+    # ---------- lectura ----------
+    def cargar(self, reunion_id: int) -> Tuple[Dict, List[Dict]] | None:
+        """(meta, agenda) con el mismo formato que session_state; _id = id del bloque."""
+        with self.pool.conexion() as con:
+            fila = con.execute("SELECT titulo, fecha, zona, lugar, anfitrion, link FROM reuniones WHERE id = ?",
+                               (reunion_id,)).fetchone()
+            if fila is None:
+                return None
+            filas = con.execute(
+                "SELECT id, tema, responsable, tipo, objetivo, minutos, inicio, fin, auto "
+                "FROM bloques WHERE reunion = ? ORDER BY pos", (reunion_id,)).fetchall()
+        meta = dict(zip(CAMPOS_META, fila))
+        meta["fecha"] = dt.date.fromisoformat(meta["fecha"])
+        agenda = []
+        for bid, tema, resp, tipo, obj, minutos, ini, fin, auto in filas:
+            ini, fin = dt.datetime.fromisoformat(ini), dt.datetime.fromisoformat(fin)
+            agenda.append({
+                "Tema": tema, "Responsable": resp, "Inicio": ini.strftime("%H:%M"), "Fin": fin.strftime("%H:%M"),
+                "Min": minutos, "Tipo": tipo, "Objetivo": obj,
+                "_start_dt": ini, "_end_dt": fin, "_id": bid, "_auto": bool(auto),
+            })
+        return meta, agenda
+
+    def reuniones(self, desde: dt.date, hasta: dt.date) -> pd.DataFrame:
+        """Reuniones con fecha en [desde, hasta), con cantidad de bloques y minutos."""
+        with self.pool.conexion() as con:
+            return pd.read_sql_query(
+                "SELECT r.id, r.titulo, r.fecha, r.lugar, COUNT(b.id) AS bloques, COALESCE(SUM(b.minutos), 0) AS minutos "
+                "FROM reuniones r LEFT JOIN bloques b ON b.reunion = r.id "
+                "WHERE r.fecha >= ? AND r.fecha < ? GROUP BY r.id ORDER BY r.fecha, r.id",
+                con, params=[desde.isoformat(), hasta.isoformat()])
+
+    def bloques(self, desde: dt.date, hasta: dt.date, responsable: str | None = None,
+                tipo: str | None = None) -> pd.DataFrame:
+        """Bloques que empiezan en [desde, hasta); usa el índice de inicio, responsable o tipo."""
+        sql = ("SELECT b.id, b.reunion, r.titulo AS reunion_titulo, b.tema, b.responsable, b.tipo, "
+               "b.minutos, b.inicio, b.fin FROM bloques b JOIN reuniones r ON r.id = b.reunion "
+               "WHERE b.inicio >= ? AND b.inicio < ?")
+        params: list = [desde.isoformat(), hasta.isoformat()]
+        if responsable:
+            sql += " AND b.responsable = ?"
+            params.append(responsable)
+        if tipo:
+            sql += " AND b.tipo = ?"
+            params.append(tipo)
+        with self.pool.conexion() as con:
+            df = pd.read_sql_query(sql + " ORDER BY b.inicio", con, params=params)
+        df["inicio"] = pd.to_datetime(df["inicio"])
+        df["fin"] = pd.to_datetime(df["fin"])
+        return df
+
+    def responsables(self) -> List[str]:
+        with self.pool.conexion() as con:
+            return [r[0] for r in con.execute("SELECT DISTINCT responsable FROM bloques ORDER BY 1")]
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+# =========================
+# Estado de la sesión en partes (para instantaneas.Diario)
+# =========================
+def a_partes(meta: Dict, agenda: List[Dict] | None, zonas: List[str], reunion_id: int | None) -> Dict[str, Dict]:
+    """Meta, bloques por _id (tuplas) y orden como lista enlazada (_id -> _id anterior):
+    agregar, mover o borrar un bloque cambia solo una o dos claves del orden.
+    Con agenda=None sale solo la meta (la agenda no cambió desde el último registro)."""
+    partes = {"meta": {**{c: meta[c] for c in CAMPOS_META}, "zonas": tuple(zonas), "reunion_id": reunion_id}}
+    if agenda is not None:
+        partes["bloques"] = {it["_id"]: (it["Tema"], it["Responsable"], it["Tipo"], it["Objetivo"], int(it["Min"]),
+                                         it["_start_dt"], bool(it.get("_auto"))) for it in agenda}
+        partes["orden"] = {it["_id"]: agenda[k - 1]["_id"] if k else None for k, it in enumerate(agenda)}
+    return partes
+
+
+def de_partes(partes: Dict[str, Dict]) -> Tuple[Dict, List[Dict], List[str], int | None]:
+    """Inversa de a_partes: (meta, agenda, zonas, reunion_id) con el formato de session_state."""
+    meta = dict(partes["meta"])
+    zonas, reunion_id = list(meta.pop("zonas")), meta.pop("reunion_id")
+    bloques = partes["bloques"]
+    siguiente = {anterior: bid for bid, anterior in partes["orden"].items()}
+    agenda = []
+    bid = siguiente.get(None)
+    while bid is not None:
+        tema, resp, tipo, obj, minutos, ini, auto = bloques[bid]
+        fin = ini + dt.timedelta(minutes=minutos)
+        agenda.append({
+            "Tema": tema, "Responsable": resp, "Inicio": ini.strftime("%H:%M"), "Fin": fin.strftime("%H:%M"),
+            "Min": minutos, "Tipo": tipo, "Objetivo": obj,
+            "_start_dt": ini, "_end_dt": fin, "_id": bid, "_auto": auto,
+        })
+        bid = siguiente.get(bid)
+    return meta, agenda, zonas, reunion_id
@@ -0,0 +1,64 @@
+import datetime as dt
+from typing import Dict, List, Tuple
+
+from agenda_conflictos import fijar_inicio
+
+# =========================
+# Re-cálculo incremental de horarios
+# =========================
+# La agenda es una secuencia de cadenas: cada bloque "_auto" empieza cuando termina
+# el anterior (inicio = ancla + suma de duraciones previas de la cadena) y cada bloque
+# con hora fija es un ancla que corta la cadena. Tras una edición en la posición i
+# solo se recalculan los bloques desde i hasta la próxima ancla (o hasta que un
+# inicio ya coincida, porque desde ahí la suma acumulada no cambia).
+
+
+def es_ancla(agenda: List[Dict], k: int) -> bool:
+    return k == 0 or not agenda[k].get("_auto")
+
+
+def retemporizar(agenda: List[Dict], desde: int, hasta: int | None = None) -> List[int]:
+    """Recalcula inicios/fines a partir de `desde`; [desde, hasta] son las posiciones
+    editadas (nunca se corta antes de pasarlas). Devuelve los índices que cambiaron."""
+    hasta = desde if hasta is None else hasta
+    cambiados: List[int] = []
+    k = max(desde, 0)
+    while k < len(agenda):
+        it = agenda[k]
+        ancla = es_ancla(agenda, k)
+        if ancla and k > hasta:
+            break   # el ancla fija su hora: lo que sigue depende solo de ella
+        inicio = it["_start_dt"] if ancla else agenda[k - 1]["_end_dt"]
+        fin = inicio + dt.timedelta(minutes=int(it["Min"]))
+        if inicio == it["_start_dt"] and fin == it["_end_dt"]:
+            if k > hasta:
+                break   # la suma acumulada ya coincide: el resto de la cadena está bien
+        else:
+            fijar_inicio(it, inicio)
+            cambiados.append(k)
+        k += 1
+    return cambiados
+
+
+def agregar(agenda: List[Dict], item: Dict) -> List[int]:
+    """Agrega al final; si es "_auto" arranca donde termina el último bloque."""
+    agenda.append(item)
+    return retemporizar(agenda, len(agenda) - 1)
+
+
+def mover(agenda: List[Dict], i: int, j: int) -> List[int]:
+    """Lleva el bloque i a la posición j (las anclas conservan su hora)."""
+    if i == j or not (0 <= i < len(agenda) and 0 <= j < len(agenda)):
+        return []
+    agenda.insert(j, agenda.pop(i))
+    return retemporizar(agenda, min(i, j), max(i, j))
+
+
+def eliminar(agenda: List[Dict], i: int) -> Tuple[Dict, List[int]]:
+    item = agenda.pop(i)
+    return item, retemporizar(agenda, i) if i < len(agenda) else []
+
+
+def cambiar_duracion(agenda: List[Dict], i: int, minutos: int) -> List[int]:
+    agenda[i]["Min"] = int(minutos)
+    return retemporizar(agenda, i)
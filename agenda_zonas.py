@@ -0,0 +1,74 @@
+from functools import lru_cache
+from typing import Dict, List, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# Zonas horarias: la agenda vive en la zona de la reunión y se convierte en bloque
+# =========================
+ZONAS_COMUNES = [
+    "America/Lima", "America/Bogota", "America/Mexico_City", "America/Santiago",
+    "America/Argentina/Buenos_Aires", "America/Sao_Paulo", "America/New_York",
+    "America/Los_Angeles", "Europe/Madrid", "Europe/London", "UTC", "Asia/Tokyo",
+]
+
+
+@lru_cache(maxsize=None)
+def zona(nombre: str) -> ZoneInfo:
+    """ZoneInfo cacheado (leer la base tz en cada rerun y por cada bloque es caro)."""
+    return ZoneInfo(nombre)
+
+
+def valida(nombre: str) -> bool:
+    try:
+        zona(nombre)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def etiqueta(nombre: str) -> str:
+    """'America/Argentina/Buenos_Aires' -> 'Buenos Aires'."""
+    return nombre.rsplit("/", 1)[-1].replace("_", " ")
+
+
+def convertir(inicios: Sequence, minutos: Sequence[int], origen: str, destinos: Sequence[str]) -> pd.DataFrame:
+    """Horas de todos los bloques en cada zona, en formato largo (Pos, Zona, Inicio, Fin, Día).
+    Los inicios son horas locales de `origen`; se localizan una vez y luego cada zona
+    es una sola conversión vectorizada (O(n) por zona, sin bucle por bloque).
+    Inicio/Fin salen sin tz (hora de pared de esa zona) para graficar tal cual;
+    Día es el corrimiento de fecha respecto de la zona de origen (-1, 0, +1)."""
+    n = len(inicios)
+    zonas = list(dict.fromkeys([origen, *destinos]))
+    if n == 0:
+        return pd.DataFrame(columns=["Pos", "Zona", "Inicio", "Fin", "Día"])
+    # En horas ambiguas (fin del horario de verano) se toma la hora estándar
+    ini = pd.DatetimeIndex(inicios).tz_localize(zona(origen), ambiguous=np.zeros(n, dtype=bool),
+                                                nonexistent="shift_forward")
+    fin = ini + pd.to_timedelta(np.asarray(minutos, dtype="int64"), unit="min")
+    dia_origen = ini.tz_localize(None).normalize()
+    partes = []
+    for z in zonas:
+        ini_z = ini.tz_convert(zona(z)).tz_localize(None)
+        partes.append(pd.DataFrame({
+            "Pos": np.arange(n),
+            "Zona": z,
+            "Inicio": ini_z,
+            "Fin": fin.tz_convert(zona(z)).tz_localize(None),
+            "Día": (ini_z.normalize() - dia_origen).days,
+        }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def horas_por_bloque(largo: pd.DataFrame, origen: str) -> Dict[int, List[str]]:
+    """Pos -> ['16:00–16:15 Madrid', '07:00–07:15 Tokyo (+1)', ...] con las zonas
+    distintas de la de origen (para el Acta)."""
+    otras = largo[largo["Zona"] != origen]
+    if otras.empty:
+        return {}
+    textos = (otras["Inicio"].dt.strftime("%H:%M") + "–" + otras["Fin"].dt.strftime("%H:%M")
+              + " " + otras["Zona"].map(etiqueta)
+              + otras["Día"].map(lambda d: f" ({d:+d})" if d else ""))
+    return textos.groupby(otras["Pos"]).agg(list).to_dict()
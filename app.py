@@ -0,0 +1,16 @@
+import streamlit as st
+
+from perfilado import cierre
+
+# =========================
+# Lanzador multipágina: agenda y catálogo en un solo servidor
+# =========================
+# `streamlit run app.py` sirve las dos apps como páginas: comparten proceso (y
+# por lo tanto los cache_resource) y el session_state de cada pestaña del
+# navegador. Cada página se puede seguir corriendo sola con `streamlit run`.
+pagina = st.navigation([
+    st.Page("tarea01.py", title="Agenda", icon="📝", default=True),
+    st.Page("intento02.py", title="Catálogo", icon="💖"),
+])
+with cierre():   # con ?perfil=1, también quedan en la traza los reruns que cortan st.rerun()/st.stop()
+    pagina.run()
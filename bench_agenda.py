@@ -0,0 +1,79 @@
+# Benchmarks del optimizador de agenda sobre agendas sintéticas.
+# Uso: python bench_agenda.py --sizes 10 100 1000 --presupuesto 0 1 --out bench_agenda.json
+import datetime as dt
+import platform
+import random
+import sys
+import time
+from typing import Dict, List
+
+from agenda_optimizador import Restricciones, optimizar
+from bench_salida import escribir_salida, parser
+
+# =========================
+# Generador sintético (con semilla)
+# =========================
+TIPOS = ["Discusión", "Decisión", "Información"]
+PERSONAS = ["Ana", "Luis", "Carla", "Diego", "Eva", "Fede", "Gina", "Hugo"]
+
+
+def generar_agenda(n: int, seed: int = 42, fijos: float = 0.05) -> tuple:
+    """(bloques, restricciones): duraciones de 5 a 60 min, ~5% fijos y ventanas
+    de disponibilidad de medio día por persona (para la mitad de las personas)."""
+    rng = random.Random(seed)
+    inicio = dt.datetime(2026, 1, 5, 9, 0)
+    bloques = [{
+        "_id": i, "Tema": f"Tema {i}", "Responsable": rng.choice(PERSONAS),
+        "Tipo": rng.choice(TIPOS), "Min": rng.choice([5, 10, 15, 20, 30, 45, 60]),
+    } for i in range(n)]
+    total = sum(b["Min"] for b in bloques)
+    horizonte = int(total * 1.2)
+    r = Restricciones(inicio=inicio, duracion_max=horizonte, decision_margen=15, pausa_cada=90, pausa_min=10)
+    for persona in PERSONAS[::2]:
+        a = rng.randrange(0, max(horizonte // 2, 1))
+        r.disponibilidad[persona] = [(inicio + dt.timedelta(minutes=a),
+                                      inicio + dt.timedelta(minutes=a + horizonte // 2))]
+    for b in rng.sample(bloques, int(n * fijos)):
+        r.fijos[b["_id"]] = inicio + dt.timedelta(minutes=5 * rng.randrange(horizonte // 5))
+    return bloques, r
+
+
+# =========================
+# Medición
+# =========================
+def bench_tamano(n: int, presupuestos: List[float], seed: int) -> List[Dict]:
+    bloques, r = generar_agenda(n, seed)
+    out = []
+    for presupuesto in presupuestos:
+        t0 = time.perf_counter()
+        plan = optimizar(bloques, r, presupuesto=presupuesto, seed=seed)
+        seg = time.perf_counter() - t0
+        out.append({
+            "n": n, "presupuesto_s": presupuesto, "total_s": seg, "iteraciones": plan.iteraciones,
+            "costo": plan.costo, "ocio_min": plan.ocio, "violaciones": len(plan.violaciones),
+            "pausas": len(plan.pausas),
+        })
+        print(f"  n={n} presupuesto={presupuesto}s -> costo {plan.costo:.0f} "
+              f"({len(plan.violaciones)} violaciones, {plan.iteraciones} iteraciones, {seg:.3f}s)", file=sys.stderr)
+    return out
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = parser("Benchmarks del optimizador de agenda sobre agendas sintéticas")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000])
+    ap.add_argument("--presupuesto", type=float, nargs="+", default=[0.0, 0.2, 1.0],
+                    help="segundos de búsqueda local (0 = solo greedy)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    for n in args.sizes:
+        print(f"agenda de {n} bloques", file=sys.stderr)
+        resultados.extend(bench_tamano(n, args.presupuesto, args.seed))
+    salida = {"python": platform.python_version(), "seed": args.seed, "sizes": args.sizes, "results": resultados}
+    escribir_salida(salida, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# Tiempo hasta el primer pintado de cada app (proceso nuevo por medición).
+# Uso: python bench_arranque.py --repeticiones 5 --out bench_arranque.json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from bench_salida import escribir_salida, parser
+
+RAIZ = Path(__file__).resolve().parent
+APPS = ["tarea01.py", "intento02.py", "app.py"]
+PESADOS = ["altair", "PIL", "vl_convert"]
+
+
+def _medir(args) -> Dict:
+    """Corre en un proceso recién creado (spawn): nada importado de antemano."""
+    app, directorio = args
+    sys.path.insert(0, str(RAIZ))
+    os.chdir(directorio)
+    os.environ["AGENDA_DB"] = os.path.join(directorio, "agenda.db")
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    importar = time.perf_counter() - t0
+
+    at = AppTest.from_file(str(RAIZ / app), default_timeout=120)
+    t0 = time.perf_counter()
+    at.run()
+    primero = time.perf_counter() - t0
+    error = at.exception[0].message if at.exception else None
+    cargados = {m: m in sys.modules for m in PESADOS}
+    t0 = time.perf_counter()
+    at.run()
+    segundo = time.perf_counter() - t0
+    return {
+        "importar_ms": importar * 1000, "primer_run_ms": primero * 1000, "segundo_run_ms": segundo * 1000,
+        "cargados": cargados, "modulos": len(sys.modules), "error": error,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def bench_app(app: str, repeticiones: int) -> Dict:
+    ctx = mp.get_context("spawn")
+    medidas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(repeticiones):
+            with ctx.Pool(1) as pool:
+                medidas.append(pool.apply(_medir, ((app, tmp),)))
+    primer_pintado = [m["importar_ms"] + m["primer_run_ms"] for m in medidas]
+    return {
+        "app": app, "repeticiones": repeticiones,
+        "primer_pintado_ms": float(np.median(primer_pintado)),
+        "importar_ms": float(np.median([m["importar_ms"] for m in medidas])),
+        "primer_run_ms": float(np.median([m["primer_run_ms"] for m in medidas])),
+        "segundo_run_ms": float(np.median([m["segundo_run_ms"] for m in medidas])),
+        "modulos": medidas[-1]["modulos"],
+        "cargados": medidas[-1]["cargados"],
+        "rss_mb": float(np.median([m["rss_mb"] for m in medidas])),
+        "errores": [m["error"] for m in medidas if m["error"]],
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = parser("Tiempo hasta el primer pintado de cada app (proceso nuevo por medición)")
+    ap.add_argument("--apps", nargs="+", choices=APPS, default=APPS)
+    ap.add_argument("--repeticiones", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    for app in args.apps:
+        r = bench_app(app, args.repeticiones)
+        pesados = ", ".join(m for m, v in r["cargados"].items() if v) or "ninguno"
+        print(f"{app}: primer pintado {r['primer_pintado_ms']:.0f} ms (import {r['importar_ms']:.0f} + "
+              f"run {r['primer_run_ms']:.0f}) · segundo run {r['segundo_run_ms']:.0f} ms · "
+              f"{r['modulos']} módulos · pesados cargados: {pesados}", file=sys.stderr)
+        resultados.append(r)
+    salida = {"python": platform.python_version(), "repeticiones": args.repeticiones, "results": resultados}
+    escribir_salida(salida, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
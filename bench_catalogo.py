@@ -0,0 +1,240 @@
+# Benchmarks de las rutas calientes de intento02.py sobre catálogos sintéticos.
+# Uso: python bench_catalogo.py --sizes 1000 10000 100000 --out bench_catalogo.json
+import base64
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from bench_salida import escribir_salida, parser
+from catalogo_agregados import Aggregates
+from catalogo_busqueda import SearchIndex
+from catalogo_filtros import FacetIndex
+from catalogo_graficos import chart_scatter
+from catalogo_io import exportar_json, exportar_ndjson, importar
+from catalogo_sqlite import SQLiteCatalog
+from catalogo_store import CatalogStore
+
+# =========================
+# Generador sintético (con semilla)
+# =========================
+MARCAS = ["Rare Beauty","Fenty Beauty","Maybelline","MAC","NARS","e.l.f.","NYX","L'Oréal","Otra"]
+CATEGORIAS = ["Rostro","Ojos","Labios"]
+ACABADOS = ["Mate","Satinado","Brillante","Glow","Natural","Mate difuminado"]
+PALABRAS = ["Liquid","Velvet","Butter","Powder","Glow","Blush","Lipstick","Gloss","Ink","Matte",
+            "Kiss","Wand","Fresh","Wear","Halo","Super","Stay","Soft","Pinch","Cream"]
+TONOS = ["Rosa","Happy","Pink Matter","Crème Brulee","Sultry Move","Orgasm","Lippy","Coral","Nude","Berry"]
+
+
+def generar_catalogo(n: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{
+        "id": i,
+        "nombre": " ".join(rng.sample(PALABRAS, 2)) + f" {rng.randint(1, 999)}",
+        "marca": rng.choice(MARCAS), "categoría": rng.choice(CATEGORIAS), "acabado": rng.choice(ACABADOS),
+        "tono": rng.choice(TONOS), "precio": round(rng.uniform(20, 200), 1), "rating": round(rng.uniform(1, 5), 1),
+        "cruelty_free": rng.random() < 0.5, "vegano": rng.random() < 0.3, "stock": rng.randint(0, 60),
+        "descripcion": "Descripción breve del producto.", "image_url": "", "image_hash": "",
+    } for i in range(1, n + 1)]
+
+
+def generar_imagenes(n: int, seed: int = 42, size=(800, 600)) -> List[bytes]:
+    """JPEGs sintéticos (degradados con ruido) para medir decodificación y miniaturas."""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        arr = rng.integers(0, 255, size=(size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+        img = Image.fromarray(arr).resize(size)
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=90)
+        out.append(buf.getvalue())
+    return out
+
+
+# =========================
+# Medición
+# =========================
+def medir(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    tiempos = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    return {"min_s": min(tiempos), "median_s": statistics.median(tiempos), "repeat": repeat}
+
+
+def bench_tamano(n: int, repeat: int, n_imagenes: int, seed: int) -> List[Dict]:
+    items = generar_catalogo(n, seed)
+    filas: List[Dict] = []
+
+    def etapa(nombre: str, fn: Callable[[], object], rep: int = repeat):
+        r = medir(fn, rep)
+        filas.append({"size": n, "stage": nombre, **r})
+        print(f"  {nombre:<28} {r['median_s'] * 1000:10.2f} ms", file=sys.stderr)
+
+    # --- materialización del DataFrame ---
+    etapa("to_df_legacy", lambda: pd.DataFrame(items))
+    etapa("store_load", lambda: CatalogStore(items))
+    store = CatalogStore(items)
+
+    def vista_fria():
+        store._vista_version = -1
+        return store.view()
+    etapa("store_view_cold", vista_fria)
+    etapa("store_view_cached", store.view)
+    df = store.view()
+
+    # --- filtros ---
+    f_marca, f_cat, f_acab, f_precio = MARCAS[:5], CATEGORIAS[:2], ACABADOS, 120.0
+    filtros = {"marca": f_marca, "categoría": f_cat, "acabado": f_acab}
+    etapa("filter_mask_legacy", lambda: (
+        df["marca"].isin(f_marca) & df["categoría"].isin(f_cat) & df["acabado"].isin(f_acab) & (df["precio"] <= f_precio)))
+    etapa("facet_index_build", lambda: FacetIndex(items))
+    fidx = FacetIndex(items)
+    etapa("filter_mask_bitmaps", lambda: df["id"].isin(fidx.to_ids(fidx.mask(filtros, f_precio))))
+    etapa("facet_counts", lambda: fidx.counts(filtros, f_precio))
+    df_f = df[df["id"].isin(fidx.to_ids(fidx.mask(filtros, f_precio)))].reset_index(drop=True)
+
+    # --- búsqueda ---
+    consultas = ["glow", "lipst", "velvt", "pink matter", "nyx"]
+    etapa("search_legacy", lambda: [
+        (df["nombre"].str.lower().str.contains(q) | df["tono"].str.lower().str.contains(q)
+         | df["marca"].str.lower().str.contains(q)) for q in consultas])
+    etapa("search_index_build", lambda: SearchIndex(items), rep=1)
+    sidx = SearchIndex(items)
+    etapa("search_index_query", lambda: [sidx.search(q) for q in consultas])
+
+    # --- paginación ---
+    etapa("paginate_legacy", lambda: [df_f.iloc[p * 6:(p + 1) * 6] for p in range(50)])
+    ids_f = fidx.to_ids(fidx.mask(filtros, f_precio))
+    orden = store.orden("precio", True)
+    etapa("sort_order_build", lambda: (store._ordenes.clear(), store.orden("precio", True)))
+    ids_orden = orden[np.isin(orden, ids_f)]
+    etapa("paginate_ids", lambda: [store.rows(ids_orden[p * 6:(p + 1) * 6]) for p in range(50)])
+
+    # --- métricas e Insights ---
+    etapa("metrics_frame", lambda: Aggregates.desde_frame(df_f))
+    aggs = Aggregates(items)
+    etapa("metrics_cells", lambda: aggs.desde_celdas(filtros))
+    etapa("insights_scatter", lambda: chart_scatter(df_f).to_dict())
+
+    # --- import / export ---
+    etapa("export_ndjson", lambda: exportar_ndjson(store).read())
+    etapa("export_json", lambda: exportar_json(store, lambda h: "").read())
+    data = json.dumps(items, ensure_ascii=False).encode("utf-8")
+    etapa("import_json_legacy", lambda: json.loads(data), rep=1)
+    etapa("import_json_stream", lambda: importar(io.BytesIO(data)), rep=1)
+
+    # --- SQLite compartido ---
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteCatalog(f"{tmp}/catalogo.db")
+        etapa("sqlite_load", lambda: db.replace_all(items), rep=1)
+        etapa("sqlite_filter_ids", lambda: db.consultar("", filtros, f_precio, "precio", True))
+        etapa("sqlite_facet_counts", lambda: db.conteos("", filtros, f_precio))
+        etapa("sqlite_search", lambda: [db.consultar(q, filtros, 200.0) for q in consultas])
+        etapa("sqlite_resumen", lambda: db.resumen("", filtros, f_precio))
+        ids_db = db.consultar("", filtros, f_precio, "precio", True)
+        etapa("sqlite_paginate", lambda: [db.rows(ids_db[p * 6:(p + 1) * 6]) for p in range(50)])
+        db.close()
+
+    # --- imágenes ---
+    if n_imagenes:
+        from catalogo_imagenes import ImageStore
+        imgs = generar_imagenes(min(n_imagenes, n), seed)
+        b64s = [base64.b64encode(b).decode("utf-8") for b in imgs]
+        etapa("image_decode_b64_legacy", lambda: [base64.b64decode(s.encode("utf-8")) for s in b64s])
+        with tempfile.TemporaryDirectory() as tmp:
+            st_img = ImageStore(tmp)
+            hashes = [st_img.put(b) for b in imgs]
+            etapa("image_thumbnail_cold", lambda: [st_img.thumbnail(h, "card", timeout=60) for h in hashes], rep=1)
+            etapa("image_thumbnail_lru", lambda: [st_img.thumbnail(h, "card") for h in hashes])
+            bench_urls(etapa, st_img, imgs, tmp)
+            st_img.close()
+    return filas
+
+
+class _ServidorImagenes(BaseHTTPRequestHandler):
+    """Servidor HTTP local que sustituye a los hosts de image_url (ETag + 304 + 404)."""
+    imagenes: List[bytes] = []
+    latencia = 0.05
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.latencia)
+        try:
+            data = self.imagenes[int(self.path.strip("/").split(".")[0])]
+        except (ValueError, IndexError):
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"%d"' % len(data)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def bench_urls(etapa: Callable, st_img, imgs: List[bytes], tmp: str) -> None:
+    """Descarga de image_url: en frío, desde la caché, revalidando (304) y con URLs rotas."""
+    from catalogo_urls import URLImageCache
+    _ServidorImagenes.imagenes = imgs
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _ServidorImagenes)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_port}"
+    urls = [f"{base}/{i}.jpg" for i in range(len(imgs))] + [f"{base}/roto{i}" for i in range(10)]
+    try:
+        uc = URLImageCache(st_img, f"{tmp}/urls")
+        etapa("url_resolve_cold", lambda: uc.resolver(urls), rep=1)
+        etapa("url_resolve_cached", lambda: uc.resolver(urls))
+
+        def revalidar():
+            for u in urls:
+                uc.entrada(u)["expira"] = 0
+            uc.resolver(urls)
+        etapa("url_revalidate_304", revalidar, rep=1)
+        uc.close()
+    finally:
+        srv.shutdown()
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = parser("Benchmarks de las rutas calientes de intento02.py sobre catálogos sintéticos")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--imagenes", type=int, default=0, help="cuántas imágenes sintéticas generar (0 = sin imágenes)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    for n in args.sizes:
+        print(f"catálogo de {n} productos", file=sys.stderr)
+        resultados.extend(bench_tamano(n, args.repeat, args.imagenes, args.seed))
+    salida = {
+        "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+        "seed": args.seed, "sizes": args.sizes, "results": resultados,
+    }
+    escribir_salida(salida, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
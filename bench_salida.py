@@ -0,0 +1,23 @@
+import argparse
+import json
+from typing import Dict
+
+# =========================
+# Opciones y salida JSON comunes a los bench_*.py (sin dependencias pesadas:
+# bench_arranque y bench_sesiones lo importan también en procesos recién creados)
+# =========================
+
+
+def parser(descripcion: str) -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description=descripcion)
+    ap.add_argument("--out", default="-", help="archivo JSON de salida ('-' = stdout)")
+    return ap
+
+
+def escribir_salida(salida: Dict, out: str) -> None:
+    texto = json.dumps(salida, indent=2)
+    if out == "-":
+        print(texto)
+    else:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(texto)
@@ -0,0 +1,215 @@
+# Carga sin navegador: N sesiones simultáneas de tarea01.py / intento02.py con AppTest.
+# Cada sesión corre en su propio proceso (AppTest instala un Runtime global por run).
+# Uso: python bench_sesiones.py --sesiones 8 --out bench_sesiones.json
+import json
+import multiprocessing as mp
+import os
+import pickle
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from bench_salida import escribir_salida, parser
+
+RAIZ = Path(__file__).resolve().parent
+AGENDA = str(RAIZ / "tarea01.py")
+CATALOGO = str(RAIZ / "intento02.py")
+
+
+# =========================
+# Sesión instrumentada
+# =========================
+class Sesion:
+    """Un AppTest (una pestaña de navegador) que cronometra cada rerun."""
+
+    def __init__(self, app: str, timeout: float = 60):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(app, default_timeout=timeout)
+        self.tiempos: List[float] = []
+
+    def run(self, accion: Callable | None = None) -> None:
+        if accion is not None:
+            accion(self.at)
+        t0 = time.perf_counter()
+        self.at.run()
+        self.tiempos.append(time.perf_counter() - t0)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def widget(self, tipo: str, etiqueta: str):
+        for w in getattr(self.at, tipo):
+            if etiqueta in w.label:
+                return w
+        raise LookupError(f"{tipo} '{etiqueta}' no está en la página")
+
+    def click(self, etiqueta: str) -> None:
+        self.run(lambda at: self.widget("button", etiqueta).click())
+
+    def estado_bytes(self) -> int:
+        """Tamaño del session_state serializado (lo que no se puede picklear cuenta con getsizeof)."""
+        total = 0
+        for v in self.at.session_state.to_dict().values():
+            try:
+                total += len(pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL))
+            except Exception:
+                total += sys.getsizeof(v)
+        return total
+
+
+# =========================
+# Escenarios (una sesión = una llamada)
+# =========================
+TEMAS = ["Apertura", "Presupuesto", "Riesgos", "Roadmap", "Métricas", "Contratación", "Cierre"]
+PERSONAS = ["Ana", "Luis", "Carla", "Diego", ""]
+
+
+def agenda_edicion(s: Sesion, rng: random.Random, tam: int) -> None:
+    """Alta de `tam` bloques (la mitad encadenados), reordenar y cambiar duraciones en modo lista."""
+    s.run()
+    for k in range(tam):
+        def alta(at, k=k):
+            s.widget("text_input", "Tema").input(f"{rng.choice(TEMAS)} {k}")
+            s.widget("text_input", "Responsable").input(rng.choice(PERSONAS))
+            s.widget("number_input", "Minutos").set_value(rng.choice([5, 10, 15, 30]))
+            s.widget("checkbox", "Auto-secuenciar").set_value(k % 2 == 1)
+            s.widget("button", "Agregar").click()
+        s.run(alta)
+    for _ in range(max(tam // 4, 1)):
+        ids = [it["_id"] for it in s.at.session_state["agenda"]]
+        item_id = rng.choice(ids[1:] or ids)
+        s.run(lambda at: at.button(key=f"up_{item_id}").click())
+        item_id = rng.choice(ids)
+        s.run(lambda at: at.number_input(key=f"min_{item_id}").set_value(rng.choice([10, 20, 45])))
+
+
+def agenda_optimizar(s: Sesion, rng: random.Random, tam: int) -> None:
+    """Agenda de `tam` bloques -> calcular plan -> aplicarlo -> conflictos."""
+    agenda_edicion(s, rng, tam)
+    s.click("Calcular plan")
+    s.click("Aplicar plan")
+    if any("Resolver conflictos" in b.label for b in s.at.button):
+        s.click("Resolver conflictos")
+
+
+def catalogo_filtros(s: Sesion, rng: random.Random, tam: int) -> None:
+    """Búsqueda, facetas, precio, orden y paginación sobre el catálogo cargado."""
+    s.run()
+    for _ in range(max(tam // 5, 1)):
+        marcas = s.widget("multiselect", "Marca")
+        s.run(lambda at: marcas.set_value(rng.sample(marcas.options, rng.randint(1, len(marcas.options)))))
+        s.run(lambda at: s.widget("slider", "Precio máx").set_value(float(rng.randrange(40, 200))))
+        s.run(lambda at: s.widget("selectbox", "Ordenar por").set_value(
+            rng.choice(s.widget("selectbox", "Ordenar por").options)))
+        s.run(lambda at: s.widget("text_input", "Buscar").input(rng.choice(["", "glow", "mat", "rosa"])))
+        for _ in range(3):
+            if not s.widget("button", "Siguiente").disabled:
+                s.click("Siguiente")
+
+
+def catalogo_importar(s: Sesion, rng: random.Random, tam: int) -> None:
+    """Importa un JSON de `tam * 100` productos y recorre algunas páginas."""
+    from bench_catalogo import generar_catalogo
+    s.run()
+    datos = json.dumps(generar_catalogo(tam * 100, seed=rng.randrange(1 << 30)), ensure_ascii=False).encode()
+    s.run(lambda at: s.widget("file_uploader", "Importar").set_value(("catalogo.json", datos, "application/json")))
+    for _ in range(5):
+        if not s.widget("button", "Siguiente").disabled:
+            s.click("Siguiente")
+    s.run(lambda at: s.widget("selectbox", "Por página").set_value(48))
+
+
+ESCENARIOS: Dict[str, tuple] = {
+    "agenda_edicion": (AGENDA, agenda_edicion),
+    "agenda_optimizar": (AGENDA, agenda_optimizar),
+    "catalogo_filtros": (CATALOGO, catalogo_filtros),
+    "catalogo_importar": (CATALOGO, catalogo_importar),
+}
+
+
+# =========================
+# Ejecución concurrente
+# =========================
+def una_sesion(escenario: str, semilla: int, tam: int) -> Dict:
+    app, fn = ESCENARIOS[escenario]
+    s = Sesion(app)
+    error = None
+    try:
+        fn(s, random.Random(semilla), tam)
+    except Exception as e:   # se informa y se sigue con las demás sesiones
+        error = f"{type(e).__name__}: {e}"
+    return {"tiempos": s.tiempos, "estado_bytes": s.estado_bytes(), "error": error}
+
+
+def _preparar(directorio: str) -> None:
+    """Cachés y bases en un directorio temporal (no se ensucia el repo)."""
+    sys.path.insert(0, str(RAIZ))
+    os.chdir(directorio)
+    os.environ["AGENDA_DB"] = os.path.join(directorio, "agenda.db")
+
+
+def _proceso_sesion(args) -> Dict:
+    escenario, semilla, tam, directorio = args
+    _preparar(directorio)
+    out = una_sesion(escenario, semilla, tam)
+    out["rss_pico_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return out
+
+
+def resumir(escenario: str, sesiones: int, crudo: Dict) -> Dict:
+    # El primer run de cada sesión importa módulos y llena cachés: se informa aparte
+    tiempos = np.array([t for r in crudo["res"] for t in r["tiempos"][1:]]) * 1000
+    arranques = [r["tiempos"][0] * 1000 for r in crudo["res"] if r["tiempos"]]
+    estados = [r["estado_bytes"] for r in crudo["res"]]
+    p50, p95, p99 = np.percentile(tiempos, [50, 95, 99]) if len(tiempos) else (0.0, 0.0, 0.0)
+    return {
+        "escenario": escenario, "sesiones": sesiones, "reruns": int(len(tiempos)),
+        "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+        "max_ms": float(tiempos.max()) if len(tiempos) else 0.0,
+        "arranque_ms": float(np.median(arranques)) if arranques else 0.0,
+        "total_s": crudo["total_s"],
+        "rss_pico_mb": max(r["rss_pico_mb"] for r in crudo["res"]),
+        "rss_total_mb": sum(r["rss_pico_mb"] for r in crudo["res"]),
+        "estado_kb_medio": float(np.mean(estados)) / 1024, "estado_kb_max": max(estados) / 1024,
+        "errores": [r["error"] for r in crudo["res"] if r["error"]],
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = parser("Carga sin navegador: N sesiones simultáneas de tarea01.py / intento02.py con AppTest")
+    ap.add_argument("--escenarios", nargs="+", choices=list(ESCENARIOS), default=list(ESCENARIOS))
+    ap.add_argument("--sesiones", type=int, default=4)
+    ap.add_argument("--tam", type=int, default=10, help="tamaño de cada escenario (bloques, rondas, x100 productos)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+
+    ctx = mp.get_context("spawn")
+    resultados = []
+    for escenario in args.escenarios:
+        print(f"{escenario}: {args.sesiones} sesiones", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Procesos nuevos por escenario: el RSS pico no arrastra el escenario anterior
+            t0 = time.perf_counter()
+            with ctx.Pool(args.sesiones, maxtasksperchild=1) as pool:
+                res = pool.map(_proceso_sesion,
+                               [(escenario, args.seed + i, args.tam, tmp) for i in range(args.sesiones)],
+                               chunksize=1)
+            crudo = {"res": res, "total_s": time.perf_counter() - t0}
+        r = resumir(escenario, args.sesiones, crudo)
+        print(f"  p50 {r['p50_ms']:.0f} ms · p95 {r['p95_ms']:.0f} ms · p99 {r['p99_ms']:.0f} ms · "
+              f"arranque {r['arranque_ms']:.0f} ms · RSS {r['rss_pico_mb']:.0f} MB/sesión · estado {r['estado_kb_max']:.0f} KB · "
+              f"{len(r['errores'])} errores", file=sys.stderr)
+        resultados.append(r)
+    salida = {"python": platform.python_version(), "seed": args.seed, "tam": args.tam, "results": resultados}
+    escribir_salida(salida, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
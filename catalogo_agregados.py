@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from catalogo_store import Memo
+
+# =========================
+# Agregados incrementales para métricas e Insights
+# =========================
+# Cada celda (marca, categoría, acabado) guarda [n, Σprecio, Σrating, Σstock].
+Celda = Tuple[str, str, str]
+
+
+@dataclass
+class Resumen:
+    n: int
+    precio_prom: float | None
+    rating_prom: float | None
+    stock_total: int
+    por_categoria: pd.DataFrame   # categoría, count
+    precio_marca: pd.DataFrame    # marca, precio (promedio)
+
+
+def _vector(item: Dict) -> np.ndarray:
+    return np.array([1.0, float(item["precio"]), float(item["rating"]), float(item["stock"])])
+
+
+class Aggregates:
+    """Sumas y conteos por celda que se actualizan con cada alta/edición/baja.
+    Si solo filtran las facetas, el resumen sale de las celdas sin recorrer ítems;
+    con búsqueda o tope de precio se calcula sobre el DataFrame filtrado.
+    En ambos casos el resultado se cachea por clave de filtros."""
+
+    def __init__(self, items: Iterable[Dict] = (), memo_size: int = 64):
+        self.celdas: Dict[Celda, np.ndarray] = {}
+        self.por_id: Dict[int, Tuple[Celda, np.ndarray]] = {}
+        self.memo = Memo(memo_size)
+        for it in items:
+            self.add(it)
+
+    # ---------- mantenimiento ----------
+    def add(self, item: Dict) -> None:
+        if item["id"] in self.por_id:
+            self.remove(item["id"])
+        celda = (str(item["marca"]), str(item["categoría"]), str(item["acabado"]))
+        v = _vector(item)
+        acc = self.celdas.get(celda)
+        self.celdas[celda] = v.copy() if acc is None else acc + v
+        self.por_id[item["id"]] = (celda, v)
+
+    def update(self, item: Dict) -> None:
+        self.add(item)
+
+    def remove(self, item_id) -> None:
+        prev = self.por_id.pop(item_id, None)
+        if prev is None:
+            return
+        celda, v = prev
+        acc = self.celdas[celda] - v
+        if acc[0] <= 0:
+            del self.celdas[celda]
+        else:
+            self.celdas[celda] = acc
+
+    def rebuild(self, items: Iterable[Dict]) -> None:
+        self.__init__(items, self.memo.maxsize)
+
+    # ---------- consultas ----------
+    def desde_celdas(self, filtros: Dict[str, Iterable]) -> Resumen:
+        marcas, cats, acabs = (set(filtros.get(f, ())) for f in ("marca", "categoría", "acabado"))
+        sel = [(c, v) for c, v in self.celdas.items() if c[0] in marcas and c[1] in cats and c[2] in acabs]
+        total = np.sum([v for _, v in sel], axis=0) if sel else np.zeros(4)
+        por_cat: Dict[str, float] = {}
+        por_marca: Dict[str, np.ndarray] = {}
+        for (marca, cat, _), v in sel:
+            por_cat[cat] = por_cat.get(cat, 0) + v[0]
+            por_marca[marca] = por_marca.get(marca, 0) + v[:2]
+        n = int(total[0])
+        return Resumen(
+            n=n,
+            precio_prom=total[1] / n if n else None,
+            rating_prom=total[2] / n if n else None,
+            stock_total=int(round(total[3])),
+            por_categoria=pd.DataFrame(
+                {"categoría": sorted(por_cat), "count": [int(por_cat[c]) for c in sorted(por_cat)]}),
+            precio_marca=pd.DataFrame(
+                {"marca": sorted(por_marca), "precio": [por_marca[m][1] / por_marca[m][0] for m in sorted(por_marca)]}),
+        )
+
+    @staticmethod
+    def desde_frame(df: pd.DataFrame) -> Resumen:
+        return Resumen(
+            n=len(df),
+            precio_prom=float(df["precio"].mean()) if len(df) else None,
+            rating_prom=float(df["rating"].mean()) if len(df) else None,
+            stock_total=int(df["stock"].sum()) if len(df) else 0,
+            por_categoria=df.groupby("categoría", observed=True).size().reset_index(name="count"),
+            precio_marca=df.groupby("marca", observed=True)["precio"].mean().reset_index(),
+        )
+
+    def resumen(self, key: Hashable, filtros: Dict[str, Iterable], df_f: Callable[[], pd.DataFrame],
+                solo_facetas: bool) -> Resumen:
+        """Resumen del conjunto filtrado, memoizado por `key` (versión + filtros).
+        `df_f` es perezoso: solo se materializa si hace falta recorrer las filas."""
+        if solo_facetas:
+            return self.memo.get(key, lambda: self.desde_celdas(filtros))
+        return self.memo.get(key, lambda: self.desde_frame(df_f()))
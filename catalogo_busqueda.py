@@ -0,0 +1,178 @@
+import bisect
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Set
+
+# =========================
+# Índice invertido de búsqueda (tokens + trigramas)
+# =========================
+# Campos que cubre el buscador de la sidebar y su peso en el ranking.
+CAMPOS: Dict[str, float] = {"nombre": 3.0, "marca": 2.0, "tono": 1.0}
+
+# Puntaje según el tipo de coincidencia de cada término.
+EXACTO, PREFIJO, SUBCADENA, APROXIMADO = 1.0, 0.8, 0.6, 0.4
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes, para que 'crème' y 'creme' coincidan."""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> List[str]:
+    return _TOKEN_RE.findall(normalizar(texto))
+
+
+def trigramas(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def trigramas_borde(token: str) -> Set[str]:
+    """Trigramas con marcas de inicio/fin: sirven para palabras cortas con errores."""
+    return trigramas(f"${token}$")
+
+
+def distancia(a: str, b: str, tope: int) -> int:
+    """Levenshtein con corte temprano: devuelve tope+1 si se supera el tope."""
+    if abs(len(a) - len(b)) > tope:
+        return tope + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > tope:
+            return tope + 1
+        prev = cur
+    return prev[-1]
+
+
+class SearchIndex:
+    """Índice invertido sobre nombre/marca/tono con búsqueda por prefijo,
+    subcadena y errores de tipeo. Se actualiza por ítem, sin reconstruirse."""
+
+    def __init__(self, items: Iterable[Dict] = ()):
+        self.postings: Dict[str, Dict[int, float]] = {}  # token -> {id: peso}
+        self.vocab: List[str] = []                       # tokens ordenados (prefijos)
+        self.tri: Dict[str, Set[str]] = {}               # trigrama (con bordes) -> tokens
+        self.doc_tokens: Dict[int, Set[str]] = {}        # id -> tokens (para borrar)
+        for it in items:
+            self.add(it)
+
+    def __len__(self) -> int:
+        return len(self.doc_tokens)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.doc_tokens
+
+    # ---------- mantenimiento ----------
+    def add(self, item: Dict) -> None:
+        item_id = item["id"]
+        if item_id in self.doc_tokens:
+            self.remove(item_id)
+        pesos: Dict[str, float] = {}
+        for campo, peso in CAMPOS.items():
+            for tok in tokenizar(item.get(campo, "")):
+                pesos[tok] = max(pesos.get(tok, 0.0), peso)
+        for tok, peso in pesos.items():
+            if tok not in self.postings:
+                self.postings[tok] = {}
+                bisect.insort(self.vocab, tok)
+                for g in trigramas_borde(tok):
+                    self.tri.setdefault(g, set()).add(tok)
+            self.postings[tok][item_id] = peso
+        self.doc_tokens[item_id] = set(pesos)
+
+    def update(self, item: Dict) -> None:
+        self.add(item)
+
+    def remove(self, item_id) -> None:
+        for tok in self.doc_tokens.pop(item_id, ()):
+            docs = self.postings.get(tok)
+            if docs is None:
+                continue
+            docs.pop(item_id, None)
+            if not docs:
+                del self.postings[tok]
+                self.vocab.pop(bisect.bisect_left(self.vocab, tok))
+                for g in trigramas_borde(tok):
+                    toks = self.tri.get(g)
+                    if toks is not None:
+                        toks.discard(tok)
+                        if not toks:
+                            del self.tri[g]
+
+    def rebuild(self, items: Iterable[Dict]) -> None:
+        self.__init__(items)
+
+    # ---------- consulta ----------
+    def _prefijos(self, term: str) -> List[str]:
+        i = bisect.bisect_left(self.vocab, term)
+        out = []
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            out.append(self.vocab[i])
+            i += 1
+        return out
+
+    def _subcadenas(self, term: str) -> Set[str]:
+        if len(term) < 3:
+            # Términos muy cortos: el vocabulario es pequeño frente al catálogo.
+            return {t for t in self.vocab if term in t}
+        grams = sorted(trigramas(term), key=lambda g: len(self.tri.get(g, ())))
+        cands = set(self.tri.get(grams[0], ()))
+        for g in grams[1:]:
+            if not cands:
+                break
+            cands &= self.tri.get(g, set())
+        return {t for t in cands if term in t}
+
+    def _aproximados(self, term: str) -> Set[str]:
+        if len(term) < 4:
+            return set()
+        tope = 1 if len(term) <= 6 else 2
+        grams = trigramas_borde(term)
+        votos: Dict[str, int] = {}
+        for g in grams:
+            for tok in self.tri.get(g, ()):
+                votos[tok] = votos.get(tok, 0) + 1
+        # Con k errores se pierden a lo sumo 3k trigramas del término.
+        minimo = max(1, len(grams) - 3 * tope)
+        return {t for t, v in votos.items() if v >= minimo and distancia(term, t, tope) <= tope}
+
+    def _puntajes_termino(self, term: str) -> Dict[int, float]:
+        tipos: Dict[str, float] = {}
+        for tok in self._subcadenas(term):
+            tipos[tok] = SUBCADENA
+        for tok in self._prefijos(term):
+            tipos[tok] = PREFIJO
+        if term in self.postings:
+            tipos[term] = EXACTO
+        if not tipos:
+            tipos = {tok: APROXIMADO for tok in self._aproximados(term)}
+        puntajes: Dict[int, float] = {}
+        for tok, base in tipos.items():
+            for item_id, peso in self.postings[tok].items():
+                s = base * peso
+                if s > puntajes.get(item_id, 0.0):
+                    puntajes[item_id] = s
+        return puntajes
+
+    def search(self, query: str, limit: int | None = None) -> List[int]:
+        """Ids que cumplen todos los términos de la consulta, del más al menos relevante."""
+        terms = tokenizar(query)
+        if not terms:
+            return []
+        total: Dict[int, float] = {}
+        # Empezar por el término más selectivo acota el trabajo a los candidatos.
+        por_termino = sorted((self._puntajes_termino(t) for t in dict.fromkeys(terms)), key=len)
+        for i, puntajes in enumerate(por_termino):
+            if i == 0:
+                total = dict(puntajes)
+            else:
+                total = {k: v + puntajes[k] for k, v in total.items() if k in puntajes}
+            if not total:
+                return []
+        ranked = sorted(total, key=lambda k: (-total[k], k))
+        return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,185 @@
+import bisect
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# =========================
+# Motor de filtros: bitmaps por faceta + índice ordenado de precio
+# =========================
+# Cada ítem ocupa un "slot"; un bitmap es un int de Python cuyo bit i indica el slot i.
+FACETAS = ("marca", "categoría", "acabado")
+
+
+def popcount(bitmap: int) -> int:
+    return bitmap.bit_count()
+
+
+def pack(bits: np.ndarray) -> int:
+    """Arreglo booleano por slot -> bitmap."""
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+class FacetIndex:
+    """Un bitmap por valor de marca/categoría/acabado y una lista ordenada de precios.
+    La máscara de filtros sale de AND/OR entre bitmaps y una búsqueda binaria."""
+
+    def __init__(self, items: Iterable[Dict] = ()):
+        self.slots: Dict[int, int] = {}          # id -> slot
+        self.ids: List[int | None] = []          # slot -> id (None si está libre)
+        self.libres: List[int] = []              # slots reutilizables tras borrar
+        self.alive = 0
+        self.bitmaps: Dict[str, Dict[str, int]] = {f: {} for f in FACETAS}
+        self.valores: Dict[str, List] = {f: [] for f in FACETAS}  # slot -> valor
+        self.precio_slot: List[float] = []
+        self._precios: List[float] = []          # ordenados
+        self._precio_slots: List[int] = []       # slot de cada precio ordenado
+        self._cache_precio: Dict[float, int] = {}
+        self._ids_arr: np.ndarray | None = None
+        self._cargar(list(items))
+
+    def _cargar(self, items: List[Dict]) -> None:
+        """Carga masiva: un bitmap por valor construido de una vez, no bit a bit."""
+        if not items:
+            return
+        n = len(items)
+        self.ids = [it["id"] for it in items]
+        self.slots = {item_id: slot for slot, item_id in enumerate(self.ids)}
+        self.alive = (1 << n) - 1
+        for f in FACETAS:
+            col = [it.get(f) for it in items]
+            self.valores[f] = col
+            codes: Dict = {}
+            posiciones = np.fromiter((codes.setdefault(v, len(codes)) for v in col), dtype=np.int64, count=n)
+            for v, code in codes.items():
+                self.bitmaps[f][v] = pack(posiciones == code)
+        self.precio_slot = [float(it.get("precio", 0.0)) for it in items]
+        orden = np.argsort(np.asarray(self.precio_slot), kind="stable")
+        self._precio_slots = orden.tolist()
+        self._precios = [self.precio_slot[i] for i in self._precio_slots]
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    # ---------- mantenimiento ----------
+    def add(self, item: Dict) -> None:
+        item_id = item["id"]
+        if item_id in self.slots:
+            self.remove(item_id)
+        if self.libres:
+            slot = self.libres.pop()
+        else:
+            slot = len(self.ids)
+            self.ids.append(None)
+            self.precio_slot.append(0.0)
+            for f in FACETAS:
+                self.valores[f].append(None)
+        bit = 1 << slot
+        self.slots[item_id] = slot
+        self.ids[slot] = item_id
+        self.alive |= bit
+        for f in FACETAS:
+            v = item.get(f)
+            self.valores[f][slot] = v
+            self.bitmaps[f][v] = self.bitmaps[f].get(v, 0) | bit
+        precio = float(item.get("precio", 0.0))
+        self.precio_slot[slot] = precio
+        i = bisect.bisect_right(self._precios, precio)
+        self._precios.insert(i, precio)
+        self._precio_slots.insert(i, slot)
+        self._cache_precio.clear()
+        self._ids_arr = None
+
+    def update(self, item: Dict) -> None:
+        self.add(item)
+
+    def remove(self, item_id) -> None:
+        slot = self.slots.pop(item_id, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        self.alive &= ~bit
+        for f in FACETAS:
+            v = self.valores[f][slot]
+            rest = self.bitmaps[f][v] & ~bit
+            if rest:
+                self.bitmaps[f][v] = rest
+            else:
+                del self.bitmaps[f][v]
+            self.valores[f][slot] = None
+        precio = self.precio_slot[slot]
+        i = bisect.bisect_left(self._precios, precio)
+        while self._precio_slots[i] != slot:
+            i += 1
+        del self._precios[i]
+        del self._precio_slots[i]
+        self.ids[slot] = None
+        self.libres.append(slot)
+        self._cache_precio.clear()
+        self._ids_arr = None
+
+    def rebuild(self, items: Iterable[Dict]) -> None:
+        self.__init__(items)
+
+    # ---------- bitmaps ----------
+    def precio_max(self) -> float:
+        return self._precios[-1] if self._precios else 0.0
+
+    def opciones(self, faceta: str) -> List[str]:
+        return sorted(self.bitmaps[faceta])
+
+    def bitmap_faceta(self, faceta: str, seleccion: Iterable) -> int:
+        out = 0
+        for v in seleccion:
+            out |= self.bitmaps[faceta].get(v, 0)
+        return out
+
+    def bitmap_precio(self, maximo: float) -> int:
+        """Slots con precio <= maximo; se cachea por umbral hasta la próxima edición."""
+        bm = self._cache_precio.get(maximo)
+        if bm is None:
+            k = bisect.bisect_right(self._precios, maximo)
+            bits = np.zeros(len(self.ids), dtype=bool)
+            bits[np.asarray(self._precio_slots[:k], dtype=np.int64)] = True
+            bm = pack(bits)
+            self._cache_precio[maximo] = bm
+        return bm
+
+    def bitmap_ids(self, ids: Iterable) -> int:
+        slots = [s for s in (self.slots.get(i) for i in ids) if s is not None]
+        bits = np.zeros(len(self.ids), dtype=bool)
+        bits[np.asarray(slots, dtype=np.int64)] = True
+        return pack(bits)
+
+    def mask(self, filtros: Dict[str, Iterable], precio_max: float | None = None, extra: int | None = None) -> int:
+        bm = self.alive
+        for f, sel in filtros.items():
+            bm &= self.bitmap_faceta(f, sel)
+        if precio_max is not None:
+            bm &= self.bitmap_precio(precio_max)
+        if extra is not None:
+            bm &= extra
+        return bm
+
+    def counts(self, filtros: Dict[str, Iterable], precio_max: float | None = None, extra: int | None = None) -> Dict[str, Dict[str, int]]:
+        """Para cada faceta, cuántos ítems mostraría cada valor con el resto de filtros activos."""
+        por_faceta = {f: self.bitmap_faceta(f, sel) for f, sel in filtros.items()}
+        base = self.mask({}, precio_max, extra)
+        out: Dict[str, Dict[str, int]] = {}
+        for f in FACETAS:
+            otros = base
+            for g, bm in por_faceta.items():
+                if g != f:
+                    otros &= bm
+            out[f] = {v: popcount(bm & otros) for v, bm in sorted(self.bitmaps[f].items())}
+        return out
+
+    def to_bool(self, bitmap: int) -> np.ndarray:
+        """Bitmap -> arreglo booleano indexado por slot."""
+        n = len(self.ids)
+        raw = np.frombuffer(bitmap.to_bytes((n + 7) // 8, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:n].astype(bool)
+
+    def to_ids(self, bitmap: int) -> np.ndarray:
+        if self._ids_arr is None:
+            self._ids_arr = np.asarray([-1 if i is None else i for i in self.ids], dtype=np.int64)
+        return self._ids_arr[self.to_bool(bitmap)]
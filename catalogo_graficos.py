@@ -0,0 +1,114 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+
+# =========================
+# Gráficos de Insights y Comparador con payload acotado
+# =========================
+# Hasta este número de filas el scatter manda puntos; por encima, celdas agregadas.
+MAX_PUNTOS = 2000
+BINS_PRECIO = 40
+BINS_RATING = 20
+
+COLS_SCATTER = ["nombre", "marca", "precio", "rating", "categoría", "acabado", "tono"]
+
+
+def chart_categorias(cat_counts: pd.DataFrame) -> alt.Chart:
+    """Recibe el conteo ya agregado (categoría, count)."""
+    return (
+        alt.Chart(cat_counts)
+        .mark_bar()
+        .encode(
+            x=alt.X("categoría:N", title="Categoría"),
+            y=alt.Y("count:Q", title="Productos"),
+            tooltip=["categoría","count"]
+        )
+        .properties(height=320)
+    )
+
+
+def densidad(df: pd.DataFrame, bins_x: int = BINS_PRECIO, bins_y: int = BINS_RATING) -> pd.DataFrame:
+    """Agrega precio x rating en una rejilla fija: a lo sumo bins_x*bins_y filas."""
+    precio = df["precio"].to_numpy(dtype=float)
+    rating = df["rating"].to_numpy(dtype=float)
+    ex = np.linspace(precio.min(), precio.max() + 1e-9, bins_x + 1)
+    ey = np.linspace(rating.min(), rating.max() + 1e-9, bins_y + 1)
+    counts, _, _ = np.histogram2d(precio, rating, bins=[ex, ey])
+    ix, iy = np.nonzero(counts)
+    return pd.DataFrame({
+        "precio_ini": ex[ix], "precio_fin": ex[ix + 1],
+        "rating_ini": ey[iy], "rating_fin": ey[iy + 1],
+        "productos": counts[ix, iy].astype(int),
+    })
+
+
+def chart_scatter(df: pd.DataFrame, max_puntos: int = MAX_PUNTOS) -> alt.Chart:
+    """Precio vs Rating: solo las columnas codificadas; densidad si hay demasiados puntos."""
+    if len(df) <= max_puntos:
+        return (
+            alt.Chart(df[COLS_SCATTER])
+            .mark_circle(size=120)
+            .encode(
+                x=alt.X("precio:Q", title="Precio (S/.)"),
+                y=alt.Y("rating:Q", title="Rating"),
+                color=alt.Color("marca:N", title="Marca"),
+                tooltip=COLS_SCATTER
+            )
+            .properties(height=320)
+        )
+    return (
+        alt.Chart(densidad(df))
+        .mark_rect()
+        .encode(
+            x=alt.X("precio_ini:Q", title="Precio (S/.)"),
+            x2="precio_fin:Q",
+            y=alt.Y("rating_ini:Q", title="Rating"),
+            y2="rating_fin:Q",
+            color=alt.Color("productos:Q", title="Productos", scale=alt.Scale(scheme="purplered")),
+            tooltip=[
+                alt.Tooltip("precio_ini:Q", title="Precio desde", format=".2f"),
+                alt.Tooltip("precio_fin:Q", title="Precio hasta", format=".2f"),
+                alt.Tooltip("rating_ini:Q", title="Rating desde", format=".2f"),
+                alt.Tooltip("rating_fin:Q", title="Rating hasta", format=".2f"),
+                "productos:Q",
+            ]
+        )
+        .properties(height=320)
+    )
+
+
+def chart_precio_marca(brand_price: pd.DataFrame) -> alt.Chart:
+    """Recibe el promedio ya agregado (marca, precio)."""
+    return (
+        alt.Chart(brand_price)
+        .mark_bar()
+        .encode(
+            x=alt.X("marca:N", title="Marca"),
+            y=alt.Y("precio:Q", title="Precio promedio"),
+            tooltip=["marca", alt.Tooltip("precio:Q", format=".2f")]
+        )
+        .properties(height=280)
+    )
+
+
+def chart_comparador(comp: pd.DataFrame) -> alt.Chart:
+    """Barras normalizadas 0-1; recibe solo id, nombre y las tres métricas.
+    El eje usa "nombre (#id)" para que dos productos homónimos no se mezclen."""
+    comp = comp[["id", "nombre", "precio", "rating", "stock"]]
+    comp = comp.assign(producto=comp["nombre"].astype(str) + " (#" + comp["id"].astype(str) + ")")
+    comp_norm = comp.assign(
+        precio_n = (comp["precio"] - comp["precio"].min()) / (comp["precio"].max() - comp["precio"].min() + 1e-9),
+        rating_n = (comp["rating"] - comp["rating"].min()) / (comp["rating"].max() - comp["rating"].min() + 1e-9),
+        stock_n  = (comp["stock"]  - comp["stock"].min())  / (comp["stock"].max()  - comp["stock"].min()  + 1e-9),
+    )[["producto","precio_n","rating_n","stock_n"]].melt("producto", var_name="métrica", value_name="valor")
+    return (
+        alt.Chart(comp_norm)
+        .mark_bar()
+        .encode(
+            x=alt.X("producto:N", title="Producto"),
+            y=alt.Y("valor:Q", title="Valor normalizado"),
+            color=alt.Color("métrica:N", title="Métrica"),
+            tooltip=["producto","métrica", alt.Tooltip("valor:Q", format=".2f")]
+        )
+        .properties(height=260)
+    )
@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import io
+import multiprocessing as mp
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+# =========================
+# Imágenes: originales por hash + miniaturas en disco + LRU en memoria
+# =========================
+IMG_DIR = Path(os.environ.get("MAKEUP_IMG_DIR", ".makeup_cache/imagenes"))
+
+# Tamaños fijos de miniatura (ancho, alto máx.)
+TAMANOS: Dict[str, Tuple[int, int]] = {"card": (480, 360), "comp": (200, 150)}
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hacer_miniatura(src: str, dst: str, size: Tuple[int, int]) -> str:
+    """Corre en el pool de procesos: abre el original y guarda la miniatura JPEG."""
+    from PIL import Image   # Pillow se carga recién al generar la primera miniatura
+    img = Image.open(src).convert("RGB")
+    img.thumbnail(size)
+    tmp = f"{dst}.tmp{os.getpid()}"
+    img.save(tmp, format="JPEG", quality=82, optimize=True)
+    os.replace(tmp, dst)
+    return dst
+
+
+class ImageStore:
+    """Guarda cada imagen una sola vez (clave = sha256 del contenido), genera
+    miniaturas en un pool de procesos y cachea las ya leídas en un LRU."""
+
+    def __init__(self, root: Path = IMG_DIR, max_bytes: int = 64 * 1024 * 1024, workers: int | None = None):
+        self.root = Path(root)
+        (self.root / "orig").mkdir(parents=True, exist_ok=True)
+        (self.root / "thumbs").mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._lru: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lru_bytes = 0
+        self._pendientes: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+
+    # ---------- rutas ----------
+    def ruta_original(self, h: str) -> Path:
+        return self.root / "orig" / h
+
+    def ruta_miniatura(self, h: str, tam: str) -> Path:
+        return self.root / "thumbs" / f"{h}_{tam}.jpg"
+
+    def __contains__(self, h: str) -> bool:
+        return bool(h) and self.ruta_original(h).exists()
+
+    # ---------- altas ----------
+    def put(self, data: bytes) -> str:
+        """Guarda el original (si no existía) y encola sus miniaturas. Devuelve el hash."""
+        h = hash_bytes(data)
+        ruta = self.ruta_original(h)
+        if not ruta.exists():
+            tmp = ruta.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_bytes(data)
+            os.replace(tmp, ruta)
+        self.prefetch([h])
+        return h
+
+    def put_file(self, file) -> str:
+        """Valida que el archivo sea una imagen y lo guarda. '' si no se pudo leer."""
+        from PIL import Image
+        try:
+            data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+            Image.open(io.BytesIO(data)).verify()
+            return self.put(data)
+        except Exception:
+            return ""
+
+    def put_b64(self, b64: str) -> str:
+        """Migra una imagen embebida en base64 (JSON antiguos) al almacén."""
+        try:
+            return self.put(base64.b64decode(b64.encode("utf-8")))
+        except Exception:
+            return ""
+
+    def original_b64(self, h: str) -> str:
+        try:
+            return base64.b64encode(self.ruta_original(h).read_bytes()).decode("utf-8")
+        except Exception:
+            return ""
+
+    # ---------- miniaturas ----------
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: el servidor de Streamlit tiene hilos y fork podría bloquearse
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"))
+        return self._pool
+
+    def prefetch(self, hashes: Iterable[str], tamanos: Iterable[str] = TAMANOS) -> None:
+        """Encola en el pool las miniaturas que aún no existen en disco."""
+        for h in hashes:
+            if not h:
+                continue
+            for tam in tamanos:
+                key = (h, tam)
+                dst = self.ruta_miniatura(h, tam)
+                with self._lock:
+                    if key in self._lru or key in self._pendientes or dst.exists():
+                        continue
+                    src = self.ruta_original(h)
+                    if not src.exists():
+                        continue
+                    try:
+                        fut = self._get_pool().submit(_hacer_miniatura, str(src), str(dst), TAMANOS[tam])
+                    except Exception:
+                        continue  # sin pool: thumbnail() la generará en el propio proceso
+                    self._pendientes[key] = fut
+                    fut.add_done_callback(lambda _f, key=key: self._terminar(key))
+
+    def _terminar(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._pendientes.pop(key, None)
+
+    def _recordar(self, key: Tuple[str, str], data: bytes) -> None:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return
+            self._lru[key] = data
+            self._lru_bytes += len(data)
+            while self._lru_bytes > self.max_bytes and len(self._lru) > 1:
+                _, viejo = self._lru.popitem(last=False)
+                self._lru_bytes -= len(viejo)
+
+    def thumbnail(self, h: str, tam: str = "card", timeout: float = 10.0) -> bytes | None:
+        """Bytes JPEG de la miniatura: LRU -> disco -> trabajo pendiente -> generar aquí."""
+        if not h:
+            return None
+        key = (h, tam)
+        with self._lock:
+            data = self._lru.get(key)
+            if data is not None:
+                self._lru.move_to_end(key)
+                return data
+            fut = self._pendientes.get(key)
+        dst = self.ruta_miniatura(h, tam)
+        try:
+            if fut is not None:
+                fut.result(timeout=timeout)
+            if not dst.exists():
+                if not self.ruta_original(h).exists():
+                    return None
+                _hacer_miniatura(str(self.ruta_original(h)), str(dst), TAMANOS[tam])
+            data = dst.read_bytes()
+        except Exception:
+            return None
+        self._recordar(key, data)
+        return data
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
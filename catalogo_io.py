@@ -0,0 +1,300 @@
+import hashlib
+import io
+import itertools
+import json
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import flujos
+from catalogo_store import COLUMNAS, DEFAULTS, CatalogStore
+
+# =========================
+# Importación en streaming (JSON array o NDJSON)
+# =========================
+CHUNK_BYTES = 1 << 16
+LOTE_FILAS = 5000
+ARCHIVO_META = "catalogo.ndjson"   # nombres dentro del bundle zip
+DIR_IMAGENES = "imagenes/"
+
+NUMERICAS = ("precio", "rating", "stock")
+BOOLEANAS = ("cruelty_free", "vegano")
+TEXTOS = ("nombre", "marca", "categoría", "acabado", "tono", "descripcion", "image_url", "image_hash")
+_VERDADEROS = {"true", "1", "si", "sí", "yes", "y", "t"}
+
+Progreso = Callable[[int, int, int], None]  # (filas, bytes leídos, bytes totales)
+
+
+@dataclass
+class ResultadoImport:
+    frame: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=COLUMNAS))
+    errores: List[Tuple[int, str]] = field(default_factory=list)  # (fila, motivo)
+    filas: int = 0
+    hash: str = ""
+
+    @property
+    def items(self) -> List[Dict]:
+        return self.frame.to_dict("records")
+
+
+def hash_stream(stream: BinaryIO, chunk: int = CHUNK_BYTES) -> str:
+    """sha256 del contenido leyendo por bloques; deja el stream al inicio."""
+    h = hashlib.sha256()
+    stream.seek(0)
+    for bloque in iter(lambda: stream.read(chunk), b""):
+        h.update(bloque)
+    stream.seek(0)
+    return h.hexdigest()
+
+
+def iter_registros(stream: BinaryIO, chunk: int = CHUNK_BYTES) -> Iterator[Tuple[int, object, str | None]]:
+    """Recorre un JSON array o NDJSON sin cargarlo entero.
+    Emite (fila, objeto, error) — con error != None si esa fila no se pudo parsear."""
+    texto = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    try:
+        buf = texto.read(chunk)
+        i = 0
+        while i < len(buf) and buf[i].isspace():
+            i += 1
+        if i < len(buf) and buf[i] == "[":
+            yield from _iter_array(texto, buf, i + 1, chunk)
+        else:
+            yield from _iter_ndjson(texto, buf[i:])
+    finally:
+        texto.detach()  # no cerrar el archivo subido al terminar
+
+
+def _iter_array(texto, buf: str, i: int, chunk: int):
+    dec = json.JSONDecoder()
+    fila = 0
+    eof = False
+    while True:
+        while True:
+            while i < len(buf) and (buf[i].isspace() or buf[i] == ","):
+                i += 1
+            if i < len(buf) or eof:
+                break
+            buf, i = texto.read(chunk), 0
+            eof = not buf
+        if i >= len(buf):
+            raise ValueError("JSON incompleto: falta ']'")
+        if buf[i] == "]":
+            return
+        try:
+            obj, fin = dec.raw_decode(buf, i)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"JSON inválido cerca de la fila {fila + 1}: {e.msg}")
+            mas = texto.read(chunk)
+            eof = not mas
+            buf, i = buf[i:] + mas, 0
+            continue
+        fila += 1
+        yield fila, obj, None
+        i = fin
+
+
+def _iter_ndjson(texto, inicio: str):
+    fila = 0
+    for linea in _lineas(texto, inicio):
+        if not linea.strip():
+            continue
+        fila += 1
+        try:
+            yield fila, json.loads(linea), None
+        except json.JSONDecodeError as e:
+            yield fila, None, f"JSON inválido: {e.msg}"
+
+
+def _lineas(texto, inicio: str):
+    """Líneas completas, uniendo el bloque ya leído con el resto del archivo."""
+    resto = ""
+    for linea in itertools.chain(inicio.splitlines(keepends=True), texto):
+        resto += linea
+        if resto.endswith("\n"):
+            yield resto
+            resto = ""
+    if resto:
+        yield resto
+
+
+def validar_lote(registros: List[Tuple[int, Dict]]) -> Tuple[pd.DataFrame, List[Tuple[int, str]]]:
+    """Valida y convierte un lote por columnas (pandas), no dict por dict."""
+    filas = [f for f, _ in registros]
+    df = pd.DataFrame.from_records([r for _, r in registros], index=filas)
+    errores: List[Tuple[int, str]] = []
+    malas = pd.Series(False, index=df.index)
+
+    ids = pd.to_numeric(df["id"], errors="coerce") if "id" in df else pd.Series(np.nan, index=df.index)
+    crudos = df["id"] if "id" in df else ids
+    sin_id = crudos.isna()
+    ids = ids.where(~sin_id, pd.Series(df.index, index=df.index, dtype="float64"))
+    malo = ids.isna() | (ids % 1 != 0)
+    for f in df.index[malo & ~malas]:
+        errores.append((int(f), f"id inválido: {crudos[f]!r}"))
+    malas |= malo
+
+    out = pd.DataFrame(index=df.index)
+    out["id"] = ids
+    for c in NUMERICAS:
+        if c not in df:
+            out[c] = DEFAULTS[c]
+            continue
+        crudo = df[c]
+        num = pd.to_numeric(crudo, errors="coerce")
+        malo = num.isna() & crudo.notna()
+        for f in df.index[malo & ~malas]:
+            errores.append((int(f), f"{c} no numérico: {crudo[f]!r}"))
+        malas |= malo
+        out[c] = num.fillna(DEFAULTS[c])
+    for c in BOOLEANAS:
+        if c not in df:
+            out[c] = DEFAULTS[c]
+            continue
+        col = df[c]
+        es_texto = col.map(lambda v: isinstance(v, str))
+        out[c] = col.where(~es_texto, col.astype(str).str.strip().str.lower().isin(_VERDADEROS))
+        out[c] = out[c].fillna(DEFAULTS[c]).astype(bool)
+    for c in TEXTOS:
+        out[c] = df[c].fillna(DEFAULTS[c]).astype(str) if c in df else DEFAULTS[c]
+    if "image_b64" in df:
+        out["image_b64"] = df["image_b64"].fillna("").astype(str)
+
+    out = out[~malas]
+    out["id"] = out["id"].astype(np.int64)
+    out["stock"] = out["stock"].astype(np.int64)
+    return out, errores
+
+
+def importar(stream: BinaryIO, migrar_imagen: Callable[[str], str] | None = None,
+             progreso: Progreso | None = None, lote: int = LOTE_FILAS,
+             hash_previo: str | None = None, tamano: int | None = None) -> ResultadoImport:
+    """Parsea por bloques, valida por lotes y acumula errores por fila sin abortar.
+    `tamano` evita medir el stream (p. ej. un miembro comprimido de un zip)."""
+    res = ResultadoImport(hash=hash_previo or hash_stream(stream))
+    stream.seek(0)
+    total = flujos.tamano(stream) if tamano is None else tamano
+    vistos: set = set()
+    pendientes: List[Tuple[int, Dict]] = []
+    lotes: List[pd.DataFrame] = []
+
+    def volcar():
+        df, errs = validar_lote(pendientes)
+        res.errores.extend(errs)
+        dup = df["id"].duplicated() | df["id"].isin(vistos)
+        for f in df.index[dup]:
+            res.errores.append((int(f), f"id duplicado: {df.at[f, 'id']}"))
+        df = df[~dup]
+        vistos.update(df["id"].tolist())
+        if "image_b64" in df:
+            # Las imágenes embebidas pasan al almacén; el ítem guarda solo su hash
+            b64 = df.pop("image_b64")
+            con_img = b64 != ""
+            if migrar_imagen is not None and con_img.any():
+                df.loc[con_img, "image_hash"] = b64[con_img].map(migrar_imagen)
+        lotes.append(df[COLUMNAS])
+        pendientes.clear()
+        if progreso is not None:
+            progreso(res.filas, stream.tell(), total)
+
+    for fila, obj, err in iter_registros(stream):
+        res.filas = fila
+        if err is not None:
+            res.errores.append((fila, err))
+        elif not isinstance(obj, dict):
+            res.errores.append((fila, "no es un objeto"))
+        else:
+            pendientes.append((fila, obj))
+        if len(pendientes) >= lote:
+            volcar()
+    if pendientes:
+        volcar()
+    if lotes:
+        res.frame = pd.concat(lotes).reset_index(drop=True)
+    res.errores.sort()
+    return res
+
+
+def importar_zip(stream: BinaryIO, guardar_imagen: Callable[[bytes], str],
+                 progreso: Progreso | None = None, lote: int = LOTE_FILAS) -> ResultadoImport:
+    """Importa un bundle de exportar_zip: primero las imágenes, luego el NDJSON,
+    que se descomprime y parsea por bloques directamente desde el zip."""
+    h = hash_stream(stream)
+    with zipfile.ZipFile(stream) as zf:
+        for info in zf.infolist():
+            if info.filename.startswith(DIR_IMAGENES) and not info.is_dir():
+                guardar_imagen(zf.read(info))
+        info = zf.getinfo(ARCHIVO_META)
+        with zf.open(info) as meta:
+            res = importar(meta, progreso=progreso, lote=lote, hash_previo=h, tamano=info.file_size)
+    return res
+
+
+# =========================
+# Exportación perezosa en streaming
+# =========================
+SPOOL_BYTES = 32 * 1024 * 1024
+
+
+def iter_ndjson(bloques: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """Una línea JSON por ítem, codificada bloque a bloque."""
+    for bloque in bloques:
+        yield "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in bloque).encode("utf-8")
+
+
+def iter_json(bloques: Iterable[List[Dict]], imagen_b64: Callable[[str], str]) -> Iterator[bytes]:
+    """JSON array compatible con versiones anteriores (imágenes embebidas en base64)."""
+    yield b"["
+    primero = True
+    for bloque in bloques:
+        partes = []
+        for r in bloque:
+            r = dict(r)
+            h = r.pop("image_hash")
+            r["image_b64"] = imagen_b64(h) if h else ""
+            partes.append(json.dumps(r, ensure_ascii=False))
+        if partes:
+            yield (("" if primero else ",") + "\n" + ",\n".join(partes)).encode("utf-8")
+            primero = False
+    yield b"\n]\n"
+
+
+def a_archivo(chunks: Iterable[bytes]) -> BinaryIO:
+    """Vuelca los bloques a un archivo temporal (en memoria hasta SPOOL_BYTES) y lo rebobina."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    for c in chunks:
+        out.write(c)
+    out.seek(0)
+    return out
+
+
+def exportar_ndjson(store: CatalogStore) -> BinaryIO:
+    return a_archivo(iter_ndjson(store.iter_records()))
+
+
+def exportar_json(store: CatalogStore, imagen_b64: Callable[[str], str]) -> BinaryIO:
+    return a_archivo(iter_json(store.iter_records(), imagen_b64))
+
+
+def exportar_zip(store: CatalogStore, ruta_imagen: Callable[[str], str]) -> BinaryIO:
+    """Zip con catalogo.ndjson + imagenes/<hash> (cada original una sola vez)."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    vistas: set = set()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(ARCHIVO_META, "w") as meta:
+            for bloque in store.iter_records():
+                for chunk in iter_ndjson([bloque]):
+                    meta.write(chunk)
+                vistas.update(r["image_hash"] for r in bloque if r["image_hash"])
+        for h in sorted(vistas):
+            try:
+                # JPEG/PNG ya vienen comprimidos: se guardan sin recomprimir
+                zf.write(ruta_imagen(h), DIR_IMAGENES + h, compress_type=zipfile.ZIP_STORED)
+            except OSError:
+                continue
+    out.seek(0)
+    return out
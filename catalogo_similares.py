@@ -0,0 +1,109 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# "Productos similares": vecinos más cercanos sobre una matriz de features
+# =========================
+NUMERICAS = ("precio", "rating", "stock")
+ONE_HOT = ("marca", "categoría", "acabado")
+FLAGS = ("cruelty_free", "vegano")
+# Peso de cada bloque en la distancia (la categoría pesa más que la marca, etc.)
+PESOS = {"precio": 1.0, "rating": 1.0, "stock": 0.5,
+         "marca": 0.7, "categoría": 1.2, "acabado": 0.6, "cruelty_free": 0.3, "vegano": 0.3}
+
+# Por encima de este tamaño se usa un índice IVF (k-means grueso) en vez de fuerza bruta.
+UMBRAL_IVF = 50_000
+
+
+def matriz_features(df: pd.DataFrame) -> np.ndarray:
+    """Una fila por producto: numéricas min-max, one-hot de facetas y flags (float32)."""
+    bloques = []
+    for c in NUMERICAS:
+        v = df[c].to_numpy(dtype=np.float32)
+        if len(v):
+            v = (v - v.min()) / (float(v.max() - v.min()) or 1.0)
+        bloques.append((v * PESOS[c])[:, None])
+    for c in ONE_HOT:
+        codes = pd.Categorical(df[c]).codes
+        oh = np.zeros((len(df), int(codes.max()) + 1 if len(codes) else 0), dtype=np.float32)
+        oh[np.arange(len(df)), codes] = PESOS[c]
+        bloques.append(oh)
+    for c in FLAGS:
+        bloques.append(df[c].to_numpy(dtype=np.float32)[:, None] * PESOS[c])
+    return np.hstack(bloques).astype(np.float32)
+
+
+def _kmeans(X: np.ndarray, k: int, iters: int = 8, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    muestra = X[rng.choice(len(X), size=min(len(X), k * 40), replace=False)]
+    cent = muestra[rng.choice(len(muestra), size=k, replace=False)].copy()
+    for _ in range(iters):
+        asig = _mas_cercano(muestra, cent)
+        for j in range(k):
+            m = asig == j
+            if m.any():
+                cent[j] = muestra[m].mean(axis=0)
+    return cent, _mas_cercano(X, cent)
+
+
+def _mas_cercano(X: np.ndarray, C: np.ndarray, lote: int = 65536) -> np.ndarray:
+    out = np.empty(len(X), dtype=np.int32)
+    c2 = (C * C).sum(axis=1)
+    for i in range(0, len(X), lote):
+        B = X[i:i + lote]
+        out[i:i + lote] = np.argmin(c2[None, :] - 2 * B @ C.T, axis=1)
+    return out
+
+
+class SimilarIndex:
+    """Vecinos por distancia euclídea al cuadrado, calculada en bloque con NumPy.
+    Con catálogos grandes agrupa en listas (IVF) y solo revisa las más cercanas."""
+
+    def __init__(self, df: pd.DataFrame, version: int = 0, nprobe: int = 4):
+        self.version = version
+        self.ids = df["id"].to_numpy(dtype=np.int64)
+        self.pos = {int(i): p for p, i in enumerate(self.ids)}
+        self.X = matriz_features(df)
+        self.n2 = (self.X * self.X).sum(axis=1)
+        self.nprobe = nprobe
+        self.listas: List[np.ndarray] | None = None
+        if len(self.ids) > UMBRAL_IVF:
+            k = int(np.sqrt(len(self.ids)))
+            self.centroides, asig = _kmeans(self.X, k)
+            orden = np.argsort(asig, kind="stable")
+            cortes = np.searchsorted(asig[orden], np.arange(k + 1))
+            self.listas = [orden[cortes[j]:cortes[j + 1]] for j in range(k)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _candidatos(self, x: np.ndarray) -> np.ndarray | None:
+        if self.listas is None:
+            return None
+        d = (self.centroides * self.centroides).sum(axis=1) - 2 * self.centroides @ x
+        cerca = np.argsort(d)[:self.nprobe]
+        return np.concatenate([self.listas[j] for j in cerca])
+
+    def vecinos(self, item_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        """Los k productos más parecidos a item_id (sin incluirlo), con su distancia."""
+        p = self.pos.get(int(item_id))
+        if p is None:
+            return []
+        x = self.X[p]
+        cand = self._candidatos(x)
+        if cand is None:
+            d = self.n2 + self.n2[p] - 2 * (self.X @ x)
+            idx = np.arange(len(d))
+        else:
+            d = self.n2[cand] + self.n2[p] - 2 * (self.X[cand] @ x)
+            idx = cand
+        d = d.copy()
+        d[idx == p] = np.inf
+        k = min(k, len(d) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(d, k - 1)[:k]
+        top = top[np.argsort(d[top])]
+        return [(int(self.ids[idx[t]]), float(max(d[t], 0.0)) ** 0.5) for t in top]
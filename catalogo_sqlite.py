@@ -0,0 +1,365 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from catalogo_agregados import Resumen
+from catalogo_busqueda import distancia, tokenizar
+from catalogo_store import CATEGORICAS, COLUMNAS, DEFAULTS
+from sqlite_pool import Pool
+
+# =========================
+# Catálogo compartido en SQLite (WAL + pool de conexiones)
+# =========================
+FACETAS = ("marca", "categoría", "acabado")
+ORDENABLES = ("precio", "rating", "stock")
+BOOLEANAS = ("cruelty_free", "vegano")
+# Mismos pesos que CAMPOS en catalogo_busqueda (nombre, marca, tono) para bm25
+PESOS_FTS = (3.0, 2.0, 1.0)
+
+_SEL = ", ".join(f'"{c}"' for c in COLUMNAS)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    "id" INTEGER PRIMARY KEY,
+    "nombre" TEXT, "marca" TEXT, "categoría" TEXT, "acabado" TEXT, "tono" TEXT,
+    "precio" REAL, "rating" REAL, "cruelty_free" INTEGER, "vegano" INTEGER, "stock" INTEGER,
+    "descripcion" TEXT, "image_url" TEXT, "image_hash" TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_marca ON productos("marca", "precio");
+CREATE INDEX IF NOT EXISTS ix_categoria ON productos("categoría", "precio");
+CREATE INDEX IF NOT EXISTS ix_precio ON productos("precio");
+CREATE INDEX IF NOT EXISTS ix_rating ON productos("rating");
+CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+    "nombre", "marca", "tono", content='productos', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS productos_vocab USING fts5vocab(productos_fts, 'row');
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+"""
+
+
+def _registro(fila: Tuple) -> Dict:
+    out = dict(zip(COLUMNAS, fila))
+    for c in BOOLEANAS:
+        out[c] = bool(out[c])
+    return out
+
+
+def _tipar(df: pd.DataFrame) -> pd.DataFrame:
+    """Mismos tipos que CatalogStore.view (booleanos y categorías para las facetas)."""
+    for c in BOOLEANAS:
+        df[c] = df[c].astype(bool)
+    for c in CATEGORICAS:
+        df[c] = df[c].astype("category")
+    return df
+
+
+class SQLiteCatalog:
+    """Catálogo persistente compartido por todas las sesiones del proceso.
+    Expone la misma API que CatalogStore (get/insert/update/delete/rows/…) y además
+    consultas indexadas para filtros, conteos por faceta, búsqueda (FTS5) y resúmenes,
+    de modo que cada sesión solo guarda ids y no una copia del catálogo."""
+
+    def __init__(self, ruta: str, semilla: Iterable[Dict] = (), conexiones: int = 4):
+        self.pool = Pool(ruta, conexiones)
+        self._lock = threading.Lock()
+        self._cache: Dict[tuple, object] = {}    # derivados por versión (vista, opciones, vocabulario)
+        self._cache_version = -1
+        self._en_curso: Dict[tuple, threading.Event] = {}   # (versión, clave) que otro hilo está armando
+        with self.pool.conexion() as con:
+            con.executescript(ESQUEMA)
+            self._version = con.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0]
+        if not len(self):
+            self.replace_all(semilla)
+
+    # ---------- versión y cachés ----------
+    @property
+    def version(self) -> int:
+        """Contador global: cambia con cualquier escritura de cualquier sesión del proceso.
+        Se lee de memoria (las cachés lo consultan varias veces por rerun); la base lo
+        guarda para que siga creciendo entre reinicios."""
+        return self._version
+
+    @staticmethod
+    def _tocar(con: sqlite3.Connection) -> int:
+        """Sube la versión dentro de la transacción; devuelve la nueva para _publicar."""
+        return con.execute("UPDATE meta SET valor = valor + 1 WHERE clave = 'version' RETURNING valor").fetchone()[0]
+
+    def _publicar(self, version: int) -> None:
+        """Tras el commit: la versión en memoria pasa a la escrita (nunca retrocede)."""
+        with self._lock:
+            self._version = max(self._version, version)
+
+    def _derivado(self, key: tuple, build):
+        """Valor derivado por versión. `build` corre fuera del lock (necesita una conexión
+        del pool); si otro hilo ya lo está armando, se espera a ese en vez de repetirlo."""
+        version = self.version
+        with self._lock:
+            if self._cache_version != version:
+                self._cache.clear()
+                self._cache_version = version
+            if key in self._cache:
+                return self._cache[key]
+            evento = self._en_curso.get((version, key))
+            propio = evento is None
+            if propio:
+                evento = self._en_curso[(version, key)] = threading.Event()
+        if not propio:
+            evento.wait(self.pool.timeout)
+            with self._lock:
+                if self._cache_version == version and key in self._cache:
+                    return self._cache[key]
+            return build()   # el otro hilo falló o la versión ya avanzó
+        try:
+            valor = build()
+            with self._lock:
+                if self._cache_version == version:
+                    self._cache[key] = valor
+            return valor
+        finally:
+            with self._lock:
+                self._en_curso.pop((version, key), None)
+            evento.set()
+
+    # ---------- API compatible con CatalogStore ----------
+    def __len__(self) -> int:
+        with self.pool.conexion() as con:
+            return con.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+
+    def __contains__(self, item_id) -> bool:
+        with self.pool.conexion() as con:
+            return con.execute("SELECT 1 FROM productos WHERE id = ?", (int(item_id),)).fetchone() is not None
+
+    def ids(self) -> np.ndarray:
+        return self.orden()
+
+    def next_id(self) -> int:
+        with self.pool.conexion() as con:
+            return con.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM productos").fetchone()[0]
+
+    def get(self, item_id) -> Dict | None:
+        with self.pool.conexion() as con:
+            fila = con.execute(f"SELECT {_SEL} FROM productos WHERE id = ?", (int(item_id),)).fetchone()
+        return _registro(fila) if fila else None
+
+    @staticmethod
+    def _fts(con: sqlite3.Connection, item_id: int, viejo: Dict | None, nuevo: Dict | None) -> None:
+        # Tabla FTS con contenido externo: hay que borrar con los valores anteriores
+        if viejo is not None:
+            con.execute("INSERT INTO productos_fts(productos_fts, rowid, nombre, marca, tono) VALUES ('delete', ?, ?, ?, ?)",
+                        (item_id, viejo["nombre"], viejo["marca"], viejo["tono"]))
+        if nuevo is not None:
+            con.execute("INSERT INTO productos_fts(rowid, nombre, marca, tono) VALUES (?, ?, ?, ?)",
+                        (item_id, nuevo["nombre"], nuevo["marca"], nuevo["tono"]))
+
+    def insert(self, item: Dict) -> int:
+        """Alta atómica; sin id, SQLite asigna el siguiente (sin carreras entre sesiones)."""
+        fila = {**DEFAULTS, **item}
+        fila["id"] = int(item["id"]) if item.get("id") else None
+        try:
+            with self.pool.transaccion() as con:
+                cur = con.execute(f"INSERT INTO productos ({_SEL}) VALUES ({', '.join('?' * len(COLUMNAS))})",
+                                  [fila[c] for c in COLUMNAS])
+                item_id = cur.lastrowid
+                self._fts(con, item_id, None, fila)
+                version = self._tocar(con)
+        except sqlite3.IntegrityError:
+            raise KeyError(f"id duplicado: {fila['id']}")
+        self._publicar(version)
+        return item_id
+
+    def update(self, item_id, cambios: Dict) -> None:
+        cambios = {c: v for c, v in cambios.items() if c in COLUMNAS and c != "id"}
+        with self.pool.transaccion() as con:
+            fila = con.execute(f"SELECT {_SEL} FROM productos WHERE id = ?", (int(item_id),)).fetchone()
+            if fila is None:
+                raise KeyError(item_id)
+            viejo = _registro(fila)
+            if cambios:
+                asignaciones = ", ".join(f'"{c}" = ?' for c in cambios)
+                con.execute(f"UPDATE productos SET {asignaciones} WHERE id = ?", [*cambios.values(), int(item_id)])
+                self._fts(con, int(item_id), viejo, {**viejo, **cambios})
+            version = self._tocar(con)
+        self._publicar(version)
+
+    def delete(self, item_id) -> None:
+        with self.pool.transaccion() as con:
+            fila = con.execute(f"SELECT {_SEL} FROM productos WHERE id = ?", (int(item_id),)).fetchone()
+            if fila is None:
+                return
+            self._fts(con, int(item_id), _registro(fila), None)
+            con.execute("DELETE FROM productos WHERE id = ?", (int(item_id),))
+            version = self._tocar(con)
+        self._publicar(version)
+
+    def replace_all(self, items: Iterable[Dict]) -> None:
+        items = list(items)
+        self._cargar(((int(it.get("id") or i), *(it.get(c, DEFAULTS[c]) for c in COLUMNAS[1:]))
+                      for i, it in enumerate(items, start=1)))
+
+    def replace_frame(self, df: pd.DataFrame) -> None:
+        # tolist() convierte a tipos de Python (sqlite3 no acepta escalares numpy)
+        self._cargar(zip(*(df[c].tolist() for c in COLUMNAS)))
+
+    def _cargar(self, filas: Iterable[Tuple]) -> None:
+        """Reemplazo masivo en una transacción; el índice FTS se reconstruye una sola vez."""
+        try:
+            with self.pool.transaccion() as con:
+                con.execute("DELETE FROM productos")
+                con.executemany(f"INSERT INTO productos ({_SEL}) VALUES ({', '.join('?' * len(COLUMNAS))})", filas)
+                con.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+                version = self._tocar(con)
+        except sqlite3.IntegrityError:
+            raise KeyError("ids duplicados en el catálogo")
+        self._publicar(version)
+
+    def view(self) -> pd.DataFrame:
+        """Catálogo completo como DataFrame; uno por versión para todo el proceso (solo lectura)."""
+        return self._derivado(("vista",), lambda: self.frame())
+
+    def frame(self, ids: Iterable[int] | None = None) -> pd.DataFrame:
+        sql = f"SELECT {_SEL} FROM productos"
+        params: list = []
+        if ids is not None:
+            sql += " WHERE id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(i) for i in ids]))
+        with self.pool.conexion() as con:
+            df = pd.read_sql_query(sql + " ORDER BY id", con, params=params)
+        return _tipar(df[COLUMNAS])
+
+    def iter_records(self, lote: int = 1000) -> Iterator[List[Dict]]:
+        with self.pool.conexion() as con:
+            cur = con.execute(f"SELECT {_SEL} FROM productos ORDER BY id")
+            while True:
+                filas = cur.fetchmany(lote)
+                if not filas:
+                    return
+                yield [_registro(f) for f in filas]
+
+    def orden(self, col: str | None = None, desc: bool = False) -> np.ndarray:
+        orden = f'"{col}" {"DESC" if desc else "ASC"}, id' if col in ORDENABLES else "id"
+        with self.pool.conexion() as con:
+            ids = [r[0] for r in con.execute(f"SELECT id FROM productos ORDER BY {orden}")]
+        return np.asarray(ids, dtype=np.int64)
+
+    def rows(self, ids: Iterable[int]) -> List[Dict]:
+        """Filas pedidas por clave primaria, en el orden recibido."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return []
+        with self.pool.conexion() as con:
+            filas = con.execute(f"SELECT {_SEL} FROM productos WHERE id IN (SELECT value FROM json_each(?))",
+                                (json.dumps(ids),)).fetchall()
+        por_id = {f[0]: _registro(f) for f in filas}
+        return [por_id[i] for i in ids if i in por_id]
+
+    def nombres(self, ids: Iterable[int]) -> Dict[int, str]:
+        """id -> nombre de los ids pedidos que existen, en una sola consulta."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        with self.pool.conexion() as con:
+            return dict(con.execute("SELECT id, nombre FROM productos WHERE id IN (SELECT value FROM json_each(?))",
+                                    (json.dumps(ids),)).fetchall())
+
+    def to_records(self) -> List[Dict]:
+        return [r for bloque in self.iter_records() for r in bloque]
+
+    def close(self) -> None:
+        self.pool.close()
+
+    # ---------- consultas indexadas ----------
+    def opciones(self, faceta: str) -> List[str]:
+        def build():
+            with self.pool.conexion() as con:
+                return [r[0] for r in con.execute(f'SELECT DISTINCT "{faceta}" FROM productos ORDER BY 1')]
+        return self._derivado(("opciones", faceta), build)
+
+    def precio_max(self) -> float:
+        def build():
+            with self.pool.conexion() as con:
+                return float(con.execute("SELECT COALESCE(MAX(precio), 0) FROM productos").fetchone()[0])
+        return self._derivado(("precio_max",), build)
+
+    def _vocabulario(self) -> List[str]:
+        def build():
+            with self.pool.conexion() as con:
+                return [r[0] for r in con.execute("SELECT term FROM productos_vocab")]
+        return self._derivado(("vocab",), build)
+
+    def _match(self, q: str) -> str | None:
+        """Consulta FTS5: cada término por prefijo o, desde 4 letras, con 1–2 errores de tipeo."""
+        grupos = []
+        for term in tokenizar(q):
+            alternativas = [f'"{term}"*']
+            if len(term) >= 4:
+                tope = 1 if len(term) <= 6 else 2
+                alternativas += [f'"{t}"' for t in self._vocabulario()
+                                 if abs(len(t) - len(term)) <= tope and not t.startswith(term)
+                                 and distancia(term, t, tope) <= tope]
+            grupos.append("(" + " OR ".join(alternativas) + ")")
+        return " AND ".join(grupos) or None
+
+    def _where(self, q: str, filtros: Dict[str, Iterable], precio_max: float | None,
+               omitir: str | None = None) -> Tuple[str, str, list]:
+        """(JOIN, WHERE, parámetros) para los filtros actuales; `omitir` deja fuera una faceta."""
+        join, conds, params = "", [], []
+        match = self._match(q) if q else None
+        if q:
+            join = ("JOIN (SELECT rowid, bm25(productos_fts, %s) AS rango FROM productos_fts "
+                    "WHERE productos_fts MATCH ?) f ON f.rowid = p.id" % ", ".join(map(str, PESOS_FTS)))
+            params.append(match or '""')
+        for f, sel in filtros.items():
+            if f == omitir:
+                continue
+            sel = list(sel)
+            conds.append(f'p."{f}" IN ({", ".join("?" * len(sel))})' if sel else "0")
+            params.extend(sel)
+        if precio_max is not None:
+            conds.append("p.precio <= ?")
+            params.append(float(precio_max))
+        return join, ("WHERE " + " AND ".join(conds)) if conds else "", params
+
+    def consultar(self, q: str, filtros: Dict[str, Iterable], precio_max: float | None = None,
+                  col: str | None = None, desc: bool = False) -> np.ndarray:
+        """Ids que cumplen los filtros, ordenados por `col` o, con búsqueda, por relevancia."""
+        join, where, params = self._where(q, filtros, precio_max)
+        if col in ORDENABLES:
+            orden = f'p."{col}" {"DESC" if desc else "ASC"}, p.id'
+        else:
+            orden = "f.rango, p.id" if q else "p.id"
+        with self.pool.conexion() as con:
+            ids = [r[0] for r in con.execute(f"SELECT p.id FROM productos p {join} {where} ORDER BY {orden}", params)]
+        return np.asarray(ids, dtype=np.int64)
+
+    def conteos(self, q: str, filtros: Dict[str, Iterable], precio_max: float | None = None) -> Dict[str, Dict[str, int]]:
+        """Para cada faceta, cuántos ítems mostraría cada valor con el resto de filtros activos."""
+        # Lo que usa caché derivada (y toma su propia conexión) se resuelve antes de tomar
+        # la conexión de las consultas: nunca se retiene una mientras se espera otra.
+        consultas = {f: self._where(q, filtros, precio_max, omitir=f) for f in FACETAS}
+        opciones = {f: self.opciones(f) for f in FACETAS}
+        out: Dict[str, Dict[str, int]] = {}
+        with self.pool.conexion() as con:
+            for f, (join, where, params) in consultas.items():
+                n = dict(con.execute(f'SELECT p."{f}", COUNT(*) FROM productos p {join} {where} GROUP BY 1', params))
+                out[f] = {v: n.get(v, 0) for v in opciones[f]}
+        return out
+
+    def resumen(self, q: str, filtros: Dict[str, Iterable], precio_max: float | None = None) -> Resumen:
+        """Métricas e Insights calculados en SQLite sin traer las filas."""
+        join, where, params = self._where(q, filtros, precio_max)
+        desde = f"FROM productos p {join} {where}"
+        with self.pool.conexion() as con:
+            n, precio, rating, stock = con.execute(
+                f"SELECT COUNT(*), AVG(p.precio), AVG(p.rating), COALESCE(SUM(p.stock), 0) {desde}", params).fetchone()
+            por_cat = pd.read_sql_query(
+                f'SELECT p."categoría" AS "categoría", COUNT(*) AS "count" {desde} GROUP BY 1 ORDER BY 1', con, params=params)
+            precio_marca = pd.read_sql_query(
+                f"SELECT p.marca AS marca, AVG(p.precio) AS precio {desde} GROUP BY 1 ORDER BY 1", con, params=params)
+        return Resumen(n=n, precio_prom=precio, rating_prom=rating, stock_total=int(stock),
+                       por_categoria=por_cat, precio_marca=precio_marca)
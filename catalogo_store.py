@@ -0,0 +1,299 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# Repositorio columnar del catálogo
+# =========================
+COLUMNAS: List[str] = [
+    "id","nombre","marca","categoría","acabado","tono","precio","rating",
+    "cruelty_free","vegano","stock","descripcion","image_url","image_hash"
+]
+CATEGORICAS = ("marca", "categoría", "acabado")
+TIPOS: Dict[str, object] = {
+    "id": np.int64, "precio": np.float64, "rating": np.float64, "stock": np.int64,
+    "cruelty_free": np.bool_, "vegano": np.bool_,
+}
+DEFAULTS: Dict[str, object] = {
+    "nombre": "Producto", "marca": "Marca", "categoría": "Rostro", "acabado": "Mate", "tono": "Rosa",
+    "precio": 0.0, "rating": 0.0, "cruelty_free": False, "vegano": False, "stock": 0,
+    "descripcion": "", "image_url": "", "image_hash": "",
+}
+
+
+class CatalogStore:
+    """Catálogo guardado por columnas (arreglos numpy con capacidad creciente).
+    Búsqueda por id en O(1), altas/ediciones/bajas en sitio y una vista DataFrame
+    de solo lectura que se reutiliza mientras el catálogo no cambie."""
+
+    def __init__(self, items: Iterable[Dict] = ()):
+        self.replace_all(items)
+
+    # ---------- estructura ----------
+    def _nuevo(self, capacidad: int) -> None:
+        self.cap = max(capacidad, 16)
+        self.n = 0                                   # slots usados (vivos + borrados)
+        self.cols: Dict[str, np.ndarray] = {
+            c: np.zeros(self.cap, dtype=TIPOS.get(c, object)) for c in COLUMNAS if c not in CATEGORICAS
+        }
+        for c in CATEGORICAS:
+            self.cols[c] = np.zeros(self.cap, dtype=np.int32)   # códigos
+        self.categorias: Dict[str, List[str]] = {c: [] for c in CATEGORICAS}
+        self.codigos: Dict[str, Dict[str, int]] = {c: {} for c in CATEGORICAS}
+        self.alive = np.zeros(self.cap, dtype=bool)
+        self.pos: Dict[int, int] = {}                # id -> slot
+        self.max_id = 0
+        self.version = getattr(self, "version", 0)   # monótona también entre recargas
+        self._tocados: "OrderedDict[int, int]" = OrderedDict()   # id -> última versión que lo cambió
+        self._recarga = self.version                 # versión de la última carga completa
+        self._vista: pd.DataFrame | None = None
+        self._vista_version = -1
+        self._ordenes: Dict[tuple, np.ndarray] = {}
+        self._ordenes_version = -1
+
+    def _crecer(self) -> None:
+        self.cap *= 2
+        for c, arr in self.cols.items():
+            nuevo = np.zeros(self.cap, dtype=arr.dtype)
+            nuevo[:self.n] = arr[:self.n]
+            self.cols[c] = nuevo
+        alive = np.zeros(self.cap, dtype=bool)
+        alive[:self.n] = self.alive[:self.n]
+        self.alive = alive
+
+    def _codigo(self, col: str, valor) -> int:
+        valor = str(valor)
+        code = self.codigos[col].get(valor)
+        if code is None:
+            code = len(self.categorias[col])
+            self.categorias[col].append(valor)
+            self.codigos[col][valor] = code
+        return code
+
+    def _escribir(self, slot: int, item: Dict) -> None:
+        for c in COLUMNAS:
+            if c == "id" or c not in item:
+                continue
+            if c in CATEGORICAS:
+                self.cols[c][slot] = self._codigo(c, item[c])
+            else:
+                self.cols[c][slot] = item[c]
+
+    def _tocar(self, item_id: int | None = None) -> None:
+        self.version += 1
+        if item_id is not None:
+            self._tocados[item_id] = self.version
+            self._tocados.move_to_end(item_id)   # queda ordenado por versión
+
+    def _compactar(self) -> None:
+        """Reescribe los slots vivos de forma contigua (conserva el orden)."""
+        vivos = np.flatnonzero(self.alive[:self.n])
+        for c, arr in self.cols.items():
+            arr[:len(vivos)] = arr[vivos]
+        self.alive[:] = False
+        self.alive[:len(vivos)] = True
+        self.n = len(vivos)
+        self.pos = {int(i): s for s, i in enumerate(self.cols["id"][:self.n])}
+
+    # ---------- API ----------
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.pos
+
+    def ids(self) -> np.ndarray:
+        return self.cols["id"][:self.n][self.alive[:self.n]]
+
+    def next_id(self) -> int:
+        return self.max_id + 1
+
+    def get(self, item_id) -> Dict | None:
+        slot = self.pos.get(item_id)
+        if slot is None:
+            return None
+        out = {}
+        for c in COLUMNAS:
+            v = self.cols[c][slot]
+            if c in CATEGORICAS:
+                v = self.categorias[c][v]
+            elif isinstance(v, np.generic):
+                v = v.item()
+            out[c] = v
+        return out
+
+    def insert(self, item: Dict) -> int:
+        item_id = int(item.get("id") or self.next_id())
+        if item_id in self.pos:
+            raise KeyError(f"id duplicado: {item_id}")
+        if self.n == self.cap:
+            self._crecer()
+        slot = self.n
+        self.n += 1
+        self.cols["id"][slot] = item_id
+        self._escribir(slot, {**DEFAULTS, **item})
+        self.alive[slot] = True
+        self.pos[item_id] = slot
+        self.max_id = max(self.max_id, item_id)
+        self._tocar(item_id)
+        return item_id
+
+    def update(self, item_id, cambios: Dict) -> None:
+        self._escribir(self.pos[item_id], cambios)
+        self._tocar(int(item_id))
+
+    def delete(self, item_id) -> None:
+        slot = self.pos.pop(item_id, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        for c in ("nombre", "descripcion", "image_url"):
+            self.cols[c][slot] = None   # libera memoria de textos
+        self._tocar(int(item_id))
+        if self.n > 64 and len(self.pos) < self.n // 2:
+            self._compactar()
+
+    def replace_all(self, items: Iterable[Dict]) -> None:
+        """Carga masiva columna por columna (sin pasar por insert)."""
+        items = list(items)
+        columnas = {"id": [int(it.get("id") or i) for i, it in enumerate(items, start=1)]}
+        for c in COLUMNAS[1:]:
+            columnas[c] = [it.get(c, DEFAULTS[c]) for it in items]
+        self._cargar(columnas, len(items))
+
+    def replace_frame(self, df: pd.DataFrame) -> None:
+        """Carga masiva desde un DataFrame ya validado (p. ej. una importación)."""
+        self._cargar({c: df[c].to_numpy() for c in COLUMNAS}, len(df))
+
+    def _cargar(self, columnas: Dict[str, object], n: int) -> None:
+        self._nuevo(n * 2)
+        self._tocar()                                # también al vaciar
+        self._recarga = self.version
+        if not n:
+            return
+        ids = [int(i) for i in columnas["id"]]
+        self.pos = {item_id: slot for slot, item_id in enumerate(ids)}
+        if len(self.pos) != n:
+            raise KeyError("ids duplicados en el catálogo")
+        self.cols["id"][:n] = ids
+        for c in COLUMNAS[1:]:
+            valores = columnas[c]
+            if c in CATEGORICAS:
+                valores = [self._codigo(c, v) for v in valores]
+            self.cols[c][:n] = valores
+        self.alive[:n] = True
+        self.n = n
+        self.max_id = max(ids)
+
+    def view(self) -> pd.DataFrame:
+        """DataFrame de los ítems vivos (categorías para marca/categoría/acabado).
+        Se construye una vez por versión: trátalo como solo lectura."""
+        if self._vista_version != self.version:
+            m = self.alive[:self.n]
+            data = {}
+            for c in COLUMNAS:
+                col = self.cols[c][:self.n][m]
+                if c in CATEGORICAS:
+                    col = pd.Categorical.from_codes(col, categories=self.categorias[c])
+                data[c] = col
+            self._vista = pd.DataFrame(data, columns=COLUMNAS)
+            self._vista_version = self.version
+        return self._vista
+
+    def iter_records(self, lote: int = 1000) -> Iterator[List[Dict]]:
+        """Ítems vivos como dicts, por lotes y armados columna por columna."""
+        vivos = np.flatnonzero(self.alive[:self.n])
+        for i in range(0, len(vivos), lote):
+            slots = vivos[i:i + lote]
+            cols = []
+            for c in COLUMNAS:
+                col = self.cols[c][slots].tolist()
+                if c in CATEGORICAS:
+                    cats = self.categorias[c]
+                    col = [cats[k] for k in col]
+                cols.append(col)
+            yield [dict(zip(COLUMNAS, fila)) for fila in zip(*cols)]
+
+    def orden(self, col: str | None = None, desc: bool = False) -> np.ndarray:
+        """Ids vivos ordenados por `col` (None = orden de alta). Se calcula una vez
+        por versión y columna; luego paginar es solo recortar este arreglo."""
+        if self._ordenes_version != self.version:
+            self._ordenes.clear()
+            self._ordenes_version = self.version
+        key = (col, desc)
+        if key not in self._ordenes:
+            ids = self.ids()
+            if col is not None:
+                vals = self.cols[col][:self.n][self.alive[:self.n]]
+                idx = np.argsort(-vals if desc else vals, kind="stable")
+                ids = ids[idx]
+            self._ordenes[key] = ids
+        return self._ordenes[key]
+
+    def rows(self, ids: Iterable[int]) -> List[Dict]:
+        """Materializa solo los ítems pedidos (p. ej. la página visible)."""
+        return [self.get(int(i)) for i in ids]
+
+    def nombres(self, ids: Iterable[int]) -> Dict[int, str]:
+        """id -> nombre de los ids pedidos que existen (para etiquetas de selectores)."""
+        ids = [int(i) for i in ids if int(i) in self.pos]
+        return dict(zip(ids, self.cols["nombre"][[self.pos[i] for i in ids]].tolist()))
+
+    def to_records(self) -> List[Dict]:
+        return [r for bloque in self.iter_records(lote=max(len(self), 1)) for r in bloque]
+
+    def tuplas(self) -> Dict[int, tuple]:
+        """id -> valores en el orden de COLUMNAS (para instantáneas). Las imágenes
+        van por referencia: solo su image_hash."""
+        return self._tuplas(np.flatnonzero(self.alive[:self.n]))
+
+    def cambios_desde(self, version: int) -> Tuple[Dict[int, tuple], List[int]] | None:
+        """Lo que cambió después de `version`: (id -> tupla de las filas tocadas que
+        siguen vivas, ids borrados). None si hubo una carga completa desde entonces
+        (ahí no queda otra que tuplas())."""
+        if version < self._recarga:
+            return None
+        ids = []
+        for item_id in reversed(self._tocados):
+            if self._tocados[item_id] <= version:
+                break
+            ids.append(item_id)
+        vivos = [i for i in ids if i in self.pos]
+        return self._tuplas([self.pos[i] for i in vivos]), [i for i in ids if i not in self.pos]
+
+    def _tuplas(self, slots) -> Dict[int, tuple]:
+        cols = []
+        for c in COLUMNAS:
+            col = self.cols[c][slots].tolist()
+            if c in CATEGORICAS:
+                cats = self.categorias[c]
+                col = [cats[k] for k in col]
+            cols.append(col)
+        return dict(zip(cols[0], zip(*cols)))
+
+
+class Memo:
+    """LRU pequeño para resultados derivados del catálogo (gráficos, agregados).
+    La clave debe incluir la versión del store y el estado de los filtros."""
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, build: Callable[[], object]):
+        if key in self._data:
+            self._data.move_to_end(key)
+            return self._data[key]
+        val = build()
+        self._data[key] = val
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return val
+
+    def clear(self) -> None:
+        self._data.clear()
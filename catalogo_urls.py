@@ -0,0 +1,193 @@
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from catalogo_imagenes import IMG_DIR, ImageStore
+
+# =========================
+# Imágenes por URL: descarga en paralelo + caché HTTP en disco (ETag/TTL) + caché negativa
+# =========================
+URL_DIR = IMG_DIR.parent / "urls"
+TTL_OK = 24 * 3600          # sin Cache-Control, una imagen descargada vale un día
+TTL_FALLO = 10 * 60         # una URL rota no se reintenta antes de 10 min (se duplica por fallo)
+TTL_FALLO_MAX = 24 * 3600
+MAX_BYTES = 10 * 1024 * 1024
+USER_AGENT = "makeup-rosa/1.0"
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def clave_url(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class URLImageCache:
+    """Resuelve image_url -> hash del ImageStore (que genera las miniaturas).
+    Cada URL tiene una entrada en disco con ETag/Last-Modified y vencimiento;
+    los fallos también se guardan (caché negativa) para no reintentar en cada rerun.
+    Las descargas corren en un pool acotado de hilos (urllib es bloqueante)."""
+
+    def __init__(self, imagenes: ImageStore, root: Path = URL_DIR, conexiones: int = 8,
+                 timeout: float = 8.0, ttl: int = TTL_OK, ttl_fallo: int = TTL_FALLO):
+        self.imagenes = imagenes
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.ttl = ttl
+        self.ttl_fallo = ttl_fallo
+        self.conexiones = conexiones
+        self._pool = ThreadPoolExecutor(conexiones, thread_name_prefix="img-url")
+        self._entradas: Dict[str, Dict] = {}
+        self._en_curso: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    # ---------- entradas ----------
+    def _ruta(self, url: str) -> Path:
+        return self.root / f"{clave_url(url)}.json"
+
+    def entrada(self, url: str) -> Dict | None:
+        with self._lock:
+            e = self._entradas.get(url)
+        if e is None:
+            try:
+                e = json.loads(self._ruta(url).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._entradas[url] = e
+        return e
+
+    def _guardar(self, url: str, e: Dict) -> None:
+        ruta = self._ruta(url)
+        tmp = ruta.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+        tmp.write_text(json.dumps(e), encoding="utf-8")
+        os.replace(tmp, ruta)
+        with self._lock:
+            self._entradas[url] = e
+
+    def vigente(self, url: str) -> bool:
+        e = self.entrada(url)
+        return e is not None and e["expira"] > time.time()
+
+    # ---------- descarga ----------
+    def _descargar(self, url: str, previa: Dict | None) -> Dict:
+        """Corre en el pool de hilos: GET condicional y alta en el ImageStore."""
+        ahora = time.time()
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        if previa and previa.get("hash"):
+            if previa.get("etag"):
+                req.add_header("If-None-Match", previa["etag"])
+            if previa.get("last_modified"):
+                req.add_header("If-Modified-Since", previa["last_modified"])
+        try:
+            if not url.lower().startswith(("http://", "https://")):
+                raise ValueError("solo se admiten URLs http(s)")
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                largo = resp.headers.get("Content-Length")
+                if largo and largo.isdigit() and int(largo) > MAX_BYTES:
+                    raise ValueError("imagen demasiado grande")
+                data = resp.read(MAX_BYTES + 1)   # nunca más del tope, aunque el servidor mienta
+                if len(data) > MAX_BYTES:
+                    raise ValueError("imagen demasiado grande")
+                h = self.imagenes.put_file(io.BytesIO(data))
+                if not h:
+                    raise ValueError("el contenido no es una imagen")
+                return self._ok(h, resp.headers, ahora)
+        except urllib.error.HTTPError as err:
+            if err.code == 304 and previa:
+                return self._ok(previa["hash"], err.headers, ahora, previa)
+            return self._fallo(f"HTTP {err.code}", previa, ahora)
+        except Exception as err:
+            return self._fallo(str(getattr(err, "reason", err)), previa, ahora)
+
+    def _ok(self, h: str, headers, ahora: float, previa: Dict | None = None) -> Dict:
+        m = _MAX_AGE_RE.search(headers.get("Cache-Control", "") or "")
+        ttl = int(m.group(1)) if m else self.ttl
+        previa = previa or {}
+        return {"hash": h, "etag": headers.get("ETag") or previa.get("etag"),
+                "last_modified": headers.get("Last-Modified") or previa.get("last_modified"),
+                "expira": ahora + ttl, "error": None, "fallos": 0}
+
+    def _fallo(self, motivo: str, previa: Dict | None, ahora: float) -> Dict:
+        fallos = (previa or {}).get("fallos", 0) + 1
+        espera = min(self.ttl_fallo * 2 ** (fallos - 1), TTL_FALLO_MAX)
+        # Si ya había una copia buena se sigue mostrando; solo se posterga el reintento
+        h = (previa or {}).get("hash")
+        return {"hash": h, "etag": (previa or {}).get("etag"), "last_modified": (previa or {}).get("last_modified"),
+                "expira": ahora + espera, "error": motivo, "fallos": fallos}
+
+    def _una(self, url: str) -> None:
+        self._guardar(url, self._descargar(url, self.entrada(url)))
+
+    def _pendientes(self, urls: Iterable[str]) -> tuple:
+        """Reparte las URLs: vencidas que arranca este llamado y las que ya están en curso."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        for url in urls:
+            self.entrada(url)   # carga desde disco lo que haya
+        nuevas, eventos, esperar = [], {}, []
+        with self._lock:
+            for url in urls:
+                if url in self._en_curso:
+                    esperar.append(self._en_curso[url])
+                    continue
+                e = self._entradas.get(url)
+                if e is not None and e["expira"] > time.time():
+                    continue
+                nuevas.append(url)
+                eventos[url] = self._en_curso[url] = threading.Event()
+        return nuevas, eventos, esperar
+
+    def _correr(self, urls: List[str], eventos: Dict[str, threading.Event]) -> None:
+        try:
+            list(self._pool.map(self._una, urls))
+        finally:
+            with self._lock:
+                for u, ev in eventos.items():
+                    self._en_curso.pop(u, None)
+                    ev.set()
+
+    # ---------- API ----------
+    def prefetch(self, urls: Iterable[str]) -> None:
+        """Descarga en segundo plano (no bloquea el rerun)."""
+        nuevas, eventos, _ = self._pendientes(urls)
+        if nuevas:
+            threading.Thread(target=self._correr, args=(nuevas, eventos), daemon=True).start()
+
+    def resolver(self, urls: Iterable[str], timeout: float | None = None) -> Dict[str, str | None]:
+        """Descarga en paralelo las URLs vencidas y espera hasta `timeout` en total
+        (propias y en curso en otras sesiones). Devuelve url -> hash (None si falló
+        o todavía no llegó)."""
+        limite = None if timeout is None else time.time() + timeout
+        urls = [u for u in urls if u]
+        nuevas, eventos, esperar = self._pendientes(urls)
+        if nuevas:
+            hilo = threading.Thread(target=self._correr, args=(nuevas, eventos), daemon=True)
+            hilo.start()
+            hilo.join(timeout)
+        for ev in esperar:
+            ev.wait(None if limite is None else max(limite - time.time(), 0))
+        return {u: (self.entrada(u) or {}).get("hash") for u in urls}
+
+    def thumbnail(self, url: str, tam: str = "card") -> bytes | None:
+        """Miniatura de la URL si ya está en caché (no descarga)."""
+        e = self.entrada(url) if url else None
+        if not e or not e.get("hash"):
+            return None
+        return self.imagenes.thumbnail(e["hash"], tam)
+
+    def fallida(self, url: str) -> bool:
+        """True si la URL está en la caché negativa (no se reintenta hasta que venza)."""
+        e = self.entrada(url) if url else None
+        return bool(e and e.get("error") and not e.get("hash") and e["expira"] > time.time())
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
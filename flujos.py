@@ -0,0 +1,15 @@
+import io
+from typing import BinaryIO
+
+# =========================
+# Utilidades de streams subidos (compartidas por el catálogo y la agenda)
+# =========================
+
+
+def tamano(stream: BinaryIO) -> int:
+    """Bytes totales del stream sin mover su posición actual (para la barra de progreso)."""
+    pos = stream.tell()
+    stream.seek(0, io.SEEK_END)
+    total = stream.tell()
+    stream.seek(pos)
+    return total
@@ -0,0 +1,341 @@
+import os
+import pickle
+import shutil
+import struct
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Tuple
+
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+
+try:
+    import fcntl
+except ImportError:   # Windows: sin bloqueo entre procesos (un solo servidor por carpeta de estado)
+    fcntl = None
+
+# =========================
+# Instantáneas + diario de deltas por sesión (deshacer / rehacer / recuperar)
+# =========================
+# El estado de una app se describe como "partes": dicts clave -> valor (p. ej.
+# _id -> tupla del bloque). En disco hay una base (instantánea comprimida) y un
+# diario append-only; al final de cada rerun se compara el estado con lo ya
+# registrado (hashes por clave) y, si cambió algo, se agrega un delta con solo
+# las claves nuevas/cambiadas y las borradas. Deshacer/rehacer también son
+# entradas del diario; el estado se reconstruye aplicando base + deltas vigentes.
+# Las imágenes no se copian: el catálogo guarda solo su image_hash.
+DIR_ESTADO = Path(os.environ.get("APP_ESTADO", ".estado"))
+MAX_DESHACER = 100
+LIMITE_DIARIO = 4 * MAX_DESHACER   # entradas antes de compactar en una base nueva
+CADUCIDAD_DIAS = 14
+
+Partes = Dict[str, Dict[Hashable, object]]
+Delta = Dict[str, Tuple[Dict[Hashable, object], List[Hashable]]]   # parte -> (altas/cambios, bajas)
+
+_CABECERA = struct.Struct(">II")   # largo y crc32 de cada entrada del diario
+_MAGIA = b"ESTv1"
+# Lo que puede lanzar un archivo dañado al descomprimirlo/deserializarlo
+_DANADO = (zlib.error, pickle.UnpicklingError, EOFError, ValueError, TypeError, IndexError,
+           AttributeError, ImportError)
+_limpieza = threading.Lock()
+_limpiadas: set = set()
+_reclamos = threading.Lock()
+
+
+def _comprimir(obj) -> bytes:
+    return zlib.compress(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), 6)
+
+
+def _descomprimir(data: bytes):
+    return pickle.loads(zlib.decompress(data))   # solo archivos que escribió esta app
+
+
+def aplicar(partes: Partes, delta: Delta) -> Partes:
+    for nombre, (cambios, bajas) in delta.items():
+        parte = partes.setdefault(nombre, {})
+        parte.update(cambios)
+        for k in bajas:
+            parte.pop(k, None)
+    return partes
+
+
+def _huellas(parte: Dict) -> Dict[Hashable, int]:
+    return {k: hash(v) for k, v in parte.items()}
+
+
+class Diario:
+    """Base + diario de una sesión en `ruta`. Los archivos llevan número de
+    generación; ACTUAL apunta a la vigente y se reemplaza de forma atómica, así
+    que una compactación interrumpida deja intacta la generación anterior."""
+
+    def __init__(self, ruta: Path):
+        self.ruta = Path(ruta)
+        self.ruta.mkdir(parents=True, exist_ok=True)
+        self.gen = 0
+        self.base: Partes = {}
+        self.hechos: List[Delta] = []
+        self.deshechos: List[Delta] = []      # deshechos[-1] es el próximo a rehacer
+        self.entradas = 0
+        self._huellas: Dict[str, Dict[Hashable, int]] = {}
+        self.recuperado = self._cargar()
+
+    # ---------- disco ----------
+    def _archivo(self, nombre: str, gen: int | None = None) -> Path:
+        return self.ruta / f"{nombre}.{self.gen if gen is None else gen}.bin"
+
+    def _cargar(self) -> bool:
+        """Carga la generación vigente; si su base está dañada, la anterior (que se
+        conserva justo para esto). Sin ninguna legible, la sesión arranca de cero."""
+        try:
+            actual = int((self.ruta / "ACTUAL").read_text())
+        except (OSError, ValueError):
+            return False
+        self.gen = actual   # una base nueva va después de la dañada, no encima de otra
+        for gen in (actual, actual - 1):
+            if gen > 0 and self._cargar_generacion(gen):
+                if gen != actual:
+                    self.compactar()   # reescribe la vigente a partir de la anterior
+                return True
+        return False
+
+    def _cargar_generacion(self, gen: int) -> bool:
+        try:
+            data = self._archivo("base", gen).read_bytes()
+            if not data.startswith(_MAGIA):
+                return False
+            base = _descomprimir(data[len(_MAGIA):])
+        except (OSError, *_DANADO):
+            return False
+        self.gen, self.base = gen, base
+        self.hechos, self.deshechos, self.entradas = [], [], 0
+        diario = self._archivo("diario")
+        bueno = 0
+        if diario.exists():
+            with diario.open("rb") as f:
+                while True:
+                    cab = f.read(_CABECERA.size)
+                    if len(cab) < _CABECERA.size:
+                        break
+                    largo, crc = _CABECERA.unpack(cab)
+                    cuerpo = f.read(largo)
+                    if len(cuerpo) < largo or zlib.crc32(cuerpo) != crc:
+                        break   # escritura cortada por una caída: se descarta desde acá
+                    try:
+                        entrada = _descomprimir(cuerpo)
+                    except _DANADO:
+                        break
+                    self._reproducir(entrada)
+                    bueno = f.tell()
+            if bueno < diario.stat().st_size:
+                os.truncate(diario, bueno)
+        return True
+
+    def _reproducir(self, entrada: tuple) -> None:
+        self.entradas += 1
+        if entrada[0] == "d":
+            self.hechos.append(entrada[1])
+            self.deshechos.clear()
+        elif entrada[0] == "u" and self.hechos:
+            self.deshechos.append(self.hechos.pop())
+        elif entrada[0] == "r" and self.deshechos:
+            self.hechos.append(self.deshechos.pop())
+
+    def _anotar(self, entrada: tuple) -> None:
+        cuerpo = _comprimir(entrada)
+        with self._archivo("diario").open("ab") as f:
+            f.write(_CABECERA.pack(len(cuerpo), zlib.crc32(cuerpo)) + cuerpo)
+        self._reproducir(entrada)
+
+    def _escribir_generacion(self, base: Partes, entradas: List[tuple]) -> None:
+        gen = self.gen + 1
+        tmp = self._archivo("base", gen).with_suffix(".tmp")
+        tmp.write_bytes(_MAGIA + _comprimir(base))
+        os.replace(tmp, self._archivo("base", gen))
+        with self._archivo("diario", gen).open("wb") as f:
+            for entrada in entradas:
+                cuerpo = _comprimir(entrada)
+                f.write(_CABECERA.pack(len(cuerpo), zlib.crc32(cuerpo)) + cuerpo)
+        puntero = self.ruta / "ACTUAL.tmp"
+        puntero.write_text(str(gen))
+        os.replace(puntero, self.ruta / "ACTUAL")
+        for nombre in ("base", "diario"):   # la generación anterior queda como respaldo
+            self._archivo(nombre, self.gen - 1).unlink(missing_ok=True)
+        self.gen, self.base, self.entradas = gen, base, len(entradas)
+
+    # ---------- estado ----------
+    def estado(self) -> Partes:
+        """Base + deltas vigentes (lo que hay que cargar al recuperar/deshacer)."""
+        partes = {k: dict(v) for k, v in self.base.items()}
+        for delta in self.hechos:
+            aplicar(partes, delta)
+        return partes
+
+    def _sincronizar(self, partes: Partes) -> None:
+        self._huellas = {k: _huellas(v) for k, v in partes.items()}
+
+    def iniciar(self, partes: Partes) -> None:
+        """Primera vez de la sesión: el estado actual es la base."""
+        self._escribir_generacion({k: dict(v) for k, v in partes.items()}, [])
+        self._sincronizar(partes)
+
+    def adoptar(self, partes: Partes) -> None:
+        """El estado cargado (recuperado) pasa a ser la referencia para comparar."""
+        self._sincronizar(partes)
+
+    def registrar(self, partes: Partes, parciales: Delta | None = None) -> bool:
+        """Compara con lo registrado y anota un delta si algo cambió. Las partes que
+        no se pasan se dan por iguales (p. ej. el catálogo si su versión no cambió).
+        `parciales` trae, por parte, solo las claves tocadas y las borradas desde el
+        registro anterior: se comparan esas y nada más (sin recorrer toda la parte)."""
+        delta: Delta = {}
+        for nombre, parte in partes.items():
+            previas = self._huellas.get(nombre, {})
+            huellas = _huellas(parte)
+            cambios = {k: parte[k] for k, h in huellas.items() if previas.get(k) != h}
+            bajas = [k for k in previas if k not in huellas]
+            if cambios or bajas:
+                delta[nombre] = (cambios, bajas)
+            self._huellas[nombre] = huellas
+        for nombre, (tocadas, borradas) in (parciales or {}).items():
+            previas = self._huellas.setdefault(nombre, {})
+            huellas = _huellas(tocadas)
+            cambios = {k: tocadas[k] for k, h in huellas.items() if previas.get(k) != h}
+            bajas = [k for k in borradas if k in previas]
+            previas.update(huellas)
+            for k in bajas:
+                del previas[k]
+            if cambios or bajas:
+                delta[nombre] = (cambios, bajas)
+        if not delta:
+            return False
+        self._anotar(("d", delta))
+        if self.entradas > LIMITE_DIARIO:
+            self.compactar()
+        return True
+
+    def compactar(self) -> None:
+        """Nueva base con todo menos los últimos MAX_DESHACER deltas; el diario nuevo
+        conserva esos deltas y la pila de rehacer."""
+        corte = max(len(self.hechos) - MAX_DESHACER, 0)
+        base = {k: dict(v) for k, v in self.base.items()}
+        for delta in self.hechos[:corte]:
+            aplicar(base, delta)
+        entradas = [("d", d) for d in self.hechos[corte:]]
+        entradas += [("d", d) for d in reversed(self.deshechos)] + [("u",)] * len(self.deshechos)
+        hechos, deshechos = self.hechos[corte:], list(self.deshechos)
+        self._escribir_generacion(base, entradas)
+        self.hechos, self.deshechos = hechos, deshechos
+
+    @property
+    def puede_deshacer(self) -> bool:
+        return bool(self.hechos)
+
+    @property
+    def puede_rehacer(self) -> bool:
+        return bool(self.deshechos)
+
+    def deshacer(self) -> Partes | None:
+        if not self.hechos:
+            return None
+        self._anotar(("u",))
+        partes = self.estado()
+        self._sincronizar(partes)
+        return partes
+
+    def rehacer(self) -> Partes | None:
+        if not self.deshechos:
+            return None
+        self._anotar(("r",))
+        partes = self.estado()
+        self._sincronizar(partes)
+        return partes
+
+
+def _limpiar_viejas(raiz: Path) -> None:
+    """Borra sesiones sin tocar hace más de CADUCIDAD_DIAS (una vez por proceso y app)."""
+    with _limpieza:
+        if raiz in _limpiadas:
+            return
+        _limpiadas.add(raiz)
+    limite = time.time() - CADUCIDAD_DIAS * 86400
+    for d in raiz.glob("*"):
+        try:
+            if d.is_dir() and max(f.stat().st_mtime for f in d.iterdir()) < limite:
+                shutil.rmtree(d, ignore_errors=True)
+        except (OSError, ValueError):
+            pass
+
+
+def _sesion_actual() -> str:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else ""
+
+
+def _viva(sesion: str) -> bool:
+    """¿La sesión de Streamlit sigue conectada? (una recarga desconecta la anterior)."""
+    return bool(sesion) and Runtime.exists() and Runtime.instance().is_active_session(sesion)
+
+
+@contextmanager
+def _bloqueo(raiz: Path):
+    """Exclusión entre sesiones (hilos) y procesos mientras se reclama un token."""
+    raiz.mkdir(parents=True, exist_ok=True)
+    with _reclamos, (raiz / ".bloqueo").open("a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _reclamar(raiz: Path, token: str) -> str:
+    """Deja el token a nombre de esta sesión. Si otra sesión viva ya lo usa (una
+    pestaña duplicada, un enlace copiado), esta sigue con un token nuevo que parte
+    de una copia de ese estado: dos pestañas nunca escriben el mismo diario."""
+    yo = _sesion_actual()
+    with _bloqueo(raiz):
+        ruta = raiz / token
+        try:
+            dueno = (ruta / "DUENO").read_text()
+        except OSError:
+            dueno = ""
+        if dueno and dueno != yo and _viva(dueno):
+            token = uuid.uuid4().hex[:16]
+            shutil.copytree(ruta, raiz / token, ignore=shutil.ignore_patterns("DUENO", "*.tmp"))
+            ruta = raiz / token
+        ruta.mkdir(parents=True, exist_ok=True)
+        (ruta / "DUENO").write_text(yo)
+    return token
+
+
+def diario_sesion(app: str, actual: Callable[[], Partes], restaurar: Callable[[Partes], None]) -> Diario:
+    """Diario de esta pestaña. La sesión se identifica con ?sesion=<token> en la URL:
+    recargar la página (o volver tras una caída del servidor) llama a `restaurar`
+    con lo último registrado; si no hay nada, el estado `actual()` pasa a ser la base.
+    Si el token ya lo usa otra pestaña abierta, esta recibe uno nuevo (ver _reclamar)."""
+    clave = f"_diario_{app}"
+    if clave not in st.session_state:
+        pedido = st.query_params.get("sesion", "")
+        token = pedido if pedido.isalnum() and len(pedido) <= 64 else uuid.uuid4().hex[:16]
+        raiz = DIR_ESTADO / app
+        _limpiar_viejas(raiz)
+        token = _reclamar(raiz, token)
+        if token != pedido:
+            st.query_params["sesion"] = token
+        diario = Diario(raiz / token)
+        if diario.recuperado:
+            partes = diario.estado()
+            restaurar(partes)
+            diario.adoptar(partes)
+            st.toast("Sesión recuperada: puedes deshacer los últimos cambios.", icon="♻️")
+        else:
+            diario.iniciar(actual())
+        st.session_state[clave] = diario
+    return st.session_state[clave]
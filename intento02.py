@@ -1,46 +1,57 @@
-import io
-import json
-import base64
+import copy
+import os
 from typing import List, Dict
 
-import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
-from PIL import Image
+
+from catalogo_agregados import Aggregates
+from catalogo_busqueda import SearchIndex
+from catalogo_filtros import FacetIndex
+from catalogo_imagenes import ImageStore
+from catalogo_io import exportar_json, exportar_ndjson, exportar_zip, hash_stream, importar, importar_zip
+from catalogo_similares import SimilarIndex
+from catalogo_sqlite import SQLiteCatalog
+from catalogo_store import COLUMNAS, CatalogStore, Memo
+from catalogo_urls import URLImageCache
+from instantaneas import diario_sesion
+from perfilado import iniciar as iniciar_perfil
 
 # =========================
 # Configuración
 # =========================
 st.set_page_config(page_title="Makeup Rosa — Catálogo", page_icon="💖", layout="wide")
+perfil = iniciar_perfil("intento02")   # APP_PERFIL=1 o ?perfil=1 para ver el panel de tiempos
+perfil.marca("inicio")
 st.title("💖 Makeup Rosa — Catálogo con Favoritos, Comparador y JSON")
 st.caption("Sin dataset externo • Persistencia vía exportar/importar JSON • Estética rosa")
 
 # =========================
 # Utilidades
 # =========================
-def imgfile_to_b64(file) -> str:
-    """Convierte un archivo de imagen a base64 (JPEG) para persistir en JSON."""
-    try:
-        img = Image.open(file).convert("RGB")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=90)
-        return base64.b64encode(buf.getvalue()).decode("utf-8")
-    except Exception:
-        return ""
+@st.cache_resource
+def get_imagenes() -> ImageStore:
+    """Almacén de imágenes compartido por todas las sesiones del proceso."""
+    return ImageStore()
 
-def b64_to_bytes(b64: str) -> bytes | None:
-    try:
-        return base64.b64decode(b64.encode("utf-8"))
-    except Exception:
-        return None
+@st.cache_resource
+def get_urls() -> URLImageCache:
+    """Descargas de image_url con caché en disco (ETag/TTL y fallos recordados)."""
+    return URLImageCache(get_imagenes())
+
+# Con MAKEUP_DB=<archivo.db> el catálogo vive en SQLite y lo comparten todas las sesiones
+DB_PATH = os.environ.get("MAKEUP_DB", "")
+
+@st.cache_resource
+def get_db() -> SQLiteCatalog:
+    """Catálogo SQLite (WAL + pool de conexiones) compartido por todas las sesiones."""
+    return SQLiteCatalog(DB_PATH, semilla=BASE)
 
-def to_df(items: List[Dict]) -> pd.DataFrame:
-    if not items:
-        return pd.DataFrame(columns=[
-            "id","nombre","marca","categoría","acabado","tono","precio","rating",
-            "cruelty_free","vegano","stock","descripcion","image_url","image_b64"
-        ])
-    return pd.DataFrame(items)
+@st.cache_resource(max_entries=1)
+def similares_compartido(version: int) -> SimilarIndex:
+    """Matriz de features del catálogo SQLite: una por versión para todo el proceso."""
+    return SimilarIndex(get_db().view(), version)
 
 def safe_float(x, default=0.0):
     try:
@@ -55,62 +66,123 @@ BASE: List[Dict] = [
     {"id":1,"nombre":"Liquid Blush","marca":"Rare Beauty","categoría":"Rostro","acabado":"Satinado","tono":"Happy",
      "precio":115.0,"rating":4.8,"cruelty_free":True,"vegano":True,"stock":15,
      "descripcion":"Rubor líquido de alta pigmentación y difuminado fácil.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
     {"id":2,"nombre":"Velvet Liquid Lipstick","marca":"Fenty Beauty","categoría":"Labios","acabado":"Mate","tono":"Pink Matter",
      "precio":119.0,"rating":4.7,"cruelty_free":True,"vegano":True,"stock":20,
      "descripcion":"Labial líquido mate de larga duración.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
     {"id":3,"nombre":"Butter Gloss","marca":"NYX","categoría":"Labios","acabado":"Brillante","tono":"Crème Brulee",
      "precio":39.0,"rating":4.3,"cruelty_free":True,"vegano":False,"stock":40,
      "descripcion":"Brillo labial cremoso con color suave.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
     {"id":4,"nombre":"Powder Kiss Lipstick","marca":"MAC","categoría":"Labios","acabado":"Mate difuminado","tono":"Sultry Move",
      "precio":99.0,"rating":4.6,"cruelty_free":False,"vegano":False,"stock":18,
      "descripcion":"Acabado borroso cómodo para uso diario.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
     {"id":5,"nombre":"Afterglow Liquid Blush","marca":"NARS","categoría":"Rostro","acabado":"Glow","tono":"Orgasm",
      "precio":135.0,"rating":4.7,"cruelty_free":False,"vegano":False,"stock":12,
      "descripcion":"Rubor líquido luminoso efecto saludable.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
     {"id":6,"nombre":"Halo Glow Blush Wand","marca":"e.l.f.","categoría":"Rostro","acabado":"Glow","tono":"Pink-Me-Up",
      "precio":49.0,"rating":4.5,"cruelty_free":True,"vegano":True,"stock":28,
      "descripcion":"Rubor con aplicador y brillo saludable.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
     {"id":7,"nombre":"SuperStay Vinyl Ink","marca":"Maybelline","categoría":"Labios","acabado":"Brillante","tono":"Lippy",
      "precio":55.0,"rating":4.4,"cruelty_free":False,"vegano":False,"stock":35,
      "descripcion":"Vinilo de alto impacto y fijación.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
     {"id":8,"nombre":"Infallible Fresh Wear Blush","marca":"L'Oréal","categoría":"Rostro","acabado":"Natural","tono":"Confident Pink",
      "precio":69.0,"rating":4.2,"cruelty_free":False,"vegano":False,"stock":26,
      "descripcion":"Rubor resistente al sudor y transferencia.",
-     "image_url":"", "image_b64":""},
+     "image_url":"", "image_hash":""},
 ]
 
+@st.cache_resource
+def base_inicial():
+    """Catálogo base con sus índices, armado una vez por proceso (las sesiones copian)."""
+    return CatalogStore(BASE), SearchIndex(BASE), FacetIndex(BASE), Aggregates(BASE)
+
 # =========================
 # Estado
 # =========================
-if "items" not in st.session_state:
-    st.session_state.items = BASE.copy()
+perfil.marca("estado")
+# El catálogo vive en un repositorio columnar (no en una lista de dicts) o,
+# con MAKEUP_DB, en SQLite: la sesión no guarda copia ni índices, solo ids.
+if DB_PATH:
+    cat = get_db()
+else:
+    if "catalogo" not in st.session_state:
+        st.session_state.catalogo = copy.deepcopy(base_inicial()[0])
+    cat = st.session_state.catalogo
 if "favs" not in st.session_state:
     st.session_state.favs = set()
 if "page" not in st.session_state:
     st.session_state.page = 1
+if not DB_PATH and "search_idx" not in st.session_state:
+    # Cada sesión copia los índices ya armados en vez de recalcularlos desde BASE
+    _, search_idx, facet_idx, aggs = base_inicial()
+    st.session_state.search_idx = copy.deepcopy(search_idx)
+    st.session_state.facet_idx = copy.deepcopy(facet_idx)
+    st.session_state.aggs = copy.deepcopy(aggs)
+if "charts" not in st.session_state:
+    st.session_state.charts = Memo()
+if "vistas" not in st.session_state:
+    st.session_state.vistas = Memo(8)   # resultados de filtro/orden por filtro_key
+
+def indices():
+    """Estructuras derivadas del catálogo que se mantienen en cada alta/edición/baja."""
+    if DB_PATH:
+        return ()   # SQLite mantiene sus propios índices
+    return (st.session_state.search_idx, st.session_state.facet_idx, st.session_state.aggs)
+
+def partes_sesion() -> Dict:
+    """Estado completo (la base del diario): favoritos y todas las filas."""
+    st.session_state.diario_version = cat.version
+    return {"favs": dict.fromkeys(st.session_state.favs, True), "filas": cat.tuplas()}
+
+def registrar_sesion() -> None:
+    """Favoritos siempre; del catálogo solo las filas tocadas desde el último registro
+    (todas únicamente si hubo una carga completa: importar, reiniciar)."""
+    partes, parciales = {"favs": dict.fromkeys(st.session_state.favs, True)}, {}
+    visto = st.session_state.get("diario_version", -1)
+    if visto != cat.version:
+        cambios = cat.cambios_desde(visto)
+        if cambios is None:
+            partes["filas"] = cat.tuplas()
+        else:
+            parciales["filas"] = cambios
+        st.session_state.diario_version = cat.version
+    diario.registrar(partes, parciales)
+
+def restaurar_sesion(partes: Dict) -> None:
+    cat.replace_all(dict(zip(COLUMNAS, fila)) for fila in partes["filas"].values())
+    recs = cat.to_records()
+    for ix in indices():
+        ix.rebuild(recs)
+    st.session_state.diario_version = cat.version
+    st.session_state.favs = set(partes["favs"])
+    st.session_state.page = 1
+
+# Deshacer / rehacer / recuperar (por pestaña, ?sesion=). Con SQLite el catálogo es compartido: sin diario
+diario = None if DB_PATH else diario_sesion("intento02", partes_sesion, restaurar_sesion)
 
 # =========================
 # Sidebar: filtros + Alta + Import/Export
 # =========================
+perfil.marca("sidebar")
 with st.sidebar:
     st.header("🎯 Filtros")
-    df_all = to_df(st.session_state.items)
-    marcas = sorted(df_all["marca"].unique().tolist()) if not df_all.empty else []
-    cats = sorted(df_all["categoría"].unique().tolist()) if not df_all.empty else []
-    acabados = sorted(df_all["acabado"].unique().tolist()) if not df_all.empty else []
+    fidx = cat if DB_PATH else st.session_state.facet_idx
+    marcas = fidx.opciones("marca")
+    cats = fidx.opciones("categoría")
+    acabados = fidx.opciones("acabado")
 
     q = st.text_input("🔎 Buscar (nombre/tono/marca)")
     f_marca = st.multiselect("Marca", marcas, default=marcas)
     f_cat = st.multiselect("Categoría", cats, default=cats)
     f_acab = st.multiselect("Acabado", acabados, default=acabados)
     f_precio = st.slider("Precio máx (S/.)", 20.0, 200.0, 200.0, step=1.0)
+    conteos_box = st.empty()
     st.markdown("---")
 
     st.subheader("➕ Agregar producto")
@@ -134,98 +206,171 @@ with st.sidebar:
 
         submitted = st.form_submit_button("Agregar")
         if submitted:
-            new_id = max([it["id"] for it in st.session_state.items]) + 1 if st.session_state.items else 1
-            image_b64 = imgfile_to_b64(up_img) if up_img else ""
-            st.session_state.items.append({
-                "id": new_id, "nombre": nombre or "Nuevo Producto", "marca": marca,
+            image_hash = get_imagenes().put_file(up_img) if up_img else ""
+            nuevo = {
+                "nombre": nombre or "Nuevo Producto", "marca": marca,
                 "categoría": categoria, "acabado": acabado, "tono": tono,
                 "precio": float(precio), "rating": float(rating), "stock": int(stock),
                 "cruelty_free": bool(cruelty), "vegano": bool(vegan),
                 "descripcion": (desc or "").strip(),
                 "image_url": (url_img or "").strip(),
-                "image_b64": image_b64,
-            })
+                "image_hash": image_hash,
+            }
+            # El id lo asigna el catálogo (en SQLite, sin carreras entre sesiones)
+            nuevo["id"] = cat.insert(nuevo)
+            for ix in indices():
+                ix.add(nuevo)
             st.success("Producto agregado.")
 
     st.markdown("---")
     st.subheader("📦 Importar / Exportar")
+    # La exportación se genera solo al hacer clic (data=callable) y se escribe por bloques
+    formatos = {
+        "ZIP (NDJSON + imágenes)": (lambda cat: exportar_zip(cat, lambda h: str(get_imagenes().ruta_original(h))),
+                                    "makeup_catalogo.zip", "application/zip"),
+        "NDJSON (sin imágenes)": (exportar_ndjson, "makeup_catalogo.ndjson", "application/x-ndjson"),
+        "JSON (imágenes embebidas)": (lambda cat: exportar_json(cat, get_imagenes().original_b64),
+                                      "makeup_catalogo.json", "application/json"),
+    }
+    fmt = st.selectbox("Formato de exportación", list(formatos))
+    exportador, exp_name, exp_mime = formatos[fmt]
     exp = st.download_button(
-        "⬇️ Exportar catálogo (.json)",
-        data=json.dumps(st.session_state.items, ensure_ascii=False, indent=2).encode("utf-8"),
-        file_name="makeup_catalogo.json",
-        mime="application/json",
+        "⬇️ Exportar catálogo",
+        data=lambda: exportador(cat),
+        file_name=exp_name,
+        mime=exp_mime,
         use_container_width=True
     )
-    up_json = st.file_uploader("Importar JSON", type=["json"])
-    if up_json is not None:
-        try:
-            data = json.load(up_json)
-            assert isinstance(data, list)
-            # Validación mínima de claves
-            cleaned = []
-            for i, it in enumerate(data, start=1):
-                cleaned.append({
-                    "id": int(it.get("id", i)),
-                    "nombre": str(it.get("nombre","Producto")),
-                    "marca": str(it.get("marca","Marca")),
-                    "categoría": str(it.get("categoría","Rostro")),
-                    "acabado": str(it.get("acabado","Mate")),
-                    "tono": str(it.get("tono","Rosa")),
-                    "precio": float(it.get("precio",0)),
-                    "rating": float(it.get("rating",0)),
-                    "cruelty_free": bool(it.get("cruelty_free", False)),
-                    "vegano": bool(it.get("vegano", False)),
-                    "stock": int(it.get("stock",0)),
-                    "descripcion": str(it.get("descripcion","")),
-                    "image_url": str(it.get("image_url","")),
-                    "image_b64": str(it.get("image_b64","")),
-                })
-            st.session_state.items = cleaned
-            st.session_state.page = 1
-            st.success("Catálogo importado.")
-        except Exception as e:
-            st.error(f"No se pudo importar el JSON: {e}")
+    up_json = st.file_uploader("Importar JSON / NDJSON / ZIP", type=["json","ndjson","jsonl","zip"])
+    # El uploader conserva el archivo entre reruns: solo se importa si cambió
+    # (file_id) y su contenido no es el que ya está cargado (hash + versión).
+    ultimo = st.session_state.get("import_ok")  # (file_id, hash, versión del catálogo)
+    if up_json is not None and (ultimo is None or ultimo[0] != up_json.file_id):
+        h = hash_stream(up_json)
+        if ultimo is not None and ultimo[1] == h and ultimo[2] == cat.version:
+            st.session_state.import_ok = (up_json.file_id, h, ultimo[2])
+        else:
+            barra = st.progress(0.0, text="Importando…")
+            try:
+                avance = lambda filas, leidos, total: barra.progress(
+                    min(leidos / max(total, 1), 1.0), text=f"Importando… {filas} filas")
+                if up_json.name.lower().endswith(".zip"):
+                    res = importar_zip(up_json, guardar_imagen=get_imagenes().put, progreso=avance)
+                else:
+                    res = importar(up_json, migrar_imagen=get_imagenes().put_b64, hash_previo=h, progreso=avance)
+                cat.replace_frame(res.frame)
+                if indices():
+                    recs = cat.to_records()
+                    for ix in indices():
+                        ix.rebuild(recs)
+                st.session_state.page = 1
+                st.session_state.import_ok = (up_json.file_id, h, cat.version)
+                st.session_state.import_errores = res.errores
+                st.success(f"Catálogo importado: {len(res.frame)} de {res.filas} filas.")
+            except Exception as e:
+                st.error(f"No se pudo importar el JSON: {e}")
+            finally:
+                barra.empty()
+    if st.session_state.get("import_errores"):
+        with st.expander(f"⚠️ {len(st.session_state.import_errores)} filas con errores"):
+            st.dataframe(pd.DataFrame(st.session_state.import_errores[:500], columns=["fila", "motivo"]),
+                         use_container_width=True, height=200)
 
     st.markdown("---")
     if st.button("🔄 Reiniciar al catálogo base"):
-        st.session_state.items = BASE.copy()
+        cat.replace_all(BASE)
+        for ix in indices():
+            ix.rebuild(BASE)
         st.session_state.favs = set()
         st.session_state.page = 1
+        st.session_state.import_errores = []
         st.success("Catálogo reiniciado.")
 
 # =========================
 # Filtrado
 # =========================
-df = to_df(st.session_state.items)
-mask = (
-    df["marca"].isin(f_marca) &
-    df["categoría"].isin(f_cat) &
-    df["acabado"].isin(f_acab) &
-    (df["precio"] <= f_precio)
+perfil.marca("filtrado")
+ORDENES = {
+    "Relevancia / catálogo": (None, False),
+    "Precio ↑": ("precio", False), "Precio ↓": ("precio", True),
+    "Rating ↓": ("rating", True), "Rating ↑": ("rating", False),
+    "Stock ↓": ("stock", True), "Stock ↑": ("stock", False),
+}
+o1, o2 = st.columns([3, 1])
+orden_sel = o1.selectbox("Ordenar por", list(ORDENES))
+PER_PAGE = o2.selectbox("Por página", [6, 12, 24, 48])
+
+filtros = {"marca": f_marca, "categoría": f_cat, "acabado": f_acab}
+# Clave del estado de filtros: versión del catálogo + selección actual
+filtro_key = (
+    cat.version, tuple(sorted(f_marca)), tuple(sorted(f_cat)),
+    tuple(sorted(f_acab)), f_precio, q,
 )
-if q:
-    ql = q.lower()
-    mask &= (
-        df["nombre"].str.lower().str.contains(ql) |
-        df["tono"].str.lower().str.contains(ql) |
-        df["marca"].str.lower().str.contains(ql)
-    )
-df_f = df[mask].reset_index(drop=True)
+
+def filtrar():
+    """AND/OR de bitmaps + búsqueda binaria de precio; los conteos reutilizan los mismos bitmaps."""
+    if DB_PATH:
+        # Consultas indexadas en SQLite (FTS5 + índices de marca/categoría/precio/rating)
+        return {"ids": cat.consultar(q, filtros, f_precio), "ranked": None,
+                "conteos": cat.conteos(q, filtros, f_precio)}
+    ranked = st.session_state.search_idx.search(q) if q else None
+    extra = fidx.bitmap_ids(ranked) if q else None
+    bm = fidx.mask(filtros, f_precio, extra)
+    return {"ids": fidx.to_ids(bm), "ranked": ranked, "conteos": fidx.counts(filtros, f_precio, extra)}
+
+def ordenar():
+    """Secuencia ordenada de ids visibles (sin materializar filas)."""
+    col, desc = ORDENES[orden_sel]
+    if DB_PATH:
+        return cat.consultar(q, filtros, f_precio, col, desc)
+    res = vistas.get(("filtro", filtro_key), filtrar)
+    if col is None and res["ranked"] is not None:
+        # El índice devuelve ids ordenados por relevancia; solo se tocan los que coinciden
+        return np.asarray(res["ranked"], dtype=np.int64)[np.isin(res["ranked"], res["ids"])]
+    orden = cat.orden(col, desc)
+    return orden[np.isin(orden, res["ids"])]
+
+vistas = st.session_state.vistas
+with perfil.fase("filtrar"):
+    res_filtro = vistas.get(("filtro", filtro_key), filtrar)
+with perfil.fase("ordenar"):
+    ids_f = vistas.get(("orden", filtro_key, orden_sel), ordenar)
+# df_f completo solo si algo lo necesita (gráficos/agregados no cacheados)
+def _df_filtrado():
+    perfil.frame("filtrado")
+    if DB_PATH:
+        return cat.frame(res_filtro["ids"])
+    df = cat.view()
+    return df[df["id"].isin(res_filtro["ids"])].reset_index(drop=True)
+
+df_filtrado = lambda: vistas.get(("df_f", filtro_key), _df_filtrado)
+conteos_box.caption("  \n".join(
+    f"**{f.capitalize()}:** " + " · ".join(f"{v} ({n})" for v, n in vals.items())
+    for f, vals in res_filtro["conteos"].items()
+))
 
 # =========================
 # Métricas
 # =========================
+perfil.marca("métricas")
+# Sin búsqueda ni tope de precio efectivo, el resumen sale de las sumas por celda;
+# en cualquier caso se memoiza por filtro_key (paginar o marcar favoritos no recalcula).
+if DB_PATH:
+    resumen = vistas.get(("resumen", filtro_key), lambda: cat.resumen(q, filtros, f_precio))
+else:
+    solo_facetas = not q and f_precio >= fidx.precio_max()
+    resumen = st.session_state.aggs.resumen(filtro_key, filtros, df_filtrado, solo_facetas)
 c1, c2, c3, c4 = st.columns(4)
-c1.metric("Productos visibles", len(df_f))
-c2.metric("Precio promedio (S/.)", f"{df_f['precio'].mean():.2f}" if not df_f.empty else "—")
-c3.metric("Rating promedio", f"{df_f['rating'].mean():.2f}" if not df_f.empty else "—")
-c4.metric("Stock total", int(df_f["stock"].sum()) if not df_f.empty else 0)
+c1.metric("Productos visibles", resumen.n)
+c2.metric("Precio promedio (S/.)", f"{resumen.precio_prom:.2f}" if resumen.n else "—")
+c3.metric("Rating promedio", f"{resumen.rating_prom:.2f}" if resumen.n else "—")
+c4.metric("Stock total", resumen.stock_total)
 
 # =========================
 # Paginación
 # =========================
-PER_PAGE = 6
-total_pages = max(1, (len(df_f) + PER_PAGE - 1) // PER_PAGE)
+perfil.marca("paginación e imágenes")
+total_pages = max(1, (len(ids_f) + PER_PAGE - 1) // PER_PAGE)
 st.session_state.page = min(st.session_state.page, total_pages)
 colp1, colp2, colp3 = st.columns([1, 2, 1])
 with colp1:
@@ -238,43 +383,57 @@ colp2.markdown(f"<div style='text-align:center'>Página **{st.session_state.page
 
 start = (st.session_state.page - 1) * PER_PAGE
 end = start + PER_PAGE
-page_df = df_f.iloc[start:end]
+# Solo se materializan las filas de la página visible: O(tamaño de página)
+page_rows = cat.rows(ids_f[start:end])
+# Miniaturas de la página actual en paralelo (pool de procesos) antes de pintar
+get_imagenes().prefetch([r["image_hash"] for r in page_rows if r["image_hash"]])
+# Imágenes por URL: las de esta página se descargan en paralelo (espera acotada)
+# y las de la siguiente en segundo plano; las URLs rotas quedan en caché negativa.
+url_de = lambda rows: [r["image_url"] for r in rows if r["image_url"] and not r["image_hash"]]
+get_urls().resolver(url_de(page_rows), timeout=3.0)
+get_urls().prefetch(url_de(cat.rows(ids_f[end:end + PER_PAGE])))
 
 # =========================
 # Tabs
 # =========================
-tab_catalogo, tab_insights, tab_comp = st.tabs(["📒 Catálogo", "📊 Insights", "⚖️ Comparador"])
+# Con estado: Insights solo se arma (e importa Altair) cuando esa pestaña está abierta
+tab_catalogo, tab_insights, tab_comp = st.tabs(["📒 Catálogo", "📊 Insights", "⚖️ Comparador"],
+                                               key="pestana_catalogo", on_change="rerun")
 
 # ===== Catálogo (tarjetas con favoritos) =====
+perfil.marca("tarjetas")
+perfil.contar("tarjetas", len(page_rows))
 with tab_catalogo:
-    if page_df.empty:
+    if not page_rows:
         st.info("No hay productos con los filtros actuales.")
     else:
         cols_per_row = 3
-        chunks = [page_df.iloc[i:i+cols_per_row] for i in range(0, len(page_df), cols_per_row)]
+        chunks = [page_rows[i:i+cols_per_row] for i in range(0, len(page_rows), cols_per_row)]
         for ch in chunks:
             cols = st.columns(cols_per_row)
-            for idx, (_, row) in enumerate(ch.iterrows()):
+            for idx, row in enumerate(ch):
                 with cols[idx]:
                     with st.container(border=True):
-                        # Mostrar imagen (image_b64 > image_url > placeholder)
+                        # Mostrar imagen (miniatura por hash > image_url > placeholder)
                         showed = False
-                        if isinstance(row["image_b64"], str) and row["image_b64"]:
-                            b = b64_to_bytes(row["image_b64"])
+                        if isinstance(row["image_hash"], str) and row["image_hash"]:
+                            b = get_imagenes().thumbnail(row["image_hash"], "card")
                             if b:
                                 st.image(b, use_container_width=True)
                                 showed = True
                         if not showed and isinstance(row["image_url"], str) and row["image_url"]:
-                            try:
-                                st.image(row["image_url"], use_container_width=True)
+                            b = get_urls().thumbnail(row["image_url"], "card")
+                            if b:
+                                st.image(b, use_container_width=True)
                                 showed = True
-                            except Exception:
-                                pass
                         if not showed:
+                            # Una URL todavía en descarga se distingue de una rota (caché negativa)
+                            url = row["image_url"] if isinstance(row["image_url"], str) else ""
+                            aviso = "Cargando imagen…" if url and not get_urls().fallida(url) else "Imagen no disponible"
                             st.markdown(
                                 "<div style='width:100%;height:180px;background:linear-gradient(135deg,#fce7f3,#ffe4f0);"
                                 "border-radius:12px;display:flex;align-items:center;justify-content:center;"
-                                "color:#9d174d;font-weight:600;'>Imagen no disponible</div>",
+                                f"color:#9d174d;font-weight:600;'>{aviso}</div>",
                                 unsafe_allow_html=True
                             )
 
@@ -293,7 +452,9 @@ with tab_catalogo:
                             else:
                                 st.session_state.favs.add(row["id"])
                         if cta2.button("🗑️ Eliminar", key=f"del_{row['id']}"):
-                            st.session_state.items = [p for p in st.session_state.items if p["id"] != row["id"]]
+                            cat.delete(int(row["id"]))
+                            for ix in indices():
+                                ix.remove(row["id"])
                             if row["id"] in st.session_state.favs:
                                 st.session_state.favs.remove(row["id"])
                             st.rerun()
@@ -305,7 +466,7 @@ with tab_catalogo:
                                 nc = ec1.selectbox("Categoría", ["Rostro","Ojos","Labios"], index=["Rostro","Ojos","Labios"].index(row["categoría"]))
                                 na = ec2.text_input("Acabado", value=row["acabado"])
                                 nt = ec1.text_input("Tono", value=row["tono"])
-                                np = ec2.number_input("Precio", min_value=0.0, value=float(row["precio"]), step=0.5)
+                                nprecio = ec2.number_input("Precio", min_value=0.0, value=float(row["precio"]), step=0.5)
                                 nr = ec1.slider("Rating", 1.0, 5.0, float(row["rating"]), step=0.1)
                                 ns = ec2.number_input("Stock", min_value=0, value=int(row["stock"]), step=1)
                                 ncr = ec1.checkbox("Cruelty-free", value=bool(row["cruelty_free"]))
@@ -317,19 +478,19 @@ with tab_catalogo:
                                 nup = st.file_uploader("Subir nueva imagen", type=["jpg","jpeg","png","webp"], key=f"up_{row['id']}")
 
                                 if st.button("Guardar cambios", use_container_width=True):
-                                    image_b64 = row["image_b64"]
+                                    image_hash = row["image_hash"]
                                     if nup is not None:
-                                        image_b64 = imgfile_to_b64(nup)
-                                    # persistir
-                                    for it in st.session_state.items:
-                                        if it["id"] == row["id"]:
-                                            it.update({
-                                                "nombre": nn, "marca": nm, "categoría": nc, "acabado": na,
-                                                "tono": nt, "precio": float(np), "rating": float(nr),
-                                                "stock": int(ns), "cruelty_free": bool(ncr), "vegano": bool(nvg),
-                                                "descripcion": nd, "image_url": nurl, "image_b64": image_b64
-                                            })
-                                            break
+                                        image_hash = get_imagenes().put_file(nup) or image_hash
+                                    # persistir (acceso O(1) por id)
+                                    cat.update(int(row["id"]), {
+                                        "nombre": nn, "marca": nm, "categoría": nc, "acabado": na,
+                                        "tono": nt, "precio": float(nprecio), "rating": float(nr),
+                                        "stock": int(ns), "cruelty_free": bool(ncr), "vegano": bool(nvg),
+                                        "descripcion": nd, "image_url": nurl, "image_hash": image_hash
+                                    })
+                                    it = cat.get(int(row["id"]))
+                                    for ix in indices():
+                                        ix.update(it)
                                     st.success("Actualizado.")
                                     st.rerun()
 
@@ -337,97 +498,125 @@ with tab_catalogo:
         if not st.session_state.favs:
             st.write("_Aún no has marcado favoritos._")
         else:
-            fav_df = df[df["id"].isin(list(st.session_state.favs))]
+            fav_df = pd.DataFrame(cat.rows(sorted(st.session_state.favs)), columns=COLUMNAS)
+            perfil.frame("favoritos")
             st.dataframe(fav_df[["nombre","marca","precio","rating","categoría","acabado","tono"]], use_container_width=True, height=200)
 
 # ===== Insights =====
+perfil.marca("insights")
 with tab_insights:
-    if df_f.empty:
-        st.info("Ajusta filtros para ver gráficos.")
-    else:
-        left, right = st.columns(2)
-        # Distribución por categoría
-        cat_counts = df_f.groupby("categoría").size().reset_index(name="count")
-        chart_cat = (
-            alt.Chart(cat_counts)
-            .mark_bar()
-            .encode(
-                x=alt.X("categoría:N", title="Categoría"),
-                y=alt.Y("count:Q", title="Productos"),
-                tooltip=["categoría","count"]
-            )
-            .properties(height=320)
-        )
-        left.altair_chart(chart_cat, use_container_width=True)
-
-        # Precio vs Rating por marca
-        chart_scatter = (
-            alt.Chart(df_f)
-            .mark_circle(size=120)
-            .encode(
-                x=alt.X("precio:Q", title="Precio (S/.)"),
-                y=alt.Y("rating:Q", title="Rating"),
-                color=alt.Color("marca:N", title="Marca"),
-                tooltip=["nombre","marca","precio","rating","categoría","acabado","tono"]
-            )
-            .properties(height=320)
-        )
-        right.altair_chart(chart_scatter, use_container_width=True)
-
-        st.markdown("#### 💵 Precio promedio por marca")
-        brand_price = df_f.groupby("marca")["precio"].mean().reset_index()
-        chart_price = (
-            alt.Chart(brand_price)
-            .mark_bar()
-            .encode(
-                x=alt.X("marca:N", title="Marca"),
-                y=alt.Y("precio:Q", title="Precio promedio"),
-                tooltip=["marca", alt.Tooltip("precio:Q", format=".2f")]
-            )
-            .properties(height=280)
-        )
-        st.altair_chart(chart_price, use_container_width=True)
+    if tab_insights.open:
+        from catalogo_graficos import chart_categorias, chart_precio_marca, chart_scatter
+
+        if not len(ids_f):
+            st.info("Ajusta filtros para ver gráficos.")
+        else:
+            # Los gráficos reciben solo las columnas que codifican y se memoizan por filtro_key
+            charts = st.session_state.charts
+            left, right = st.columns(2)
+            # Distribución por categoría
+            left.altair_chart(charts.get(("cat", filtro_key), lambda: chart_categorias(resumen.por_categoria)), use_container_width=True)
+
+            # Precio vs Rating por marca (densidad agregada en catálogos grandes)
+            right.altair_chart(charts.get(("scatter", filtro_key), lambda: chart_scatter(df_filtrado())), use_container_width=True)
+
+            st.markdown("#### 💵 Precio promedio por marca")
+            st.altair_chart(charts.get(("marca", filtro_key), lambda: chart_precio_marca(resumen.precio_marca)), use_container_width=True)
 
 # ===== Comparador =====
+perfil.marca("comparador")
 with tab_comp:
-    opciones = df_f["nombre"].tolist()
-    sel = st.multiselect("Selecciona hasta 4 productos", options=opciones, max_selections=4)
+    # Selección por id: los nombres pueden repetirse. Las opciones son la página visible,
+    # los favoritos y lo ya elegido (no todo el filtro); los nombres salen de una sola lectura.
+    if "comp_sel" not in st.session_state:
+        st.session_state.comp_sel = []
+    ref_actual = st.session_state.get("sim_ref")
+    opciones = list(dict.fromkeys([*ids_f[start:end].tolist(), *sorted(st.session_state.favs),
+                                   *st.session_state.comp_sel, *([ref_actual] if ref_actual is not None else [])]))
+    nombres = cat.nombres(opciones)
+    opciones = [i for i in opciones if i in nombres]
+    etiqueta = lambda i: f"{nombres[i]} (#{i})" if i in nombres else f"#{i}"
+    st.session_state.comp_sel = [i for i in st.session_state.comp_sel if i in nombres]
+    sel = st.multiselect("Selecciona hasta 4 productos", options=opciones, format_func=etiqueta,
+                         max_selections=4, key="comp_sel",
+                         help="Productos de la página actual, favoritos y los ya elegidos.")
     if not sel:
         st.info("Elige productos para comparar.")
     else:
-        comp = df[df["nombre"].isin(sel)].copy()
+        comp = pd.DataFrame(cat.rows(sel), columns=COLUMNAS)
+        perfil.frame("comparador")
         show_cols = ["nombre","marca","categoría","acabado","tono","precio","rating","cruelty_free","vegano","stock","descripcion"]
         st.dataframe(comp[show_cols], use_container_width=True, height=240)
-
+        thumbs = [(r["nombre"], get_imagenes().thumbnail(r["image_hash"], "comp")) for _, r in comp.iterrows() if r["image_hash"]]
+        if thumbs:
+            tcols = st.columns(len(thumbs))
+            for tc, (nombre_t, b) in zip(tcols, thumbs):
+                if b:
+                    tc.image(b, caption=nombre_t)
+
+        from catalogo_graficos import chart_comparador
         st.markdown("##### Comparativa visual (normalizada 0-1)")
-        comp_norm = comp.assign(
-            precio_n = (comp["precio"] - comp["precio"].min()) / (comp["precio"].max() - comp["precio"].min() + 1e-9),
-            rating_n = (comp["rating"] - comp["rating"].min()) / (comp["rating"].max() - comp["rating"].min() + 1e-9),
-            stock_n  = (comp["stock"]  - comp["stock"].min())  / (comp["stock"].max()  - comp["stock"].min()  + 1e-9),
-        )[["nombre","precio_n","rating_n","stock_n"]].melt("nombre", var_name="métrica", value_name="valor")
-
-        chart_comp = (
-            alt.Chart(comp_norm)
-            .mark_bar()
-            .encode(
-                x=alt.X("nombre:N", title="Producto"),
-                y=alt.Y("valor:Q", title="Valor normalizado"),
-                color=alt.Color("métrica:N", title="Métrica"),
-                tooltip=["nombre","métrica", alt.Tooltip("valor:Q", format=".2f")]
-            )
-            .properties(height=260)
-        )
-        st.altair_chart(chart_comp, use_container_width=True)
+        comp_key = ("comp", cat.version, tuple(sel))
+        st.altair_chart(st.session_state.charts.get(comp_key, lambda: chart_comparador(comp)), use_container_width=True)
+
+    st.markdown("##### 🔍 Productos similares")
+    s1, s2 = st.columns([3, 1])
+    if ref_actual is not None and ref_actual not in nombres:
+        st.session_state.sim_ref = None
+    ref = s1.selectbox("Producto de referencia", options=opciones, format_func=etiqueta,
+                       index=None, placeholder="Elige un producto…", key="sim_ref")
+    k_sim = s2.slider("Cuántos", 1, 10, 4)
+    if ref is not None:
+        # La matriz de features se arma una vez por versión del catálogo
+        if DB_PATH:
+            sim = similares_compartido(cat.version)
+        else:
+            sim = st.session_state.get("similares")
+            if sim is None or sim.version != cat.version:
+                sim = st.session_state.similares = SimilarIndex(cat.view(), cat.version)
+        vecinos = sim.vecinos(ref, k_sim)
+        por_id = {r["id"]: r for r in cat.rows([i for i, _ in vecinos])}
+        tabla = pd.DataFrame([{**por_id[i], "distancia": round(d, 3)} for i, d in vecinos if i in por_id])
+        if tabla.empty:
+            st.info("No hay otros productos para comparar.")
+        else:
+            st.dataframe(tabla[["id","nombre","marca","categoría","acabado","precio","rating","stock","distancia"]],
+                         use_container_width=True, height=220, hide_index=True)
+
+            def _comparar_similares(ids):
+                st.session_state.comp_sel = ids
+
+            st.button("⚖️ Comparar con los más parecidos", on_click=_comparar_similares,
+                      args=([ref] + [i for i, _ in vecinos[:3]],))
 
 # =========================
 # Tips
 # =========================
+perfil.marca("tips")
 with st.expander("💡 Tips rápidos"):
     st.markdown(
         """
-- **Favoritos** se guardan en esta sesión; para persistir el catálogo, usa **Exportar JSON**.
-- Puedes **importar** el mismo JSON más adelante para recuperar todo (incluidas imágenes subidas, embebidas en base64).
-- Para imágenes por **URL**, prefiere enlaces directos a `.jpg`, `.png` o `.webp`.
+- **Favoritos** se guardan en esta sesión; para persistir el catálogo, usa **Exportar catálogo**.
+- El **ZIP** guarda el catálogo en NDJSON y las imágenes aparte; impórtalo tal cual para recuperar todo.
+- El **JSON** sigue embebiendo las imágenes en base64 (más pesado, compatible con versiones anteriores).
+- Con la variable de entorno `MAKEUP_DB=catalogo.db` el catálogo se guarda en SQLite y lo comparten todas las sesiones.
+- Para imágenes por **URL**, prefiere enlaces directos a `.jpg`, `.png` o `.webp`; se descargan una vez y quedan en caché.
+- **Deshacer/Rehacer** (barra lateral) cubre altas, ediciones, importaciones y *Reiniciar*; recargar con el mismo `?sesion=` recupera el catálogo.
 """
     )
 
+# =========================
+# Diario: un delta por rerun que cambió algo
+# =========================
+perfil.marca("diario")
+if diario is not None:
+    registrar_sesion()
+    with st.sidebar:
+        st.markdown("---")
+        d1, d2 = st.columns(2)
+        d1.button("↩️ Deshacer", on_click=lambda: restaurar_sesion(diario.deshacer()),
+                  disabled=not diario.puede_deshacer, use_container_width=True)
+        d2.button("↪️ Rehacer", on_click=lambda: restaurar_sesion(diario.rehacer()),
+                  disabled=not diario.puede_rehacer, use_container_width=True)
+
+perfil.panel()
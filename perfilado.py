@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+import streamlit as st
+
+# =========================
+# Perfilado por rerun (opcional): fases con tiempo, DataFrames creados y bytes enviados
+# =========================
+# Se activa con APP_PERFIL=1 o con ?perfil=1 en la URL. Apagado, cada marca/fase
+# es una llamada vacía. Encendido, muestra un panel al pie de la página y agrega
+# una línea por rerun a APP_TRAZA (JSONL) para analizar después. Los DataFrames se
+# cuentan donde las apps los materializan (perfil.frame), sin parchear pandas.
+# Un rerun que termina en st.rerun()/st.stop() o con un error no llega al panel:
+# su línea la escribe `cierre()` (lanzador app.py) o, corriendo la página sola, el
+# inicio del rerun siguiente de la misma sesión.
+PERFIL_ENV = os.environ.get("APP_PERFIL", "") not in ("", "0")
+TRAZA = Path(os.environ.get("APP_TRAZA", ".perfil/traza.jsonl"))
+HISTORIA = 20
+_ABIERTO = "_perfil_abierto"     # perfil del rerun en curso de esta sesión (session_state)
+
+_lock_traza = threading.Lock()
+_local = threading.local()       # perfil del rerun que corre en este hilo
+
+
+def _contar_bytes() -> bool:
+    """Mide los bytes que esta sesión manda al navegador. Streamlit no ofrece un gancho
+    público para eso: se envuelve ScriptRunContext._enqueue (una vez por contexto) solo
+    si la versión instalada lo tiene; si no, el perfil sale sin bytes ni mensajes. El
+    envoltorio suma al perfil del hilo (_local), así el contexto no guarda nada nuestro."""
+    try:
+        from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+    except ImportError:
+        return False
+    ctx = get_script_run_ctx()
+    original = getattr(ctx, "_enqueue", None)
+    if ctx is None or not callable(original):
+        return False
+    if getattr(original, "_perfilado", False):
+        return True
+
+    def enqueue(msg):
+        p = getattr(_local, "perfil", None)
+        if p is not None and p.midiendo and p.bytes is not None:
+            p.bytes += msg.ByteSize()
+            p.mensajes += 1
+            p.t_ultimo = time.perf_counter()
+        original(msg)
+
+    enqueue._perfilado = True
+    ctx._enqueue = enqueue
+    return True
+
+
+class Perfil:
+    """Cronómetro de un rerun. `marca(nombre)` cierra la fase anterior y abre otra
+    (cómodo en scripts planos); `fase(nombre)` mide un bloque anidado."""
+
+    def __init__(self, app: str, activo: bool):
+        self.app = app
+        self.activo = activo
+        self.midiendo = activo
+        self.t0 = self.t_ultimo = time.perf_counter()   # t_ultimo: última actividad medida
+        self.fases: Dict[str, List[float]] = {}     # nombre -> [segundos, llamadas]
+        self.contadores: Dict[str, float] = {}
+        self.frames = 0
+        self.bytes = self.mensajes = None           # None: esta versión de Streamlit no deja medirlos
+        self._pila: List[str] = []
+        self._marca: tuple | None = None
+
+    def _sumar(self, nombre: str, seg: float) -> None:
+        acc = self.fases.setdefault(nombre, [0.0, 0])
+        acc[0] += seg
+        acc[1] += 1
+
+    def marca(self, nombre: str) -> None:
+        if not self.activo:
+            return
+        ahora = self.t_ultimo = time.perf_counter()
+        if self._marca is not None:
+            self._sumar(self._marca[0], ahora - self._marca[1])
+        self._marca = (nombre, ahora)
+
+    @contextmanager
+    def fase(self, nombre: str):
+        if not self.activo:
+            yield
+            return
+        self._pila.append(nombre)
+        clave = "/".join(self._pila)
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.t_ultimo = time.perf_counter()
+            self._sumar(clave, self.t_ultimo - t)
+            self._pila.pop()
+
+    def contar(self, nombre: str, n: float = 1) -> None:
+        if self.activo:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def frame(self, nombre: str) -> None:
+        """Anota un DataFrame materializado por la app (total y por origen)."""
+        if self.activo:
+            self.frames += 1
+            self.contar(f"DataFrame: {nombre}")
+
+    def cerrar(self, fin: str = "completo") -> Dict | None:
+        """Cierra la última fase, deja de medir y escribe la línea de traza (una sola vez).
+        `fin` dice cómo terminó el rerun: completo, rerun, stop, error o cortado (sin
+        más detalle); si no terminó completo, el total llega hasta la última actividad."""
+        if not self.midiendo:
+            return None
+        self.midiendo = False
+        fin_t = time.perf_counter() if fin in ("completo", "rerun", "stop", "error") else self.t_ultimo
+        if self._marca is not None:
+            self._sumar(self._marca[0], fin_t - self._marca[1])
+            self._marca = None
+        registro = {
+            "ts": time.time(), "app": self.app, "fin": fin,
+            "total_ms": (fin_t - self.t0) * 1000,
+            "fases": {k: {"ms": v[0] * 1000, "n": v[1]} for k, v in self.fases.items()},
+            "contadores": self.contadores,
+            "frames": self.frames, "bytes": self.bytes, "mensajes": self.mensajes,
+        }
+        try:
+            TRAZA.parent.mkdir(parents=True, exist_ok=True)
+            with _lock_traza, TRAZA.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError:
+            pass   # sin disco escribible igual se ve el panel
+        return registro
+
+    def panel(self) -> None:
+        """Cierra el perfil y lo muestra en un expander al pie (con los últimos reruns)."""
+        registro = self.cerrar()
+        if registro is None:
+            return
+        st.session_state.pop(_ABIERTO, None)
+        import pandas as pd
+        historia = st.session_state.setdefault("_perfil_historia", [])
+        historia.append(registro)
+        del historia[:-HISTORIA]
+        with st.expander(f"🐞 Perfil del rerun — {registro['total_ms']:.0f} ms"):
+            c1, c2, c3 = st.columns(3)
+            c1.metric("DataFrames creados", registro["frames"])
+            medido = registro["bytes"] is not None
+            c2.metric("Enviado al navegador", f"{registro['bytes'] / 1024:.1f} KB" if medido else "—")
+            c3.metric("Mensajes", registro["mensajes"] if medido else "—")
+            st.dataframe(pd.DataFrame(
+                [{"Fase": k, "ms": round(v["ms"], 2), "Veces": v["n"]} for k, v in registro["fases"].items()],
+                columns=["Fase", "ms", "Veces"],
+            ).sort_values("ms", ascending=False), use_container_width=True, hide_index=True)
+            if registro["contadores"]:
+                st.json(registro["contadores"])
+            st.caption(f"Últimos {len(historia)} reruns (ms): "
+                       + ", ".join(f"{r['total_ms']:.0f}" for r in historia) + f" · traza: {TRAZA}")
+
+
+def iniciar(app: str) -> Perfil:
+    """Perfil para este rerun; inactivo (costo ~0) salvo APP_PERFIL=1 o ?perfil=1."""
+    previo = st.session_state.get(_ABIERTO)
+    if previo is not None:
+        previo.cerrar("cortado")   # el rerun anterior no llegó al panel y nadie lo cerró
+        st.session_state.pop(_ABIERTO, None)
+    activo = PERFIL_ENV or st.query_params.get("perfil") == "1"
+    p = _local.perfil = Perfil(app, activo)
+    if activo:
+        st.session_state[_ABIERTO] = p
+        if _contar_bytes():
+            p.bytes = p.mensajes = 0
+    return p
+
+
+@contextmanager
+def cierre():
+    """Envuelve la ejecución de una página: si termina con st.rerun(), st.stop() o un
+    error, escribe igual la línea de traza de su perfil (con ese motivo)."""
+    try:
+        yield
+    except BaseException as e:
+        # Sin tocar session_state: tras st.stop() cualquier llamada a Streamlit vuelve a cortar
+        p = getattr(_local, "perfil", None)
+        if p is not None:
+            p.cerrar({"RerunException": "rerun", "StopException": "stop"}.get(type(e).__name__, "error"))
+        raise
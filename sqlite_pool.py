@@ -0,0 +1,57 @@
+import queue
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator, List
+
+# =========================
+# Pool de conexiones SQLite (compartido por el catálogo y la agenda)
+# =========================
+
+
+class Pool:
+    """Conexiones SQLite reutilizables entre hilos (una sesión de Streamlit = un hilo).
+    WAL permite lectores concurrentes mientras un único escritor hace commit."""
+
+    def __init__(self, ruta: str, tamano: int = 4, timeout: float = 30.0):
+        self.ruta = ruta
+        self.timeout = timeout
+        self._libres: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._todas: List[sqlite3.Connection] = []
+        for _ in range(max(tamano, 1)):
+            con = self._abrir()
+            self._todas.append(con)
+            self._libres.put(con)
+
+    def _abrir(self) -> sqlite3.Connection:
+        # isolation_level=None: las transacciones se abren a mano (BEGIN IMMEDIATE)
+        con = sqlite3.connect(self.ruta, timeout=self.timeout, check_same_thread=False, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute("PRAGMA temp_store=MEMORY")
+        con.execute("PRAGMA cache_size=-16000")   # ~16 MB por conexión
+        return con
+
+    @contextmanager
+    def conexion(self) -> Iterator[sqlite3.Connection]:
+        con = self._libres.get(timeout=self.timeout)
+        try:
+            yield con
+        finally:
+            self._libres.put(con)
+
+    @contextmanager
+    def transaccion(self) -> Iterator[sqlite3.Connection]:
+        """Escritura atómica: toma el lock de escritura al empezar para no fallar a medias."""
+        with self.conexion() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+
+    def close(self) -> None:
+        for con in self._todas:
+            con.close()
+        self._todas.clear()
@@ -1,26 +1,76 @@
 import datetime as dt
 from typing import List, Dict
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
+from agenda_conflictos import IntervalTree, con_conflicto, detectar, fijar_inicio, resolver
+from agenda_export import (FORMATOS, PLANTILLAS, Exportador, Plantilla, firma, iter_csv, iter_ics,
+                           iter_markdown, unir, zip_reuniones)
+from agenda_import import importar as importar_agenda
+from agenda_lote import TIPOS, a_tabla, aplicar, diff
+from agenda_optimizador import Restricciones, aplicar_plan, optimizar
+from agenda_store import AGENDA_DB, AgendaStore, a_partes, de_partes, rango
+from agenda_tiempos import agregar, cambiar_duracion, eliminar, mover
+from agenda_zonas import ZONAS_COMUNES, convertir, etiqueta, horas_por_bloque, valida
+from instantaneas import diario_sesion
+from perfilado import iniciar as iniciar_perfil
 
 # -----------------------------
 # Configuración básica
 # -----------------------------
 st.set_page_config(page_title="Agenda Simple", page_icon="📝", layout="wide")
+perfil = iniciar_perfil("tarea01")   # APP_PERFIL=1 o ?perfil=1 para ver el panel de tiempos
+perfil.marca("inicio")
 st.title("📝 Agenda de Reunión — Versión Simple")
 st.caption("Edición básica, visualización tipo timeline con Altair y exportación a CSV/Markdown.")
 
+
+@st.cache_resource
+def get_store() -> AgendaStore:
+    """Una base SQLite compartida por todas las sesiones (reuniones guardadas)."""
+    return AgendaStore(AGENDA_DB)
+
+
+@st.cache_resource
+def get_exportador() -> Exportador:
+    """Documentos exportados, por hash del contenido (compartidos entre sesiones)."""
+    return Exportador()
+
+
+store = get_store()
+exportador = get_exportador()
+
 # -----------------------------
 # Estado inicial
 # -----------------------------
+perfil.marca("estado")
 if "agenda" not in st.session_state:
     st.session_state.agenda: List[Dict] = []
+if "next_id" not in st.session_state:
+    st.session_state.next_id = 1          # _id estable de cada bloque (la posición cambia)
+if "arbol" not in st.session_state:
+    st.session_state.arbol = IntervalTree()   # intervalos _start_dt/_end_dt por _id
+if "zonas" not in st.session_state:
+    st.session_state.zonas: List[str] = []   # zonas de los participantes (además de la de la reunión)
+if "disponibilidad" not in st.session_state:
+    st.session_state.disponibilidad = pd.DataFrame({"Responsable": pd.Series(dtype="str"),
+                                                    "Desde": pd.Series(dtype="object"),
+                                                    "Hasta": pd.Series(dtype="object")})
+if "plan" not in st.session_state:
+    st.session_state.plan = None           # último resultado del optimizador (sin aplicar)
+if "reunion_id" not in st.session_state:
+    st.session_state.reunion_id = None     # id en la base; None = reunión sin guardar
+if "agenda_version" not in st.session_state:
+    st.session_state.agenda_version = 0    # sube con cada cambio de bloques u orden (ver tocar_agenda)
 
-if "meta" not in st.session_state:
-    st.session_state.meta = {
+
+def tocar_agenda() -> None:
+    """Marca la agenda como cambiada: el diario solo la recorre si subió la versión."""
+    st.session_state.agenda_version += 1
+
+def meta_inicial() -> Dict:
+    return {
         "titulo": "Reunión general",
         "fecha": dt.date.today(),
         "zona": "America/Lima",
@@ -29,9 +79,54 @@ if "meta" not in st.session_state:
         "link": "",
     }
 
+
+if "meta" not in st.session_state:
+    st.session_state.meta = meta_inicial()
+
+
+def poner_agenda(meta: Dict, agenda: List[Dict]) -> None:
+    """Reemplaza la agenda de la sesión (y rearma el árbol de intervalos)."""
+    st.session_state.meta, st.session_state.agenda = meta, agenda
+    st.session_state.arbol = IntervalTree((it["_id"], it["_start_dt"], it["_end_dt"]) for it in agenda)
+    st.session_state.next_id = max((it["_id"] for it in agenda), default=0) + 1
+    tocar_agenda()
+    # Los minutos de la lista guardan su propio valor de widget: se descartan para que
+    # muestren los de la agenda nueva (si no, reaplicarían los anteriores)
+    for k in [k for k in st.session_state if str(k).startswith("min_")]:
+        del st.session_state[k]
+
+
+def abrir(reunion_id: int) -> bool:
+    """Carga una reunión guardada en la sesión (agenda, metadatos y árbol)."""
+    cargada = store.cargar(reunion_id)
+    if cargada is None:
+        return False
+    poner_agenda(*cargada)
+    st.session_state.reunion_id = reunion_id
+    return True
+
+
+def partes_sesion(completo: bool = True) -> Dict:
+    """Meta siempre (son pocos campos); bloques y orden solo si la agenda cambió de
+    versión desde el último registro, así un rerun sin cambios no la recorre."""
+    cambio = completo or st.session_state.get("diario_agenda") != st.session_state.agenda_version
+    st.session_state.diario_agenda = st.session_state.agenda_version
+    return a_partes(st.session_state.meta, st.session_state.agenda if cambio else None,
+                    st.session_state.zonas, st.session_state.reunion_id)
+
+
+def restaurar_sesion(partes: Dict) -> None:
+    meta, agenda, st.session_state.zonas, st.session_state.reunion_id = de_partes(partes)
+    poner_agenda(meta, agenda)
+
+
+# Deshacer / rehacer / recuperar: base + diario de deltas en disco, por pestaña (?sesion=)
+diario = diario_sesion("tarea01", partes_sesion, restaurar_sesion)
+
 # -----------------------------
 # Sidebar (metadatos)
 # -----------------------------
+perfil.marca("sidebar")
 with st.sidebar:
     st.subheader("⚙️ Datos de la reunión")
     st.session_state.meta["titulo"]   = st.text_input("Título", st.session_state.meta["titulo"])
@@ -40,30 +135,82 @@ with st.sidebar:
     st.session_state.meta["anfitrion"]= st.text_input("Anfitrión", st.session_state.meta["anfitrion"])
     st.session_state.meta["link"]     = st.text_input("Link (opcional)", st.session_state.meta["link"])
     st.session_state.meta["zona"]     = st.text_input("Zona horaria", st.session_state.meta["zona"])
+    if not valida(st.session_state.meta["zona"]):
+        st.warning("Zona horaria desconocida (usa nombres IANA, p. ej. America/Lima); se usa UTC.")
+    st.session_state.zonas = st.multiselect(
+        "Zonas de participantes", sorted(set(ZONAS_COMUNES) | set(st.session_state.zonas)),
+        st.session_state.zonas, help="Las horas de la agenda son de la zona de la reunión.")
 
     st.markdown("---")
     if st.button("🧹 Vaciar agenda"):
         st.session_state.agenda = []
+        st.session_state.arbol = IntervalTree()
+        tocar_agenda()
         st.success("Agenda vaciada.")
 
+    st.markdown("---")
+    st.subheader("📅 Reuniones guardadas")
+    rid = st.session_state.reunion_id
+    st.caption(f"Reunión #{rid}" if rid is not None else "Esta reunión todavía no está guardada.")
+    g1, g2 = st.columns(2)
+    if g1.button("💾 Guardar", use_container_width=True):
+        st.session_state.reunion_id = store.guardar(st.session_state.meta, st.session_state.agenda, rid)
+        st.success("Reunión guardada.")
+    if g2.button("➕ Nueva", use_container_width=True):
+        st.session_state.agenda = []
+        st.session_state.arbol = IntervalTree()
+        tocar_agenda()
+        st.session_state.meta = meta_inicial()
+        st.session_state.reunion_id = None
+        st.rerun()
+    if rid is not None and st.button("🗑️ Eliminar de la base", use_container_width=True):
+        store.eliminar(rid)
+        st.session_state.reunion_id = None
+        st.rerun()
+
+def sincronizar(cambiados: List[int]) -> None:
+    """Lleva al árbol de intervalos los bloques que el re-cálculo movió."""
+    tocar_agenda()
+    for k in cambiados:
+        it = st.session_state.agenda[k]
+        st.session_state.arbol.add(it["_id"], it["_start_dt"], it["_end_dt"])
+
 # -----------------------------
 # Helper: construir DataFrame
 # -----------------------------
 def build_df() -> pd.DataFrame:
-    if not st.session_state.agenda:
-        return pd.DataFrame(columns=["Tema","Responsable","Inicio","Fin","Min","Tipo","Objetivo"])
-    df = pd.DataFrame(st.session_state.agenda)
-    df = df[["Tema","Responsable","Inicio","Fin","Min","Tipo","Objetivo"]]
-    return df
+    with perfil.fase("build_df"):
+        if not st.session_state.agenda:
+            return pd.DataFrame(columns=["Tema","Responsable","Inicio","Fin","Min","Tipo","Objetivo"])
+        df = pd.DataFrame(st.session_state.agenda)
+        df = df[["Tema","Responsable","Inicio","Fin","Min","Tipo","Objetivo"]]
+        perfil.frame("build_df")
+        return df
+
+def zona_reunion() -> str:
+    z = st.session_state.meta["zona"]
+    return z if valida(z) else "UTC"
+
+
+def por_zona() -> pd.DataFrame:
+    """Toda la agenda en la zona de la reunión y en cada zona de participantes (vectorizado)."""
+    agenda = st.session_state.agenda
+    perfil.frame("por_zona")
+    return convertir([it["_start_dt"] for it in agenda], [it["Min"] for it in agenda],
+                     zona_reunion(), st.session_state.zonas)
+
 
 # -----------------------------
 # Pestañas
 # -----------------------------
-tab_edit, tab_view, tab_minutes = st.tabs(["✍️ Editar", "📊 Visualizar", "🧾 Acta (Markdown)"])
+# Con estado: las pestañas con gráficos solo se arman (e importan Altair) cuando están abiertas
+tab_edit, tab_view, tab_cal, tab_minutes = st.tabs(["✍️ Editar", "📊 Visualizar", "📅 Calendario",
+                                                    "🧾 Acta (Markdown)"], key="pestana_agenda", on_change="rerun")
 
 # =============================
 # TAB: EDITAR
 # =============================
+perfil.marca("editar")
 with tab_edit:
     st.subheader("Agregar punto de agenda")
     with st.form("form_add", clear_on_submit=True):
@@ -72,7 +219,7 @@ with tab_edit:
         responsable = c2.text_input("Responsable")
         hora_inicio = c3.time_input("Hora inicio", value=dt.time(9, 0))
         minutos = c4.number_input("Minutos", min_value=5, max_value=240, value=15, step=5)
-        tipo = c5.selectbox("Tipo", ["Discusión","Decisión","Información"])
+        tipo = c5.selectbox("Tipo", TIPOS)
         objetivo = st.text_area("Objetivo (breve)", placeholder="¿Qué se busca lograr?")
         auto = st.checkbox("Auto-secuenciar después del último bloque")
 
@@ -82,15 +229,12 @@ with tab_edit:
                 st.error("El tema es obligatorio.")
             else:
                 fecha = st.session_state.meta["fecha"]
-                if auto and st.session_state.agenda:
-                    last_end = st.session_state.agenda[-1]["_end_dt"]
-                    start_dt = last_end
-                    hora_inicio = last_end.time()
-                else:
-                    start_dt = dt.datetime.combine(fecha, hora_inicio)
-
+                start_dt = dt.datetime.combine(fecha, hora_inicio)
                 end_dt = start_dt + dt.timedelta(minutes=int(minutos))
-                st.session_state.agenda.append({
+                item_id = st.session_state.next_id
+                st.session_state.next_id += 1
+                # Con auto-secuenciar el bloque queda encadenado: su hora la fija el motor
+                agregar(st.session_state.agenda, {
                     "Tema": tema.strip(),
                     "Responsable": responsable.strip() if responsable else "—",
                     "Inicio": start_dt.strftime("%H:%M"),
@@ -100,132 +244,438 @@ with tab_edit:
                     "Objetivo": objetivo.strip(),
                     "_start_dt": start_dt,
                     "_end_dt": end_dt,
+                    "_id": item_id,
+                    "_auto": bool(auto),
                 })
+                nuevo = st.session_state.agenda[-1]
+                # Choques con lo ya cargado: consulta al árbol de intervalos, O(log n + k)
+                choques = st.session_state.arbol.solapados(nuevo["_start_dt"], nuevo["_end_dt"])
+                st.session_state.arbol.add(item_id, nuevo["_start_dt"], nuevo["_end_dt"])
+                tocar_agenda()
                 st.success(f"Agregado: {tema}")
+                if choques:
+                    temas = {it["_id"]: it["Tema"] for it in st.session_state.agenda}
+                    st.warning("Se cruza con: " + ", ".join(temas[c] for c in choques))
+
+    with st.expander("📥 Importar CSV / ICS"):
+        st.caption("CSV con las columnas del exportado (Fecha opcional) o calendario ICS. "
+                   "Los bloques que ya están (mismo tema, inicio y responsable) se omiten.")
+        up_agenda = st.file_uploader("Archivo", type=["csv", "ics"], key="import_agenda")
+        # El uploader conserva el archivo entre reruns: se importa una vez por archivo subido
+        if up_agenda is not None and st.session_state.get("import_agenda_ok") != up_agenda.file_id:
+            barra = st.progress(0.0, text="Importando…")
+            agenda, arbol = st.session_state.agenda, st.session_state.arbol
+            antes, listo = len(agenda), False
+            try:
+                res, next_id = importar_agenda(
+                    up_agenda, up_agenda.name, agenda, arbol,
+                    st.session_state.next_id, st.session_state.meta["fecha"], zona_reunion(),
+                    progreso=lambda filas, leidos, total: barra.progress(
+                        min(leidos / max(total, 1), 1.0), text=f"Importando… {filas} filas"))
+                listo = True
+                st.session_state.next_id = next_id
+                st.session_state.import_agenda_res, st.session_state.import_agenda_error = res, None
+                st.session_state.import_agenda_ok = up_agenda.file_id
+                tocar_agenda()
+            except Exception as e:   # archivo ilegible o mal formado: se informa una vez, sin reintentar
+                st.session_state.import_agenda_res = None
+                st.session_state.import_agenda_error = f"No se pudo importar el archivo: {e}"
+                st.session_state.import_agenda_ok = up_agenda.file_id
+            finally:
+                if not listo:
+                    # El import solo agrega al final: se quitan los lotes que alcanzó a volcar
+                    for it in agenda[antes:]:
+                        arbol.remove(it["_id"])
+                    del agenda[antes:]
+                barra.empty()
+        if st.session_state.get("import_agenda_error"):
+            st.error(st.session_state.import_agenda_error)
+        res = st.session_state.get("import_agenda_res")
+        if res is not None:
+            st.success(f"Importados {res.agregados} de {res.filas} registros "
+                       f"({res.duplicados} repetidos, {len(res.errores)} con error, "
+                       f"{res.conflictos} choques nuevos).")
+            if res.errores:
+                st.dataframe(pd.DataFrame(res.errores[:500], columns=["Fila", "Motivo"]),
+                             use_container_width=True, hide_index=True, height=200)
 
     st.markdown("### Reordenar / Editar rápido")
     df = build_df()
     if df.empty:
         st.info("Aún no hay puntos.")
     else:
-        # Lista con controles de reordenamiento/eliminación
-        for i, item in enumerate(st.session_state.agenda):
+        with perfil.fase("conflictos"):
+            conflictos = detectar(st.session_state.agenda)
+        if conflictos:
+            temas = {it["_id"]: it["Tema"] for it in st.session_state.agenda}
+            dobles = sum(c.tipo == "responsable" for c in conflictos)
+            st.warning(f"⚠️ {len(conflictos)} bloques se cruzan ({dobles} con el mismo responsable).")
+            with st.expander("Ver conflictos"):
+                st.dataframe(pd.DataFrame([
+                    {"Bloque": temas[c.a], "Choca con": temas[c.b],
+                     "Tipo": "Mismo responsable" if c.tipo == "responsable" else "Solape",
+                     "Min": round(c.minutos)}
+                    for c in conflictos
+                ]), use_container_width=True, hide_index=True)
+            r1, r2 = st.columns([2, 1])
+            modo = r1.radio("Resolver", ["Todos los bloques", "Solo mismo responsable"], horizontal=True)
+            if r2.button("🪄 Resolver conflictos", use_container_width=True):
+                # Atrasa lo mínimo posible cada bloque, sin cambiar el orden por hora
+                nuevos = resolver(st.session_state.agenda, solo_responsable=(modo != "Todos los bloques"))
+                for it in st.session_state.agenda:
+                    if it["_id"] in nuevos:
+                        fijar_inicio(it, nuevos[it["_id"]])
+                        st.session_state.arbol.add(it["_id"], it["_start_dt"], it["_end_dt"])
+                tocar_agenda()
+                st.rerun()
+
+        agenda = st.session_state.agenda
+        modo_edicion = st.radio("Modo de edición", ["Lista", "Tabla (por lotes)"], horizontal=True,
+                                index=0 if len(agenda) <= 30 else 1)
+
+    if not df.empty and modo_edicion == "Tabla (por lotes)":
+        # Todo se edita en la tabla y se aplica de una vez: diff -> una transacción -> un re-cálculo
+        st.caption("Cambia **Orden** para mover bloques, borra filas para eliminarlas. "
+                   "La hora de **Inicio** solo se respeta en bloques sin **Auto** (anclas).")
+        # La clave cambia con el contenido: las ediciones pendientes no se aplican sobre otra agenda
+        firma_tabla = hash(tuple((it["_id"], it["_start_dt"], it["Min"], it["Tema"], it["Responsable"],
+                                  it["Tipo"], it["Objetivo"], it.get("_auto")) for it in agenda))
+        with st.form("form_lote"):
+            editado = st.data_editor(
+                a_tabla(agenda), key=f"lote_{firma_tabla}", num_rows="dynamic", hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "ID": st.column_config.NumberColumn(disabled=True, width="small"),
+                    "Orden": st.column_config.NumberColumn(min_value=1, step=1, width="small"),
+                    "Inicio": st.column_config.TimeColumn(format="HH:mm", step=300),
+                    "Fin": st.column_config.TextColumn(disabled=True, width="small"),
+                    "Min": st.column_config.NumberColumn(min_value=5, max_value=240, step=5, width="small"),
+                    "Tipo": st.column_config.SelectboxColumn(options=TIPOS),
+                    "Auto": st.column_config.CheckboxColumn(help="Encadenado al bloque anterior"),
+                },
+            )
+            aplicar_lote = st.form_submit_button("💾 Aplicar cambios", use_container_width=True)
+        if aplicar_lote:
+            cambios, errores = diff(agenda, editado)
+            if errores:
+                st.error("No se aplicó nada:\n\n" + "\n\n".join(errores[:10]))
+            elif cambios.vacio([it["_id"] for it in agenda]):
+                st.info("Sin cambios.")
+            else:
+                nueva, st.session_state.next_id = aplicar(agenda, cambios, st.session_state.meta["fecha"],
+                                                          st.session_state.next_id)
+                antes = {it["_id"]: (it["_start_dt"], it["_end_dt"]) for it in agenda}
+                for item_id in cambios.borrados:
+                    st.session_state.arbol.remove(item_id)
+                for it in nueva:
+                    if antes.get(it["_id"]) != (it["_start_dt"], it["_end_dt"]):
+                        st.session_state.arbol.add(it["_id"], it["_start_dt"], it["_end_dt"])
+                st.session_state.agenda = nueva
+                tocar_agenda()
+                st.rerun()
+    elif not df.empty:
+        # Lista con controles de reordenamiento/eliminación. Cada cambio re-calcula
+        # solo los bloques encadenados (🔗) que siguen al punto editado; los 📌 son anclas.
+        for i, item in enumerate(agenda):
             with st.container(border=True):
                 c1, c2, c3, c4, c5 = st.columns([3,1.2,1.2,1,1])
                 c1.write(f"**{item['Tema']}** — {item['Responsable']}")
-                c2.write(f"{item['Inicio']} → {item['Fin']}")
+                c2.write(f"{'🔗' if item.get('_auto') else '📌'} {item['Inicio']} → {item['Fin']}")
                 c3.write(f"{item['Tipo']}")
-                c4.write(f"{item['Min']} min")
+                nuevo_min = c4.number_input("Min", min_value=5, max_value=240, value=int(item["Min"]), step=5,
+                                            key=f"min_{item['_id']}", label_visibility="collapsed")
 
-                move_up = c5.button("▲", key=f"up_{i}", help="Mover arriba", use_container_width=True)
-                move_dn = c5.button("▼", key=f"dn_{i}", help="Mover abajo", use_container_width=True)
-                del_it  = c5.button("🗑️", key=f"del_{i}", help="Eliminar", use_container_width=True)
+                move_up = c5.button("▲", key=f"up_{item['_id']}", help="Mover arriba", use_container_width=True)
+                move_dn = c5.button("▼", key=f"dn_{item['_id']}", help="Mover abajo", use_container_width=True)
+                del_it  = c5.button("🗑️", key=f"del_{item['_id']}", help="Eliminar", use_container_width=True)
 
+                if nuevo_min != item["Min"]:
+                    sincronizar(cambiar_duracion(agenda, i, nuevo_min))
+                    st.rerun()
                 if move_up and i > 0:
-                    st.session_state.agenda[i-1], st.session_state.agenda[i] = st.session_state.agenda[i], st.session_state.agenda[i-1]
+                    sincronizar(mover(agenda, i, i - 1))
                     st.rerun()
-                if move_dn and i < len(st.session_state.agenda)-1:
-                    st.session_state.agenda[i+1], st.session_state.agenda[i] = st.session_state.agenda[i], st.session_state.agenda[i+1]
+                if move_dn and i < len(agenda)-1:
+                    sincronizar(mover(agenda, i, i + 1))
                     st.rerun()
                 if del_it:
-                    del st.session_state.agenda[i]
+                    borrado, cambiados = eliminar(agenda, i)
+                    st.session_state.arbol.remove(borrado["_id"])
+                    sincronizar(cambiados)
                     st.rerun()
 
-    st.markdown("### Exportar CSV")
-    df = build_df()
-    csv = df.to_csv(index=False).encode("utf-8")
-    st.download_button("⬇️ Descargar CSV", csv, file_name="agenda_simple.csv", mime="text/csv")
+    if not df.empty:
+        with st.expander("🧮 Optimizar orden y horarios"):
+            agenda = st.session_state.agenda
+            fecha = st.session_state.meta["fecha"]
+            temas = {it["_id"]: f"{it['Inicio']} · {it['Tema']}" for it in agenda}
+            o1, o2, o3 = st.columns(3)
+            hora_ini = o1.time_input("Inicio de la reunión", min(it["_start_dt"] for it in agenda).time())
+            dur_max = o2.number_input("Duración máxima (min, 0 = sin límite)", 0, 24 * 60, 0, step=15)
+            margen = o3.number_input("Decisiones: terminar N min antes del cierre", 0, 120, 10, step=5)
+            p1, p2, p3 = st.columns(3)
+            pausa_cada = p1.number_input("Pausa cada (min seguidos, 0 = sin pausas)", 0, 480, 90, step=15)
+            pausa_min = p2.number_input("Duración de la pausa", 5, 60, 10, step=5)
+            presupuesto = p3.slider("Tiempo de búsqueda (s)", 0.1, 3.0, 0.5, step=0.1)
+            fijos = st.multiselect("Bloques con hora fija", list(temas), format_func=temas.get,
+                                   help="Conservan su hora actual; el resto se reordena alrededor.")
+            st.caption("Disponibilidad por responsable (sin filas = disponible todo el día).")
+            st.session_state.disponibilidad = st.data_editor(
+                st.session_state.disponibilidad, key="disp_editor", num_rows="dynamic", hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "Responsable": st.column_config.SelectboxColumn(
+                        options=sorted({it["Responsable"] for it in agenda})),
+                    "Desde": st.column_config.TimeColumn(format="HH:mm", step=300),
+                    "Hasta": st.column_config.TimeColumn(format="HH:mm", step=300),
+                },
+            )
+            if st.button("🧮 Calcular plan", use_container_width=True):
+                r = Restricciones(
+                    inicio=dt.datetime.combine(fecha, hora_ini),
+                    duracion_max=int(dur_max) or None,
+                    fijos={it["_id"]: it["_start_dt"] for it in agenda if it["_id"] in fijos},
+                    decision_margen=int(margen), pausa_cada=int(pausa_cada) or None, pausa_min=int(pausa_min),
+                )
+                for fila in st.session_state.disponibilidad.dropna().to_dict("records"):
+                    r.disponibilidad.setdefault(fila["Responsable"], []).append(
+                        (dt.datetime.combine(fecha, fila["Desde"]), dt.datetime.combine(fecha, fila["Hasta"])))
+                st.session_state.plan = optimizar(agenda, r, presupuesto=presupuesto)
+
+            plan = st.session_state.plan
+            if plan is not None and set(plan.inicios) == set(temas):
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("Tiempo ocioso", f"{plan.ocio:.0f} min")
+                m2.metric("Violaciones", len(plan.violaciones))
+                m3.metric("Pausas", len(plan.pausas))
+                m4.metric("Búsqueda", f"{plan.segundos * 1000:.0f} ms", f"{plan.iteraciones} iteraciones",
+                          delta_color="off")
+                for v in plan.violaciones[:10]:
+                    st.warning(v)
+                st.dataframe(pd.DataFrame([
+                    {"Inicio": plan.inicios[i].strftime("%H:%M"), "Tema": temas[i].split(" · ", 1)[1],
+                     "Fijo": "📌" if i in fijos else ""}
+                    for i in plan.orden
+                ]), use_container_width=True, hide_index=True)
+                if st.button("✅ Aplicar plan", use_container_width=True):
+                    st.session_state.agenda = aplicar_plan(agenda, plan)
+                    st.session_state.arbol = IntervalTree((it["_id"], it["_start_dt"], it["_end_dt"])
+                                                          for it in st.session_state.agenda)
+                    st.session_state.plan = None
+                    tocar_agenda()
+                    st.rerun()
+
+    st.markdown("### Exportar")
+    # Nada se genera hasta el clic: la copia, la firma y el documento se arman en el callable
+    # (fuera del rerun), que reusa lo ya exportado con la misma firma
+    uid_base = f"reunion{st.session_state.reunion_id}" if st.session_state.reunion_id else "local"
+
+    def exportar(formato: str, build, meta=st.session_state.meta, agenda=st.session_state.agenda):
+        def data() -> bytes:
+            meta_exp, agenda_exp = dict(meta), [dict(it) for it in agenda]
+            return exportador.get((firma(meta_exp, agenda_exp), formato, uid_base),
+                                  lambda: build(meta_exp, agenda_exp))
+        return data
+
+    e1, e2 = st.columns(2)
+    e1.download_button("⬇️ Descargar CSV", file_name="agenda_simple.csv", mime="text/csv",
+                       data=exportar("csv", lambda meta_exp, agenda_exp: unir(iter_csv(agenda_exp))))
+    e2.download_button("📅 Descargar calendario (.ics)", file_name="agenda.ics", mime="text/calendar",
+                       data=exportar("ics", lambda meta_exp, agenda_exp: unir(iter_ics(meta_exp, agenda_exp, uid_base))))
 
 # =============================
 # TAB: VISUALIZAR
 # =============================
+perfil.marca("visualizar")
 with tab_view:
-    st.subheader("Timeline (Altair)")
-    df = build_df()
-    if df.empty:
-        st.info("Añade puntos para ver la visualización.")
-    else:
-        # Data para Altair
-        fecha = st.session_state.meta["fecha"]
-        vis_df = pd.DataFrame([
-            {
-                "Tema": it["Tema"],
-                "Responsable": it["Responsable"],
-                "Inicio": it["_start_dt"],
-                "Fin": it["_end_dt"],
-                "Tipo": it["Tipo"],
-                "Duración": it["Min"],
-                "Tooltip": f"{it['Tema']} ({it['Inicio']}–{it['Fin']})"
-            }
-            for it in st.session_state.agenda
-        ])
-        # Ordenar por hora
-        vis_df = vis_df.sort_values("Inicio")
-
-        # Escala temporal
-        base = alt.Chart(vis_df)
-
-        bars = base.mark_bar().encode(
-            x=alt.X("Inicio:T", title="Hora"),
-            x2="Fin:T",
-            y=alt.Y("Responsable:N", sort="-x", title="Responsable"),
-            color=alt.Color("Tipo:N", legend=alt.Legend(title="Tipo")),
-            tooltip=[
-                alt.Tooltip("Tema:N"),
-                alt.Tooltip("Responsable:N"),
-                alt.Tooltip("Inicio:T", format="%H:%M"),
-                alt.Tooltip("Fin:T", format="%H:%M"),
-                alt.Tooltip("Duración:Q", title="Min"),
-                alt.Tooltip("Tipo:N"),
-            ],
-        ).properties(
-            height=380,
-            width="container"
+    if tab_view.open:
+        import altair as alt
+
+        st.subheader("Timeline (Altair)")
+        df = build_df()
+        if df.empty:
+            st.info("Añade puntos para ver la visualización.")
+        else:
+            # Data para Altair
+            fecha = st.session_state.meta["fecha"]
+            marcas = con_conflicto(detectar(st.session_state.agenda))
+            vis_df = pd.DataFrame([
+                {
+                    "Tema": it["Tema"],
+                    "Responsable": it["Responsable"],
+                    "Inicio": it["_start_dt"],
+                    "Fin": it["_end_dt"],
+                    "Tipo": it["Tipo"],
+                    "Duración": it["Min"],
+                    "Tooltip": f"{it['Tema']} ({it['Inicio']}–{it['Fin']})",
+                    "Conflicto": {"responsable": "Mismo responsable", "solape": "Solape"}.get(marcas.get(it["_id"]), "—"),
+                }
+                for it in st.session_state.agenda
+            ])
+            # Ordenar por hora
+            vis_df = vis_df.sort_values("Inicio")
+
+            # Escala temporal
+            base = alt.Chart(vis_df)
+
+            bars = base.mark_bar().encode(
+                x=alt.X("Inicio:T", title="Hora"),
+                x2="Fin:T",
+                y=alt.Y("Responsable:N", sort="-x", title="Responsable"),
+                color=alt.Color("Tipo:N", legend=alt.Legend(title="Tipo")),
+                # Los bloques que se cruzan llevan borde rojo
+                stroke=alt.condition(alt.datum.Conflicto != "—", alt.value("#dc2626"), alt.value(None)),
+                strokeWidth=alt.value(2),
+                tooltip=[
+                    alt.Tooltip("Tema:N"),
+                    alt.Tooltip("Responsable:N"),
+                    alt.Tooltip("Inicio:T", format="%H:%M"),
+                    alt.Tooltip("Fin:T", format="%H:%M"),
+                    alt.Tooltip("Duración:Q", title="Min"),
+                    alt.Tooltip("Tipo:N"),
+                    alt.Tooltip("Conflicto:N"),
+                ],
+            ).properties(
+                height=380,
+                width="container"
+            )
+
+            st.altair_chart(bars, use_container_width=True)
+
+            if st.session_state.zonas:
+                # Una fila por zona: la misma agenda en la hora local de cada participante
+                st.subheader("Horario por zona")
+                largo = por_zona()
+                agenda = st.session_state.agenda
+                largo["Tema"] = [agenda[p]["Tema"] for p in largo["Pos"]]
+                largo["Tipo"] = [agenda[p]["Tipo"] for p in largo["Pos"]]
+                largo["Zona"] = largo["Zona"].map(etiqueta)
+                # Hora de pared sobre una fecha fija (un bloque que cruza la medianoche sigue de corrido)
+                largo["Desde"] = pd.Timestamp("2000-01-01") + (largo["Inicio"] - largo["Inicio"].dt.normalize())
+                largo["Hasta"] = largo["Desde"] + (largo["Fin"] - largo["Inicio"])
+                zonas_chart = alt.Chart(largo).mark_bar().encode(
+                    x=alt.X("Desde:T", title="Hora local", axis=alt.Axis(format="%H:%M")),
+                    x2="Hasta:T",
+                    y=alt.Y("Zona:N", sort=None, title="Zona"),
+                    color=alt.Color("Tipo:N", legend=alt.Legend(title="Tipo")),
+                    tooltip=[
+                        alt.Tooltip("Tema:N"),
+                        alt.Tooltip("Zona:N"),
+                        alt.Tooltip("Inicio:T", format="%d/%m %H:%M"),
+                        alt.Tooltip("Fin:T", format="%H:%M"),
+                        alt.Tooltip("Día:Q", title="Días vs. reunión"),
+                    ],
+                ).properties(height=60 * (len(st.session_state.zonas) + 1), width="container")
+                st.altair_chart(zonas_chart, use_container_width=True)
+
+        st.markdown(
+            f"**{st.session_state.meta['titulo']}** — "
+            f"{st.session_state.meta['fecha'].strftime('%Y-%m-%d')} | "
+            f"{st.session_state.meta['lugar']} | TZ: {st.session_state.meta['zona']}"
         )
+        if st.session_state.meta["link"]:
+            st.link_button("Abrir videollamada", st.session_state.meta["link"])
 
-        st.altair_chart(bars, use_container_width=True)
+# =============================
+# TAB: CALENDARIO (reuniones guardadas)
+# =============================
+perfil.marca("calendario")
+with tab_cal:
+    st.subheader("Calendario de reuniones")
+    k1, k2, k3, k4 = st.columns([1, 1.2, 1.2, 1.2])
+    vista = k1.radio("Vista", ["Semana", "Mes"], horizontal=True)
+    ref = k2.date_input("Ir a", st.session_state.meta["fecha"], key="cal_ref")
+    resp_cal = k3.selectbox("Responsable", ["Todos"] + store.responsables(), key="cal_resp")
+    tipo_cal = k4.selectbox("Tipo", ["Todos"] + TIPOS, key="cal_tipo")
+    if tab_cal.open:
+        import altair as alt
 
-    st.markdown(
-        f"**{st.session_state.meta['titulo']}** — "
-        f"{st.session_state.meta['fecha'].strftime('%Y-%m-%d')} | "
-        f"{st.session_state.meta['lugar']} | TZ: {st.session_state.meta['zona']}"
-    )
-    if st.session_state.meta["link"]:
-        st.link_button("Abrir videollamada", st.session_state.meta["link"])
+        desde, hasta = rango(ref, vista)
+        # Solo se consulta el rango visible (índices por inicio/responsable/tipo en la base)
+        reus = store.reuniones(desde, hasta)
+        bloques_cal = store.bloques(desde, hasta,
+                                    None if resp_cal == "Todos" else resp_cal,
+                                    None if tipo_cal == "Todos" else tipo_cal)
+        st.caption(f"{desde:%d/%m/%Y} – {hasta - dt.timedelta(days=1):%d/%m/%Y}: "
+                   f"{len(reus)} reuniones, {len(bloques_cal)} bloques.")
+
+        if bloques_cal.empty:
+            st.info("No hay bloques guardados en este rango.")
+        else:
+            # Hora del día sobre una fecha fija: el eje Y es la jornada, el X el día
+            base_dia = pd.Timestamp("2000-01-01")
+            bloques_cal["Día"] = bloques_cal["inicio"].dt.normalize()
+            bloques_cal["Desde"] = base_dia + (bloques_cal["inicio"] - bloques_cal["Día"])
+            bloques_cal["Hasta"] = base_dia + (bloques_cal["fin"] - bloques_cal["Día"])
+            cal = alt.Chart(bloques_cal).mark_bar(opacity=0.85).encode(
+                x=alt.X("yearmonthdate(Día):O", title="Día"),
+                y=alt.Y("Desde:T", title="Hora", axis=alt.Axis(format="%H:%M"), scale=alt.Scale(reverse=True)),
+                y2="Hasta:T",
+                color=alt.Color("tipo:N", legend=alt.Legend(title="Tipo")),
+                tooltip=[
+                    alt.Tooltip("reunion_titulo:N", title="Reunión"),
+                    alt.Tooltip("tema:N", title="Tema"),
+                    alt.Tooltip("responsable:N", title="Responsable"),
+                    alt.Tooltip("inicio:T", title="Inicio", format="%d/%m %H:%M"),
+                    alt.Tooltip("minutos:Q", title="Min"),
+                ],
+            ).properties(height=420, width="container")
+            st.altair_chart(cal, use_container_width=True)
+
+        if not reus.empty:
+            st.dataframe(reus.rename(columns={"id": "ID", "titulo": "Título", "fecha": "Fecha", "lugar": "Lugar",
+                                              "bloques": "Bloques", "minutos": "Min"}),
+                         use_container_width=True, hide_index=True)
+            etiquetas = dict(zip(reus["id"], reus["fecha"] + " · " + reus["titulo"]))
+            a1, a2 = st.columns([3, 1])
+            elegida = a1.selectbox("Reunión", list(etiquetas), key="cal_abrir", format_func=etiquetas.get)
+            if a2.button("📂 Abrir", use_container_width=True) and abrir(int(elegida)):
+                st.rerun()
+
+            z1, z2 = st.columns([3, 1])
+            formatos = z1.multiselect("Exportar el rango", list(FORMATOS), ["md", "ics"], format_func=FORMATOS.get,
+                                      key="cal_formatos")
+            ids_rango = [int(i) for i in reus["id"]]
+
+            def reuniones_rango():
+                # De a una: cada reunión se carga, se escribe en el zip y se suelta
+                for i in ids_rango:
+                    cargada = store.cargar(i)
+                    if cargada is not None:
+                        yield f"{cargada[0]['fecha']:%Y-%m-%d}_reunion{i}", *cargada
+
+            z2.download_button("📦 Zip", file_name=f"reuniones_{desde:%Y%m%d}.zip", mime="application/zip",
+                               data=lambda: zip_reuniones(reuniones_rango(), formatos),
+                               disabled=not formatos, use_container_width=True)
 
 # =============================
 # TAB: ACTA (Markdown)
 # =============================
+perfil.marca("acta")
 with tab_minutes:
     st.subheader("Acta automática (lista para copiar)")
     meta = st.session_state.meta
-    df = build_df()
-
-    md_lines = []
-    md_lines.append(f"# {meta['titulo']}")
-    md_lines.append(f"- **Fecha:** {meta['fecha'].strftime('%Y-%m-%d')}")
-    md_lines.append(f"- **Lugar:** {meta['lugar']}")
-    md_lines.append(f"- **Zona horaria:** {meta['zona']}")
-    if meta["anfitrion"]:
-        md_lines.append(f"- **Anfitrión:** {meta['anfitrion']}")
-    if meta["link"]:
-        md_lines.append(f"- **Link:** {meta['link']}")
-    md_lines.append("\n## Agenda")
-
-    if df.empty:
-        md_lines.append("- *(Sin puntos cargados)*")
+    nombre_plantilla = st.selectbox("Plantilla", [*PLANTILLAS, "Personalizada"])
+    if nombre_plantilla == "Personalizada":
+        base = PLANTILLAS["Acta"]
+        st.caption("Campos: $titulo $fecha $lugar $zona $anfitrion $link · por bloque: "
+                   "$pos $inicio $fin $tema $responsable $min $tipo $objetivo")
+        plantilla = Plantilla(
+            encabezado=st.text_area("Encabezado", base.encabezado, height=120),
+            item=st.text_area("Cada bloque", base.item, height=80),
+            pie=st.text_area("Pie", base.pie, height=68),
+        )
     else:
-        for row in st.session_state.agenda:
-            md_lines.append(
-                f"- **{row['Inicio']}–{row['Fin']}** · **{row['Tema']}** "
-                f"(Responsable: {row['Responsable']}; {row['Min']} min; {row['Tipo']})"
-            )
-            if row["Objetivo"]:
-                md_lines.append(f"  - Objetivo: {row['Objetivo']}")
+        plantilla = PLANTILLAS[nombre_plantilla]
 
-    md_lines.append("\n## Acuerdos y pendientes")
-    md_lines.append("- ")
-    markdown_text = "\n".join(md_lines)
+    zonas = tuple(st.session_state.zonas)
+    # El acta solo se vuelve a armar si cambia la agenda, los metadatos, las zonas o la plantilla
+    clave_md = (firma(meta, st.session_state.agenda, zonas), "md", plantilla)
+    agenda_md = st.session_state.agenda
+    with perfil.fase("markdown"):
+        markdown_text = exportador.get(clave_md, lambda: "".join(iter_markdown(
+            meta, agenda_md, plantilla,
+            horas_por_bloque(por_zona(), zona_reunion()) if zonas and agenda_md else None, zonas)))
 
     st.code(markdown_text, language="markdown")
 
@@ -239,11 +689,33 @@ with tab_minutes:
 # -----------------------------
 # Nota de uso
 # -----------------------------
+perfil.marca("tips")
 with st.expander("💡 Tips rápidos"):
     st.markdown(
         """
-- Marca **Auto-secuenciar** para encadenar bloques sin calcular horas.  
+- Marca **Auto-secuenciar** para encadenar bloques (🔗): al mover, borrar o cambiar minutos, sus horas se recalculan solas. Los bloques 📌 conservan su hora.  
+- **Optimizar** reordena los bloques respetando horas fijas, disponibilidad, pausas y el cierre de la reunión.  
+- Los bloques que se cruzan aparecen con borde rojo; **Resolver conflictos** los corre lo mínimo necesario.  
 - En **Visualizar**, pasa el mouse sobre las barras para ver detalles.  
-- El **Markdown** del acta se puede pegar directo en Notion/Docs/Slack.  
+- Elige **Zonas de participantes** para ver la agenda en la hora local de cada uno (timeline y acta).  
+- **Guardar** deja la reunión en la base; en **Calendario** ves la semana o el mes y abres cualquiera.  
+- El **Markdown** del acta se puede pegar directo en Notion/Docs/Slack; elige otra **Plantilla** o arma la tuya.  
+- El **.ics** importa cada bloque como un evento en Google Calendar/Outlook; desde **Calendario** se baja un zip de todo el rango.  
+- **Deshacer/Rehacer** (barra lateral) cubre también *Vaciar agenda*; recargar la página con el mismo `?sesion=` recupera el trabajo.  
 """
     )
+
+# -----------------------------
+# Diario: un delta por rerun que cambió algo
+# -----------------------------
+perfil.marca("diario")
+diario.registrar(partes_sesion(completo=False))
+with st.sidebar:
+    st.markdown("---")
+    d1, d2 = st.columns(2)
+    d1.button("↩️ Deshacer", on_click=lambda: restaurar_sesion(diario.deshacer()),
+              disabled=not diario.puede_deshacer, use_container_width=True)
+    d2.button("↪️ Rehacer", on_click=lambda: restaurar_sesion(diario.rehacer()),
+              disabled=not diario.puede_rehacer, use_container_width=True)
+
+perfil.panel()
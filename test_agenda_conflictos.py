@@ -0,0 +1,80 @@
+import datetime as dt
+import itertools
+import random
+
+from agenda_conflictos import IntervalTree, con_conflicto, detectar, fijar_inicio, resolver
+
+BASE = dt.datetime(2026, 10, 19, 8, 0)
+
+
+def _t(minutos):
+    return BASE + dt.timedelta(minutes=minutos)
+
+
+def _bloque(item_id, ini, minutos, responsable="—"):
+    return {"_id": item_id, "Tema": f"T{item_id}", "Responsable": responsable, "Min": minutos,
+            "_start_dt": _t(ini), "_end_dt": _t(ini + minutos)}
+
+
+def _se_cruzan(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def test_arbol_igual_a_fuerza_bruta_con_altas_y_bajas():
+    rnd = random.Random(3)
+    arbol, vivos = IntervalTree(seed=1), {}
+    for paso in range(400):
+        if vivos and rnd.random() < 0.3:
+            item_id = rnd.choice(list(vivos))
+            arbol.remove(item_id)
+            del vivos[item_id]
+        else:
+            item_id = rnd.randrange(150)                # a veces re-agrega un id existente
+            ini = rnd.randrange(600)
+            vivos[item_id] = (_t(ini), _t(ini + rnd.randint(5, 90)))
+            arbol.add(item_id, *vivos[item_id])
+        q = (_t(rnd.randrange(600)), _t(rnd.randrange(600) + 5))
+        if q[0] >= q[1]:
+            continue
+        esperados = sorted((iv[0], i) for i, iv in vivos.items() if _se_cruzan(iv, q))
+        assert arbol.solapados(*q) == [i for _, i in esperados]
+        assert arbol.hay_solape(*q) == bool(esperados)
+    assert len(arbol) == len(vivos)
+
+
+def test_intervalos_contiguos_no_chocan():
+    arbol = IntervalTree([(1, _t(0), _t(30)), (2, _t(30), _t(60))])
+    assert not arbol.hay_solape(_t(60), _t(90))
+    assert arbol.solapados(_t(29), _t(31)) == [1, 2]
+    arbol.remove(99)                                    # id ausente: no falla
+    assert 1 in arbol and 99 not in arbol
+
+
+def test_detectar_todos_los_pares_y_su_tipo():
+    bloques = [_bloque(1, 0, 60, "Ana"), _bloque(2, 30, 60, "Ana"), _bloque(3, 45, 10, "Luis"),
+               _bloque(4, 90, 30), _bloque(5, 200, 10)]
+    conflictos = detectar(bloques)
+    pares = {(c.a, c.b): (c.tipo, c.minutos) for c in conflictos}
+    esperados = {(a["_id"], b["_id"]) for a, b in itertools.combinations(bloques, 2)
+                 if _se_cruzan((a["_start_dt"], a["_end_dt"]), (b["_start_dt"], b["_end_dt"]))}
+    assert set(pares) == esperados
+    assert pares[(1, 2)] == ("responsable", 30.0) and pares[(2, 3)] == ("solape", 10.0)
+    assert con_conflicto(conflictos) == {1: "responsable", 2: "responsable", 3: "solape"}   # 4 solo toca a 2
+
+
+def test_resolver_atrasa_lo_minimo_y_deja_la_agenda_sin_choques():
+    bloques = [_bloque(1, 0, 60, "Ana"), _bloque(2, 30, 30, "Ana"), _bloque(3, 40, 10, "Luis"),
+               _bloque(4, 200, 10, "Ana")]
+    nuevos = resolver(bloques)
+    assert nuevos == {2: _t(60), 3: _t(90)}
+    for b in bloques:
+        if b["_id"] in nuevos:
+            fijar_inicio(b, nuevos[b["_id"]])
+    assert detectar(bloques) == []
+    assert bloques[2]["Inicio"] == "09:30" and bloques[2]["Fin"] == "09:40"
+
+
+def test_resolver_solo_responsable_no_mueve_a_los_demas():
+    bloques = [_bloque(1, 0, 60, "Ana"), _bloque(2, 30, 30, "Ana"), _bloque(3, 40, 10, "Luis"),
+               _bloque(4, 10, 10)]
+    assert resolver(bloques, solo_responsable=True) == {2: _t(60)}
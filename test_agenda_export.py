@@ -0,0 +1,76 @@
+import datetime as dt
+import threading
+import time
+import zipfile
+
+from agenda_export import Exportador, firma, iter_csv, unir, zip_reuniones
+
+META = {"titulo": "Planificación", "fecha": dt.date(2026, 10, 19), "zona": "America/Lima",
+        "lugar": "Sala 1", "anfitrion": "Ana", "link": ""}
+
+
+def _agenda(n=2):
+    ini = dt.datetime(2026, 10, 19, 9, 0)
+    out = []
+    for k in range(n):
+        fin = ini + dt.timedelta(minutes=30)
+        out.append({"Tema": f"Tema {k}", "Responsable": "Ana", "Inicio": ini.strftime("%H:%M"),
+                    "Fin": fin.strftime("%H:%M"), "Min": 30, "Tipo": "Decisión", "Objetivo": "",
+                    "_start_dt": ini, "_end_dt": fin, "_id": k + 1})
+        ini = fin
+    return out
+
+
+def test_firma_cambia_con_el_contenido():
+    agenda = _agenda()
+    assert firma(META, agenda) == firma(dict(META), [dict(it) for it in agenda])
+    agenda[1]["Tema"] = "Otro"
+    assert firma(META, agenda) != firma(META, _agenda())
+
+
+def test_csv_por_trozos():
+    texto = unir(iter_csv(_agenda())).decode("utf-8")
+    assert texto.splitlines() == ["Tema,Responsable,Inicio,Fin,Min,Tipo,Objetivo",
+                                  "Tema 0,Ana,09:00,09:30,30,Decisión,", "Tema 1,Ana,09:30,10:00,30,Decisión,"]
+
+
+def test_zip_reuniones_es_un_archivo_rebobinado():
+    out = zip_reuniones(((f"r{i}", META, _agenda()) for i in range(3)), ["csv", "md", "ics"])
+    with zipfile.ZipFile(out) as zf:
+        assert sorted(zf.namelist()) == sorted(f"r{i}.{f}" for i in range(3) for f in ("csv", "md", "ics"))
+        assert zf.read("r0.csv").decode("utf-8").startswith("Tema,Responsable")
+
+
+def test_exportador_genera_claves_distintas_en_paralelo():
+    exp = Exportador()
+    dentro, listo = threading.Barrier(2, timeout=5), []
+
+    def build(clave):
+        dentro.wait()            # solo pasa si las dos claves se generan a la vez
+        listo.append(clave)
+        return clave
+
+    hilos = [threading.Thread(target=exp.get, args=((k,), lambda k=k: build(k))) for k in "ab"]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join(10)
+    assert sorted(listo) == ["a", "b"]
+
+
+def test_exportador_misma_clave_se_genera_una_vez():
+    exp = Exportador()
+    llamadas = []
+
+    def build():
+        llamadas.append(1)
+        time.sleep(0.2)
+        return b"doc"
+
+    res = []
+    hilos = [threading.Thread(target=lambda: res.append(exp.get(("x",), build))) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join(10)
+    assert res == [b"doc"] * 4 and len(llamadas) == 1
@@ -0,0 +1,108 @@
+import datetime as dt
+import io
+
+from agenda_conflictos import IntervalTree
+from agenda_export import iter_csv, iter_ics, unir
+from agenda_import import importar
+
+FECHA = dt.date(2026, 10, 19)
+META = {"titulo": "Plan", "fecha": FECHA, "zona": "America/Lima", "lugar": "Sala 1", "anfitrion": "", "link": ""}
+
+
+def _agenda():
+    ini = dt.datetime.combine(FECHA, dt.time(9, 0))
+    out = []
+    for k, (tema, resp, minutos, obj) in enumerate([("Apertura", "Ana", 15, ""), ("Ventas, Q4", "Luis", 30, "Cerrar\nmetas"),
+                                                    ("Ronda; dudas", "—", 20, "")], start=1):
+        fin = ini + dt.timedelta(minutes=minutos)
+        out.append({"Tema": tema, "Responsable": resp, "Inicio": ini.strftime("%H:%M"), "Fin": fin.strftime("%H:%M"),
+                    "Min": minutos, "Tipo": "Decisión", "Objetivo": obj, "_start_dt": ini, "_end_dt": fin,
+                    "_id": k, "_auto": False})
+        ini = fin
+    return out
+
+
+def _importar(contenido, nombre, agenda=None, **kw):
+    agenda = [] if agenda is None else agenda
+    arbol = IntervalTree((it["_id"], it["_start_dt"], it["_end_dt"]) for it in agenda)
+    stream = io.BytesIO(contenido.encode("utf-8") if isinstance(contenido, str) else contenido)
+    res, next_id = importar(stream, nombre, agenda, arbol, max((it["_id"] for it in agenda), default=0) + 1,
+                            FECHA, "America/Lima", **kw)
+    return res, next_id, agenda, arbol
+
+
+def _bloques(agenda):
+    return [(it["Tema"], it["Responsable"], it["Inicio"], it["Fin"], it["Min"], it["Tipo"], it["Objetivo"])
+            for it in agenda]
+
+
+def test_csv_y_ics_exportados_vuelven_iguales():
+    original = _agenda()
+    for nombre, contenido in (("a.csv", unir(iter_csv(original))), ("a.ics", unir(iter_ics(META, original)))):
+        res, next_id, agenda, arbol = _importar(contenido, nombre)
+        assert (res.agregados, res.duplicados, res.errores) == (3, 0, [])
+        assert _bloques(agenda) == _bloques(original), nombre
+        assert next_id == 4 and len(arbol) == 3
+
+
+def test_reimportar_no_duplica():
+    contenido = unir(iter_csv(_agenda()))
+    res, next_id, agenda, _ = _importar(contenido, "a.csv", agenda=_agenda())
+    assert (res.agregados, res.duplicados, next_id) == (0, 3, 4) and len(agenda) == 3
+
+
+def test_lotes_conflictos_y_progreso():
+    filas = "\n".join(f"Tema {k},Ana,{9 + k // 4:02d}:{(k % 4) * 15:02d},,15,Decisión," for k in range(10))
+    filas += "\nChoca,Ana,09:05,,15,Decisión,\nChoca,ana ,09:05,,15,Decisión,"   # la 2.ª es repetida
+    avances = []
+    res, _, agenda, _ = _importar("Tema,Responsable,Inicio,Fin,Min,Tipo,Objetivo\n" + filas, "a.csv", lote=4,
+                                  progreso=lambda f, leidos, total: avances.append((f, leidos, total)))
+    assert (res.filas, res.agregados, res.duplicados, res.lotes) == (12, 11, 1, 3)
+    assert res.conflictos == 2                         # "Choca" pisa a Tema 0 y Tema 1
+    assert [f for f, _, _ in avances] == [4, 8, 12] and avances[-1][1] == avances[-1][2]
+    assert sorted(it["_id"] for it in agenda) == list(range(1, 12))
+
+
+def test_errores_por_fila_sin_cortar_la_importacion():
+    csv = ("Tema,Inicio,Fin,Min\n"
+           "Bien,09:00,09:30,\n"
+           ",10:00,,15\n"
+           "Sin hora,xx,,15\n"
+           "Largo,11:00,,300\n"
+           "Sin fin,12:00,,\n"
+           "Medianoche,23:50,00:20,\n")
+    res, _, agenda, _ = _importar(csv, "a.csv")
+    assert [t for t, *_ in _bloques(agenda)] == ["Bien", "Medianoche"]
+    assert agenda[1]["Min"] == 30
+    assert [f for f, _ in res.errores] == [3, 4, 5, 6]
+    assert "inicio inválido" in res.errores[1][1] and "fuera de rango" in res.errores[2][1]
+    res, *_ = _importar("Nombre,Hora\nx,09:00\n", "a.csv")
+    assert res.errores == [(1, "el CSV debe tener al menos las columnas Tema e Inicio")]
+
+
+def test_ics_de_otro_calendario():
+    ics = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT",
+        "SUMMARY:Revisión de\\, presupuesto con un título que sigue",
+        "  en la línea siguiente",                     # plegado: se quita solo el primer espacio
+        "DTSTART;TZID=Europe/Madrid:20261019T170000",
+        "DURATION:PT1H15M",
+        'ORGANIZER;CN="Marta":mailto:marta@example.com',
+        "CATEGORIES:Información,Otra",
+        "DESCRIPTION:Traer números",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "SUMMARY:Feriado",
+        "DTSTART;VALUE=DATE:20261019",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "SUMMARY:Zona rara",
+        "DTSTART;TZID=Marte/Olympus:20261019T090000",
+        "DURATION:PT30M",
+        "END:VEVENT",
+        "END:VCALENDAR", ""])
+    res, _, agenda, _ = _importar(ics, "cal.ics")
+    assert _bloques(agenda) == [("Revisión de, presupuesto con un título que sigue en la línea siguiente", "Marta",
+                                 "10:00", "11:15", 75, "Información", "Traer números")]   # Madrid 17:00 = Lima 10:00
+    assert [e for _, e in res.errores] == ["evento de día completo (sin hora)", "zona horaria desconocida: Marte/Olympus"]
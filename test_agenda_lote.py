@@ -0,0 +1,88 @@
+import copy
+import datetime as dt
+
+import pandas as pd
+
+from agenda_lote import a_tabla, aplicar, diff
+from agenda_tiempos import agregar
+
+FECHA = dt.date(2026, 10, 19)
+
+
+def _agenda():
+    agenda = []
+    for k, (tema, minutos, auto) in enumerate([("Apertura", 15, False), ("Ventas", 30, True),
+                                               ("Producto", 20, True), ("Cierre", 10, True)], start=1):
+        ini = dt.datetime.combine(FECHA, dt.time(9, 0))
+        agregar(agenda, {"Tema": tema, "Responsable": "Ana", "Inicio": "", "Fin": "", "Min": minutos,
+                         "Tipo": "Discusión", "Objetivo": "", "_start_dt": ini,
+                         "_end_dt": ini + dt.timedelta(minutes=minutos), "_id": k, "_auto": auto})
+    return agenda
+
+
+def _horas(agenda):
+    return [(it["_id"], it["Tema"], it["Inicio"], it["Fin"]) for it in agenda]
+
+
+def test_tabla_sin_tocar_no_tiene_cambios():
+    agenda = _agenda()
+    cambios, errores = diff(agenda, a_tabla(agenda))
+    assert not errores and cambios.vacio([it["_id"] for it in agenda])
+
+
+def test_bajas_ediciones_altas_y_orden_en_una_pasada():
+    agenda = _agenda()
+    original = copy.deepcopy(agenda)
+    tabla = a_tabla(agenda)
+    tabla.loc[tabla["ID"] == 2, "Min"] = 45                        # Ventas dura más
+    tabla.loc[tabla["ID"] == 3, "Tema"] = "  Roadmap "
+    tabla.loc[tabla["ID"] == 4, "Orden"] = 1                       # Cierre pasa al primer lugar
+    tabla = tabla[tabla["ID"] != 1]                                # se borra la apertura (ancla)
+    tabla = pd.concat([tabla, pd.DataFrame([{"ID": None, "Orden": None, "Tema": "Preguntas", "Responsable": None,
+                                             "Inicio": None, "Min": 15, "Tipo": "Raro", "Auto": True}])],
+                      ignore_index=True)
+    cambios, errores = diff(agenda, tabla)
+    assert not errores
+    assert cambios.borrados == [1] and cambios.editados == {2: {"Min": 45}, 3: {"Tema": "  Roadmap "}}
+    assert cambios.orden == [4, 2, 3, None]
+
+    nueva, next_id = aplicar(agenda, cambios, FECHA, 5)
+    assert agenda == original                                       # la agenda original no se toca
+    assert next_id == 6
+    # Cierre queda primero: pasa a ser el ancla y conserva su hora; el resto se encadena
+    assert _horas(nueva) == [(4, "Cierre", "10:05", "10:15"), (2, "Ventas", "10:15", "11:00"),
+                             (3, "Roadmap", "11:00", "11:20"), (5, "Preguntas", "11:20", "11:35")]
+    assert nueva[-1]["Responsable"] == "—" and nueva[-1]["Tipo"] == "Discusión"
+
+
+def test_hora_manual_solo_en_anclas():
+    agenda = _agenda()
+    tabla = a_tabla(agenda)
+    tabla.loc[tabla["ID"] == 1, "Inicio"] = dt.time(10, 0)         # ancla: se respeta
+    tabla.loc[tabla["ID"] == 3, "Inicio"] = dt.time(13, 0)         # encadenado: se ignora
+    cambios, _ = diff(agenda, tabla)
+    assert cambios.editados == {1: {"Inicio": dt.time(10, 0)}}
+    nueva, _ = aplicar(agenda, cambios, FECHA, 5)
+    assert [h[2] for h in _horas(nueva)] == ["10:00", "10:15", "10:45", "11:05"]
+
+
+def test_errores_de_validacion():
+    agenda = _agenda()
+    tabla = a_tabla(agenda)
+    tabla.loc[0, "Tema"] = " "
+    tabla.loc[1, "Min"] = 300
+    _, errores = diff(agenda, tabla)
+    assert errores == ["Fila 1: el tema es obligatorio.", "Fila 2: los minutos deben estar entre 5 y 240."]
+
+
+def test_inicio_y_min_en_la_misma_fila_refrescan_el_texto():
+    agenda = _agenda()
+    tabla = a_tabla(agenda)
+    tabla.loc[tabla["ID"] == 1, "Inicio"] = dt.time(9, 5)
+    tabla.loc[tabla["ID"] == 1, "Min"] = 10                        # 09:05 + 10 = 09:15: el fin no cambia
+    cambios, _ = diff(agenda, tabla)
+    nueva, _ = aplicar(agenda, cambios, FECHA, 5)
+    primero = nueva[0]
+    assert (primero["Inicio"], primero["Fin"]) == ("09:05", "09:15")
+    assert primero["_end_dt"] == dt.datetime.combine(FECHA, dt.time(9, 15))
+    assert a_tabla(nueva).loc[0, "Fin"] == "09:15"
@@ -0,0 +1,72 @@
+import copy
+import datetime as dt
+import random
+
+from agenda_tiempos import agregar, cambiar_duracion, eliminar, mover, retemporizar
+
+BASE = dt.datetime(2026, 10, 19, 9, 0)
+
+
+def _bloque(item_id, minutos, auto=True, ini=0):
+    inicio = BASE + dt.timedelta(minutes=ini)
+    fin = inicio + dt.timedelta(minutes=minutos)
+    return {"_id": item_id, "Min": minutos, "_auto": auto, "_start_dt": inicio, "_end_dt": fin,
+            "Inicio": inicio.strftime("%H:%M"), "Fin": fin.strftime("%H:%M")}
+
+
+def _agenda(*especificacion):
+    agenda = []
+    for k, (minutos, auto, ini) in enumerate(especificacion, start=1):
+        agregar(agenda, _bloque(k, minutos, auto, ini))
+    return agenda
+
+
+def _horas(agenda):
+    return [(it["_id"], it["Inicio"], it["Fin"]) for it in agenda]
+
+
+def _completo(agenda):
+    """Referencia: re-calcular toda la agenda desde cero."""
+    ref = copy.deepcopy(agenda)
+    retemporizar(ref, 0, len(ref) - 1)
+    return _horas(ref)
+
+
+def test_agregar_encadena_y_respeta_anclas():
+    agenda = _agenda((30, False, 0), (15, True, 0), (20, False, 120), (10, True, 0))
+    assert _horas(agenda) == [(1, "09:00", "09:30"), (2, "09:30", "09:45"),
+                              (3, "11:00", "11:20"), (4, "11:20", "11:30")]
+
+
+def test_cambiar_duracion_solo_recalcula_hasta_la_proxima_ancla():
+    agenda = _agenda((30, False, 0), (15, True, 0), (15, True, 0), (20, False, 120), (10, True, 0))
+    cambiados = cambiar_duracion(agenda, 0, 45)
+    assert cambiados == [0, 1, 2]                       # el ancla (pos. 3) y lo que sigue no se tocan
+    assert _horas(agenda)[:3] == [(1, "09:00", "09:45"), (2, "09:45", "10:00"), (3, "10:00", "10:15")]
+
+
+def test_mover_y_eliminar():
+    agenda = _agenda((30, False, 0), (15, True, 0), (20, True, 0))
+    mover(agenda, 2, 1)
+    assert _horas(agenda) == [(1, "09:00", "09:30"), (3, "09:30", "09:50"), (2, "09:50", "10:05")]
+    borrado, cambiados = eliminar(agenda, 1)
+    assert borrado["_id"] == 3 and cambiados == [1]
+    assert _horas(agenda) == [(1, "09:00", "09:30"), (2, "09:30", "09:45")]
+    assert mover(agenda, 0, 5) == [] and eliminar(agenda, 1)[1] == []
+
+
+def test_ediciones_incrementales_igual_a_recalcular_todo():
+    rnd = random.Random(11)
+    agenda = _agenda(*[(rnd.choice((5, 10, 15, 30)), rnd.random() < 0.7, rnd.randrange(0, 480, 5))
+                       for _ in range(40)])
+    for _ in range(300):
+        op = rnd.random()
+        if op < 0.4:
+            cambiar_duracion(agenda, rnd.randrange(len(agenda)), rnd.choice((5, 20, 45, 90)))
+        elif op < 0.8:
+            mover(agenda, rnd.randrange(len(agenda)), rnd.randrange(len(agenda)))
+        elif len(agenda) > 5:
+            eliminar(agenda, rnd.randrange(len(agenda)))
+        else:
+            agregar(agenda, _bloque(1000 + len(agenda), 15, rnd.random() < 0.5, rnd.randrange(0, 480, 5)))
+        assert _horas(agenda) == _completo(agenda)
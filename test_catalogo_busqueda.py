@@ -0,0 +1,52 @@
+from catalogo_busqueda import SearchIndex, distancia, normalizar
+
+ITEMS = [
+    {"id": 1, "nombre": "Liquid Blush", "marca": "Rare Beauty", "tono": "Happy"},
+    {"id": 2, "nombre": "Crème Lipstick", "marca": "MAC", "tono": "Ruby Woo"},
+    {"id": 3, "nombre": "Blush Stick", "marca": "NYX", "tono": "Rosa"},
+    {"id": 4, "nombre": "Setting Spray", "marca": "NYX", "tono": "Transparente"},
+]
+
+
+def test_normaliza_tildes_y_mayusculas():
+    assert normalizar("Crème") == "creme"
+    assert SearchIndex(ITEMS).search("CREME") == [2]
+
+
+def test_todos_los_terminos_y_ranking_por_campo():
+    idx = SearchIndex(ITEMS)
+    assert idx.search("blush") == [1, 3]               # mismo peso (nombre): desempata el id
+    assert idx.search("nyx blush") == [3]              # todos los términos
+    assert idx.search("nyx") == [3, 4]
+    assert idx.search("ros") == [3]                    # prefijo
+    assert idx.search("lipstick mac woo") == [2]
+    assert idx.search("") == [] and idx.search("ningunacosa") == []
+
+
+def test_prefijo_gana_a_subcadena():
+    idx = SearchIndex([{"id": 1, "nombre": "Primer"}, {"id": 2, "nombre": "Reprime"}])
+    assert idx.search("prim") == [1, 2]
+
+
+def test_errores_de_tipeo():
+    assert distancia("lipstik", "lipstick", 1) == 1
+    assert distancia("abc", "xyzw", 1) == 2            # corte temprano: tope + 1
+    idx = SearchIndex(ITEMS)
+    assert idx.search("lipstik") == [2]
+    assert idx.search("sprya") == []                   # 2 errores en 5 letras: fuera del tope
+
+
+def test_altas_ediciones_y_bajas_sin_reconstruir():
+    idx = SearchIndex(ITEMS)
+    idx.update({"id": 3, "nombre": "Cream Stick", "marca": "NYX", "tono": "Rosa"})
+    assert idx.search("blush") == [1]
+    assert idx.search("cream") == [3]
+    idx.remove(1)
+    assert idx.search("blush") == [] and "blush" not in idx.vocab
+    assert all("blush" not in toks for toks in idx.tri.values())
+    idx.add({"id": 5, "nombre": "Blush Duo"})
+    assert idx.search("blu") == [5] and len(idx) == 4
+
+
+def test_limite():
+    assert SearchIndex(ITEMS).search("s", limit=2) == SearchIndex(ITEMS).search("s")[:2]
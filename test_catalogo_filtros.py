@@ -0,0 +1,65 @@
+import random
+
+from catalogo_filtros import FACETAS, FacetIndex
+
+MARCAS, CATEGORIAS, ACABADOS = ("NYX", "MAC", "Rare Beauty"), ("Labios", "Ojos"), ("Mate", "Brillo")
+
+
+def _items(n, semilla=7):
+    rnd = random.Random(semilla)
+    return [{"id": i, "marca": rnd.choice(MARCAS), "categoría": rnd.choice(CATEGORIAS),
+             "acabado": rnd.choice(ACABADOS), "precio": float(rnd.randint(5, 60))} for i in range(1, n + 1)]
+
+
+def _esperados(items, filtros, precio_max=None):
+    return sorted(it["id"] for it in items
+                  if all(it[f] in sel for f, sel in filtros.items())
+                  and (precio_max is None or it["precio"] <= precio_max))
+
+
+def test_mascara_igual_a_filtrar_uno_por_uno():
+    items = _items(200)
+    idx = FacetIndex(items)
+    for filtros, precio in (({}, None), ({"marca": ["NYX"]}, None), ({"marca": ["NYX", "MAC"], "acabado": ["Mate"]}, 30.0),
+                            ({"categoría": []}, None), ({}, 4.0), ({}, 60.0)):
+        assert sorted(idx.to_ids(idx.mask(filtros, precio)).tolist()) == _esperados(items, filtros, precio)
+
+
+def test_conteos_ignoran_el_filtro_de_su_propia_faceta():
+    items = _items(120)
+    idx = FacetIndex(items)
+    filtros = {"marca": ["NYX"], "categoría": ["Labios"]}
+    out = idx.counts(filtros, precio_max=40.0)
+    for f in FACETAS:
+        otros = {g: sel for g, sel in filtros.items() if g != f}
+        for v, n in out[f].items():
+            assert n == len(_esperados(items, {**otros, f: [v]}, 40.0))
+
+
+def test_altas_bajas_y_ediciones_reusan_slots():
+    items = _items(50)
+    idx = FacetIndex(items)
+    idx.mask({}, 20.0)                                  # deja un umbral de precio en caché
+    idx.remove(3)
+    idx.remove(10)
+    nuevo = {"id": 99, "marca": "Otra", "categoría": "Ojos", "acabado": "Mate", "precio": 1.0}
+    idx.add(nuevo)
+    assert len(idx.ids) == 50 and len(idx) == 49       # ocupó un slot libre
+    items = [it for it in items if it["id"] not in (3, 10)] + [nuevo]
+    cambiado = dict(items[0], marca="MAC", precio=59.0)
+    idx.update(cambiado)
+    items[0] = cambiado
+    assert sorted(idx.to_ids(idx.mask({}, 20.0)).tolist()) == _esperados(items, {}, 20.0)
+    assert idx.opciones("marca") == sorted({it["marca"] for it in items})
+    assert idx.precio_max() == max(it["precio"] for it in items)
+
+
+def test_bitmap_ids_y_rebuild():
+    items = _items(30)
+    idx = FacetIndex(items)
+    extra = idx.bitmap_ids([2, 5, 7, 1000])
+    assert idx.to_ids(idx.mask({}, extra=extra)).tolist() == [2, 5, 7]
+    idx.rebuild(items[:3])
+    assert len(idx) == 3 and idx.to_ids(idx.alive).tolist() == [1, 2, 3]
+    vacio = FacetIndex()
+    assert vacio.to_ids(vacio.mask({"marca": ["NYX"]})).tolist() == [] and vacio.precio_max() == 0.0
@@ -0,0 +1,30 @@
+import io
+import zipfile
+
+from catalogo_io import ARCHIVO_META, exportar_zip, importar, importar_zip
+from catalogo_store import CatalogStore
+
+
+def _store(n):
+    return CatalogStore({"id": i, "nombre": f"P{i}", "marca": "M", "precio": float(i), "stock": i}
+                        for i in range(1, n + 1))
+
+
+def test_importar_zip_lee_el_ndjson_desde_el_miembro():
+    origen = _store(2500)
+    bundle = exportar_zip(origen, ruta_imagen=lambda h: h)
+    avances = []
+    res = importar_zip(bundle, guardar_imagen=lambda data: "", lote=1000,
+                       progreso=lambda filas, leidos, total: avances.append((leidos, total)))
+    assert not res.errores
+    assert res.frame["id"].tolist() == list(range(1, 2501))
+    bundle.seek(0)
+    tamano = zipfile.ZipFile(bundle).getinfo(ARCHIVO_META).file_size
+    assert {total for _, total in avances} == {tamano}   # el progreso usa el tamaño descomprimido
+
+
+def test_importar_reporta_errores_por_fila_sin_abortar():
+    datos = b'{"id": 1, "nombre": "A"}\nno es json\n[1, 2]\n{"id": 2, "nombre": "B"}\n'
+    res = importar(io.BytesIO(datos))
+    assert res.frame["id"].tolist() == [1, 2]
+    assert [fila for fila, _ in res.errores] == [2, 3]
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from catalogo_sqlite import SQLiteCatalog
+
+MARCAS = ("Rare Beauty", "NYX", "MAC")
+
+
+def _items(n):
+    return [{"id": i, "nombre": f"Labial {i}", "marca": MARCAS[i % 3], "categoría": "Labios",
+             "acabado": "Mate", "tono": "Rosa", "precio": float(10 + i), "stock": i} for i in range(1, n + 1)]
+
+
+@pytest.fixture
+def catalogo(tmp_path):
+    def abrir(conexiones):
+        cat = SQLiteCatalog(str(tmp_path / "c.db"), semilla=_items(30), conexiones=conexiones)
+        cat.pool.timeout = 5.0   # un bloqueo falla rápido en vez de esperar 30 s
+        abiertos.append(cat)
+        return cat
+    abiertos = []
+    yield abrir
+    for cat in abiertos:
+        cat.close()
+
+
+def test_conteos_con_una_sola_conexion(catalogo):
+    # conteos no puede retener su conexión mientras opciones()/_where() piden otra
+    cat = catalogo(1)
+    out = cat.conteos("labial", {"marca": ["NYX"]}, precio_max=100)
+    assert out["marca"] == {"MAC": 10, "NYX": 10, "Rare Beauty": 10}
+    assert out["categoría"] == {"Labios": 10}
+
+
+def test_sesiones_concurrentes_no_se_bloquean(catalogo):
+    cat = catalogo(2)
+    n_hilos = 8
+    salida = threading.Barrier(n_hilos)
+    errores = []
+
+    def sesion(k):
+        try:
+            salida.wait()
+            for j in range(5):
+                cat.conteos("labi", {"marca": list(MARCAS)})
+                cat.consultar("labial", {}, col="precio")
+                if j == 2:
+                    cat.update(k + 1, {"precio": 99.0})   # nueva versión: los derivados se rearman
+        except Exception as e:   # noqa: BLE001 - se reporta abajo
+            errores.append(e)
+
+    hilos = [threading.Thread(target=sesion, args=(k,)) for k in range(n_hilos)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join(30)
+    assert not any(h.is_alive() for h in hilos)
+    assert not errores, errores
+
+
+def test_derivado_se_arma_una_vez_por_version(catalogo):
+    cat = catalogo(2)
+    llamadas = []
+
+    def build():
+        llamadas.append(1)
+        return len(llamadas)
+
+    assert cat._derivado(("x",), build) == cat._derivado(("x",), build) == 1
+    cat.update(1, {"stock": 0})
+    assert cat._derivado(("x",), build) == 2
+
+
+def test_version_se_lee_sin_tocar_la_base(catalogo, monkeypatch):
+    cat = catalogo(1)
+    v = cat.version
+    cat.update(1, {"stock": 3})
+    cat.delete(2)
+    cat.delete(999)                       # no existe: no cambia nada
+    assert cat.version == v + 2
+
+    def sin_conexion():
+        raise AssertionError("version no debería pedir una conexión")
+    monkeypatch.setattr(cat.pool, "conexion", sin_conexion)
+    assert [cat.version for _ in range(5)] == [v + 2] * 5
+    monkeypatch.undo()
+
+    otra = SQLiteCatalog(cat.pool.ruta)    # al reabrir se retoma la versión guardada
+    assert otra.version == cat.version
+    otra.close()
@@ -0,0 +1,63 @@
+from catalogo_store import CatalogStore
+
+
+def _items(n, desde=1):
+    return [{"id": i, "nombre": f"P{i}", "marca": "M", "precio": float(i)} for i in range(desde, desde + n)]
+
+
+def test_version_monotona_entre_recargas():
+    cat = CatalogStore(_items(3))
+    vistas = {cat.version}
+    cat.insert({"nombre": "nuevo"})
+    vistas.add(cat.version)
+    for items in (_items(3), _items(5, desde=10), [], _items(2)):
+        antes = cat.version
+        cat.replace_all(items)
+        assert cat.version > antes
+        assert cat.version not in vistas   # ninguna recarga repite una versión ya vista
+        vistas.add(cat.version)
+
+
+def test_vista_no_queda_vieja_tras_recargar():
+    cat = CatalogStore(_items(3))
+    assert len(cat.view()) == 3
+    cat.replace_all(_items(3, desde=100))
+    assert cat.view()["id"].tolist() == [100, 101, 102]
+    cat.replace_all([])
+    assert cat.view().empty
+
+
+def test_altas_bajas_y_ediciones():
+    cat = CatalogStore(_items(3))
+    nuevo = cat.insert({"nombre": "X", "marca": "Otra"})
+    assert nuevo == 4 and cat.get(4)["marca"] == "Otra"
+    cat.update(2, {"precio": 9.5})
+    assert cat.get(2)["precio"] == 9.5
+    cat.delete(1)
+    assert 1 not in cat and len(cat) == 3
+    assert sorted(cat.ids().tolist()) == [2, 3, 4]
+
+
+def test_nombres_solo_de_los_ids_pedidos():
+    cat = CatalogStore(_items(5))
+    cat.delete(3)
+    assert cat.nombres([4, 3, 1, 99]) == {4: "P4", 1: "P1"}
+    assert cat.nombres([]) == {}
+
+
+def test_cambios_desde_solo_trae_lo_tocado():
+    cat = CatalogStore(_items(5))
+    v = cat.version
+    assert cat.cambios_desde(v) == ({}, [])
+    cat.update(2, {"precio": 9.5})
+    nuevo = cat.insert({"nombre": "X"})
+    cat.delete(4)
+    filas, bajas = cat.cambios_desde(v)
+    assert sorted(filas) == [2, nuevo] and bajas == [4]
+    assert filas[2] == cat.tuplas()[2]
+    v2 = cat.version
+    cat.update(2, {"stock": 1})
+    assert list(cat.cambios_desde(v2)[0]) == [2]
+    cat.replace_all(_items(2))
+    assert cat.cambios_desde(v2) is None            # carga completa: hay que tomar tuplas()
+    assert cat.cambios_desde(cat.version) == ({}, [])
@@ -0,0 +1,106 @@
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+import catalogo_urls
+from catalogo_imagenes import ImageStore
+from catalogo_urls import URLImageCache
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8), (240, 180, 200)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+PNG = _png()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pedidos: list = []
+
+    def do_GET(self):
+        self.pedidos.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/img.png":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            cuerpo = PNG
+        elif self.path in ("/grande.png", "/sin-largo.png"):
+            cuerpo = PNG + b"\0" * 4096
+        elif self.path.startswith("/lento"):
+            time.sleep(2)
+            cuerpo = PNG
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        if self.path != "/sin-largo.png":        # sin largo: se lee hasta que cierra
+            self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    _Handler.pedidos = []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    uc = URLImageCache(ImageStore(tmp_path / "img", workers=1), tmp_path / "urls", timeout=5.0)
+    yield uc
+    uc.close()
+
+
+def test_get_condicional_revalida_con_304(servidor, cache):
+    url = f"{servidor}/img.png"
+    h = cache.resolver([url])[url]
+    assert h and cache.entrada(url)["etag"] == '"v1"'
+    cache.entrada(url)["expira"] = 0          # vencida: se revalida con If-None-Match
+    assert cache.resolver([url])[url] == h
+    assert _Handler.pedidos == [("/img.png", None), ("/img.png", '"v1"')]
+    assert cache.vigente(url)
+
+
+def test_cache_negativa_no_reintenta(servidor, cache):
+    url = f"{servidor}/roto.png"
+    assert cache.resolver([url])[url] is None
+    assert cache.fallida(url) and cache.entrada(url)["error"] == "HTTP 404"
+    cache.resolver([url])
+    assert len(_Handler.pedidos) == 1
+
+
+@pytest.mark.parametrize("ruta", ["/grande.png", "/sin-largo.png"])
+def test_tope_de_tamano(servidor, cache, monkeypatch, ruta):
+    monkeypatch.setattr(catalogo_urls, "MAX_BYTES", len(PNG) + 100)
+    url = f"{servidor}{ruta}"
+    assert cache.resolver([url])[url] is None
+    assert cache.entrada(url)["error"] == "imagen demasiado grande"
+
+
+def test_resolver_respeta_un_solo_timeout(servidor, cache):
+    en_curso = f"{servidor}/lento1.png"
+    cache.prefetch([en_curso])                # otra sesión ya la está bajando
+    time.sleep(0.1)
+    t = time.perf_counter()
+    cache.resolver([f"{servidor}/lento2.png", en_curso], timeout=0.5)
+    assert time.perf_counter() - t < 0.8      # no 2 × timeout
+    cache.resolver([f"{servidor}/lento2.png", en_curso])   # no dejar descargas vivas tras el test
@@ -0,0 +1,145 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import instantaneas
+from instantaneas import Diario
+
+
+def _partes(**filas):
+    return {"filas": dict(filas)}
+
+
+def test_deshacer_y_rehacer_sobreviven_a_una_recarga(tmp_path):
+    d = Diario(tmp_path)
+    d.iniciar(_partes(a=1))
+    assert d.registrar(_partes(a=1, b=2))
+    assert not d.registrar(_partes(a=1, b=2))         # sin cambios: sin entrada
+    assert d.registrar(_partes(a=3, b=2))
+    assert d.deshacer() == _partes(a=1, b=2)
+    assert d.rehacer() == _partes(a=3, b=2)
+    assert d.deshacer() == _partes(a=1, b=2)
+
+    otro = Diario(tmp_path)
+    assert otro.recuperado and otro.estado() == _partes(a=1, b=2)
+    assert otro.puede_deshacer and otro.puede_rehacer
+
+
+def test_registrar_parciales_solo_compara_lo_tocado(tmp_path):
+    d = Diario(tmp_path)
+    d.iniciar(_partes(a=1, b=2, c=3))
+    assert not d.registrar({}, {"filas": ({"a": 1}, [])})   # tocada pero igual
+    assert d.registrar({}, {"filas": ({"b": 5}, ["c", "z"])})
+    assert d.hechos[-1] == {"filas": ({"b": 5}, ["c"])}
+    assert d.estado() == _partes(a=1, b=5)
+    assert d.deshacer() == _partes(a=1, b=2, c=3)
+
+
+def test_diario_cortado_se_trunca_en_la_ultima_entrada_sana(tmp_path):
+    d = Diario(tmp_path)
+    d.iniciar(_partes(a=1))
+    d.registrar(_partes(a=2))
+    d.registrar(_partes(a=3))
+    diario = d._archivo("diario")
+    sano = diario.stat().st_size
+    with diario.open("ab") as f:
+        f.write(b"\0\0\0\x10basura")                  # escritura a medias
+    otro = Diario(tmp_path)
+    assert otro.estado() == _partes(a=3)
+    assert diario.stat().st_size == sano
+
+    data = bytearray(diario.read_bytes())
+    data[-1] ^= 0xFF                                   # la última entrada no pasa el crc
+    diario.write_bytes(bytes(data))
+    assert Diario(tmp_path).estado() == _partes(a=2)
+
+
+def test_compactar_conserva_deshacer_y_rehacer(tmp_path, monkeypatch):
+    monkeypatch.setattr(instantaneas, "MAX_DESHACER", 3)
+    d = Diario(tmp_path)
+    d.iniciar(_partes(n=0))
+    for i in range(1, 9):
+        d.registrar(_partes(n=i))
+    d.deshacer()
+    d.deshacer()
+    d.compactar()                                      # base n=3; quedan 4..6 y rehacer 7, 8
+    assert d.gen == 2 and d.base == _partes(n=3) and len(d.hechos) == 3
+
+    otro = Diario(tmp_path)
+    assert otro.estado() == _partes(n=6)
+    assert otro.rehacer() == _partes(n=7) and otro.rehacer() == _partes(n=8)
+    for esperado in (7, 6, 5, 4, 3):
+        assert otro.deshacer() == _partes(n=esperado)
+    assert not otro.puede_deshacer
+
+
+def test_el_diario_se_compacta_solo(tmp_path, monkeypatch):
+    monkeypatch.setattr(instantaneas, "MAX_DESHACER", 2)
+    monkeypatch.setattr(instantaneas, "LIMITE_DIARIO", 4)
+    d = Diario(tmp_path)
+    d.iniciar(_partes(n=0))
+    for i in range(1, 6):
+        d.registrar(_partes(n=i))
+    assert d.gen == 2 and d.entradas == 2
+    assert Diario(tmp_path).estado() == _partes(n=5)
+
+
+def test_base_danada_vuelve_a_la_generacion_anterior(tmp_path, monkeypatch):
+    monkeypatch.setattr(instantaneas, "MAX_DESHACER", 1)
+    d = Diario(tmp_path)
+    d.iniciar(_partes(a=1))
+    d.registrar(_partes(a=2))
+    d.compactar()                                      # gen 2; la 1 queda de respaldo
+    d.registrar(_partes(a=3))
+    base = d._archivo("base")
+    base.write_bytes(instantaneas._MAGIA + b"no es zlib")
+
+    otro = Diario(tmp_path)
+    assert otro.recuperado and otro.estado() == _partes(a=2)
+    assert Diario(tmp_path).estado() == _partes(a=2)   # la vigente quedó reescrita
+
+
+@pytest.mark.parametrize("basura", [b"no es zlib", b"\x78\x9c\x03\x00\x00\x00\x00\x01"])
+def test_sin_generacion_legible_arranca_de_cero(tmp_path, basura):
+    d = Diario(tmp_path)
+    d.iniciar(_partes(a=1))
+    d._archivo("base").write_bytes(instantaneas._MAGIA + basura)
+    d._archivo("base", d.gen - 1).unlink(missing_ok=True)
+    otro = Diario(tmp_path)
+    assert not otro.recuperado
+    otro.iniciar(_partes(b=1))
+    assert Diario(tmp_path).estado() == _partes(b=1)
+
+
+APP = """
+import streamlit as st
+from instantaneas import diario_sesion
+st.session_state.setdefault("n", 0)
+diario = diario_sesion("prueba", lambda: {"n": {0: st.session_state.n}},
+                       lambda partes: st.session_state.update(n=partes["n"][0]))
+st.write(st.session_state.n)
+"""
+
+
+def test_token_compartido_con_una_sesion_viva_se_bifurca(tmp_path, monkeypatch):
+    monkeypatch.setattr(instantaneas, "DIR_ESTADO", tmp_path)
+    primera = AppTest.from_string(APP)
+    primera.query_params["sesion"] = "compartido"
+    primera.run()
+    assert not primera.exception
+
+    # AppTest usa siempre el mismo id de sesión: la otra pestaña se anota a mano
+    (tmp_path / "prueba" / "compartido" / "DUENO").write_text("otra")
+    monkeypatch.setattr(instantaneas, "_viva", lambda sesion: sesion == "otra")   # sigue abierta
+    segunda = AppTest.from_string(APP)
+    segunda.query_params["sesion"] = "compartido"
+    segunda.run()
+    assert not segunda.exception
+    token = segunda.query_params["sesion"]
+    assert token != "compartido"
+    assert (tmp_path / "prueba" / token / "ACTUAL").exists()
+
+    monkeypatch.setattr(instantaneas, "_viva", lambda sesion: False)  # recarga: la otra ya cerró
+    tercera = AppTest.from_string(APP)
+    tercera.query_params["sesion"] = "compartido"
+    tercera.run()
+    assert tercera.query_params["sesion"] == "compartido"
@@ -0,0 +1,108 @@
+import json
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import perfilado
+
+INIT_ORIGINAL = pd.DataFrame.__init__
+
+
+@pytest.fixture
+def traza(tmp_path, monkeypatch):
+    ruta = tmp_path / "traza.jsonl"
+    monkeypatch.setattr(perfilado, "TRAZA", ruta)
+    return lambda: [json.loads(l) for l in ruta.read_text().splitlines()] if ruta.exists() else []
+
+
+def _app(script):
+    at = AppTest.from_string(script, default_timeout=30)
+    at.query_params["perfil"] = "1"
+    return at
+
+
+def test_rerun_y_stop_dentro_del_lanzador_quedan_en_la_traza(traza):
+    at = _app("""
+import streamlit as st
+from perfilado import cierre, iniciar
+with cierre():
+    p = iniciar("x")
+    p.marca("a")
+    n = st.session_state.n = st.session_state.get("n", 0) + 1
+    if n == 1:
+        st.rerun()
+    if n == 2:
+        st.stop()
+    p.frame("tabla")
+    p.panel()
+""")
+    at.run()
+    at.run()
+    assert not at.exception
+    lineas = traza()
+    assert [r["fin"] for r in lineas] == ["rerun", "stop", "completo"]
+    assert lineas[-1]["frames"] == 1 and lineas[-1]["contadores"] == {"DataFrame: tabla": 1}
+    assert "a" in lineas[0]["fases"]
+
+
+def test_pagina_sola_cierra_el_rerun_cortado_al_siguiente(traza):
+    at = _app("""
+import streamlit as st
+from perfilado import iniciar
+p = iniciar("x")
+p.marca("a")
+if not st.session_state.get("listo"):
+    st.session_state.listo = True
+    st.stop()
+p.panel()
+""")
+    at.run()
+    assert traza() == []
+    at.run()
+    assert [r["fin"] for r in traza()] == ["cortado", "completo"]
+
+
+def test_no_parchea_pandas(traza):
+    at = _app("""
+import pandas as pd
+from perfilado import iniciar
+p = iniciar("x")
+pd.DataFrame({"a": [1]})
+p.panel()
+""")
+    at.run()
+    assert pd.DataFrame.__init__ is INIT_ORIGINAL
+    assert traza()[0]["frames"] == 0   # solo cuenta lo que la app anota con perfil.frame
+
+
+def test_mide_bytes_sin_anotar_el_contexto(traza):
+    at = _app("""
+import streamlit as st
+from perfilado import iniciar
+from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+p = iniciar("x")
+st.write("hola")
+ctx = get_script_run_ctx()
+st.session_state.atributos = sorted(a for a in vars(ctx) if "perfil" in a)
+p.panel()
+""")
+    at.run()
+    at.run()                                   # el mismo contexto no se envuelve dos veces
+    assert not at.exception
+    assert at.session_state["atributos"] == []
+    lineas = traza()
+    assert all(r["bytes"] > 0 and r["mensajes"] > 0 for r in lineas)
+    assert lineas[0]["mensajes"] == lineas[1]["mensajes"]
+
+
+def test_sin_enqueue_no_mide_bytes(traza, monkeypatch):
+    monkeypatch.setattr(perfilado, "_contar_bytes", lambda: False)   # otra versión de Streamlit
+    at = _app("""
+from perfilado import iniciar
+p = iniciar("x")
+p.panel()
+""")
+    at.run()
+    assert not at.exception
+    assert traza()[0]["bytes"] is None and traza()[0]["mensajes"] is None
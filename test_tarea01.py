@@ -0,0 +1,91 @@
+import datetime as dt
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+APP = str(Path(__file__).with_name("tarea01.py"))
+
+
+def _agenda(n):
+    ini = dt.datetime(2026, 10, 19, 9, 0)
+    agenda = []
+    for k in range(n):
+        fin = ini + dt.timedelta(minutes=15)
+        agenda.append({"Tema": f"Tema {k}", "Responsable": "Ana", "Inicio": ini.strftime("%H:%M"),
+                       "Fin": fin.strftime("%H:%M"), "Min": 15, "Tipo": "Decisión", "Objetivo": "",
+                       "_start_dt": ini, "_end_dt": fin, "_id": k + 1, "_auto": k > 0})
+        ini = fin
+    return agenda
+
+
+def _app(tmp_path, monkeypatch, n):
+    monkeypatch.chdir(tmp_path)   # base de reuniones y archivos de sesión en un directorio temporal
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["agenda"] = _agenda(n)
+    at.session_state["next_id"] = n + 1
+    at.session_state["meta"] = {"titulo": "Prueba", "fecha": dt.date(2026, 10, 19), "zona": "America/Lima",
+                                "lugar": "", "anfitrion": "", "link": ""}
+    return at
+
+
+def _modo(at):
+    return next(r.value for r in at.radio if r.label == "Modo de edición")
+
+
+def test_agenda_larga_abre_en_tabla_y_exporta(tmp_path, monkeypatch):
+    # Más de 30 bloques: el editor por lotes es el modo por defecto y la
+    # exportación de abajo sigue usando la firma de agenda_export.
+    at = _app(tmp_path, monkeypatch, 31)
+    at.run()
+    assert not at.exception, at.exception
+    assert _modo(at) == "Tabla (por lotes)"
+    assert any("CSV" in b.label for b in at.get("download_button"))
+
+
+def test_agenda_corta_abre_en_lista(tmp_path, monkeypatch):
+    at = _app(tmp_path, monkeypatch, 3)
+    at.run()
+    assert not at.exception, at.exception
+    assert _modo(at) == "Lista"
+
+
+def test_diario_solo_recorre_la_agenda_si_cambio(tmp_path, monkeypatch):
+    import agenda_store
+
+    at = _app(tmp_path, monkeypatch, 3)
+    at.run()
+    recorridas = []
+    original = agenda_store.a_partes
+    monkeypatch.setattr(agenda_store, "a_partes", lambda meta, agenda, *a: (
+        recorridas.append(agenda is not None), original(meta, agenda, *a))[1])
+    at.run()                                   # rerun sin cambios: solo la meta
+    at.button(key="up_2").click().run()        # mover un bloque: agenda completa, un delta
+    assert not at.exception, at.exception
+    assert recorridas == [False, True]
+    diario = at.session_state["_diario_tarea01"]
+    assert len(diario.hechos) == 1 and "orden" in diario.hechos[0]
+
+
+def test_import_fallido_no_deja_bloques_a_medias_ni_se_repite(tmp_path, monkeypatch):
+    import agenda_import
+
+    llamadas = []
+
+    def importar_roto(stream, nombre, agenda, arbol, next_id, *a, **kw):
+        llamadas.append(nombre)
+        nuevo = dict(_agenda(1)[0], _id=next_id, Tema="A medias")
+        agenda.append(nuevo)                       # un primer lote ya volcado…
+        arbol.add(next_id, nuevo["_start_dt"], nuevo["_end_dt"])
+        raise ValueError("DTSTART mal formado")    # …y el segundo falla
+
+    at = _app(tmp_path, monkeypatch, 3)
+    at.run()
+    arbol_antes = len(at.session_state["arbol"])
+    monkeypatch.setattr(agenda_import, "importar", importar_roto)
+    at.file_uploader(key="import_agenda").upload("cal.ics", b"BEGIN:VCALENDAR").run()
+    assert not at.exception, at.exception
+    assert [it["_id"] for it in at.session_state["agenda"]] == [1, 2, 3]
+    assert len(at.session_state["arbol"]) == arbol_antes and at.session_state["next_id"] == 4
+    assert any("DTSTART mal formado" in e.value for e in at.error)
+    at.run()
+    assert llamadas == ["cal.ics"]                 # el mismo archivo no se reprocesa